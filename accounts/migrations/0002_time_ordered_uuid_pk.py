@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-19 08:16
+
+import core.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        # The default is applied in Python, so there is nothing to change in
+        # the database (and SQLite would otherwise rebuild every table).
+        # Existing uuid4 keys stay as they are; new rows get uuid7 keys.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='address',
+                    name='id',
+                    field=models.UUIDField(default=core.uuids.generate_uuid, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from cart.models import Cart, CartItem
+
+
+class Command(BaseCommand):
+    help = "Delete inactive and stale guest carts (and their items) in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Purge carts whose cart row and lines are this many days old",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to pause between batches (lets replicas catch up)",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+
+        # Line writes don't touch the cart row, so a cart is only stale
+        # once its lines are too
+        recent_lines = CartItem.objects.filter(
+            cart=OuterRef("pk"), modified__gte=cutoff
+        )
+        queryset = Cart.objects.filter(
+            Q(is_active=False) | Q(user__isnull=True), modified__lt=cutoff
+        ).exclude(Exists(recent_lines))
+
+        if options["dry_run"]:
+            self.stdout.write(f"{queryset.count()} carts would be purged")
+            return
+
+        started = time.monotonic()
+        last_pk = None
+        carts_deleted = items_deleted = 0
+
+        while True:
+            batch = queryset.order_by("pk")
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+
+            batch_started = time.monotonic()
+            with transaction.atomic():
+                items, _ = CartItem.objects.filter(cart_id__in=pks).delete()
+                carts, _ = Cart.objects.filter(pk__in=pks).delete()
+            elapsed = time.monotonic() - batch_started
+
+            items_deleted += items
+            carts_deleted += carts
+            self.stdout.write(
+                f"batch: {carts} carts, {items} items "
+                f"({(carts + items) / max(elapsed, 1e-6):.0f} rows/s)"
+            )
+
+            if len(pks) < batch_size:
+                break
+            time.sleep(options["sleep"])
+
+        total_elapsed = time.monotonic() - started
+        rows = carts_deleted + items_deleted
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {carts_deleted} carts and {items_deleted} items "
+                f"in {total_elapsed:.2f}s ({rows / max(total_elapsed, 1e-6):.0f} rows/s)"
+            )
+        )
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['session_key', 'is_active'], name='carts_session_30e080_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['user', 'is_active'], name='carts_user_id_47d898_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['is_active', 'modified'], name='carts_is_acti_8b3a5b_idx'),
+        ),
+    ]
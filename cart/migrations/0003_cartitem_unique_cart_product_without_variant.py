@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:50
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    # unique_together never caught lines without a variant (NULLs don't
+    # conflict), so racing add-to-carts could leave several: fold them into
+    # the oldest line before the constraint can be created
+    CartItem = apps.get_model('cart', 'CartItem')
+    duplicates = list(
+        CartItem.objects.filter(variant__isnull=True)
+        .values('cart_id', 'product_id')
+        .annotate(lines=Count('id'), total=Sum('quantity'))
+        .filter(lines__gt=1)
+    )
+    for row in duplicates:
+        lines = CartItem.objects.filter(
+            cart_id=row['cart_id'], product_id=row['product_id'], variant__isnull=True
+        )
+        keep = lines.order_by('created', 'id').values_list('id', flat=True).first()
+        lines.exclude(id=keep).delete()
+        CartItem.objects.filter(id=keep).update(quantity=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_cart_carts_session_30e080_idx_and_more'),
+        ('products', '0004_remove_brand_logo_remove_brand_website_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('variant__isnull', True)), fields=('cart', 'product'), name='unique_cart_product_without_variant'),
+        ),
+    ]
@@ -2,7 +2,8 @@
 
 from django.conf import settings
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import IntegrityError, connections, models, transaction
+from django.utils import timezone
 
 from core.models import TimeStampedModel, UUIDModel
 from products.models import Product, ProductVariant
@@ -26,6 +27,13 @@ class Cart(TimeStampedModel, UUIDModel):
 
     class Meta:
         db_table = "carts"
+        indexes = [
+            # Hot lookups in DatabaseCartStorage
+            models.Index(fields=["session_key", "is_active"]),
+            models.Index(fields=["user", "is_active"]),
+            # purge_carts
+            models.Index(fields=["is_active", "modified"]),
+        ]
 
     def __str__(self):
         if self.user:
@@ -37,6 +45,168 @@ class Cart(TimeStampedModel, UUIDModel):
         return sum(item.subtotal for item in self.items.all())
 
 
+class CartItemManager(models.Manager):
+    # Columns written by the ON CONFLICT upserts
+    _upsert_fields = [
+        "id",
+        "created",
+        "modified",
+        "cart",
+        "product",
+        "variant",
+        "quantity",
+    ]
+
+    def add_quantity(self, cart, product, variant, quantity):
+        """
+        Atomically add quantity to a cart line, creating it if needed.
+        Returns (item_id, item_quantity, cart_total_quantity).
+
+        PostgreSQL / SQLite: one INSERT ... ON CONFLICT DO UPDATE statement
+        that also returns the cart total. Other backends: F() update fallback.
+        """
+        connection = connections[self.db]
+        if connection.vendor in ("postgresql", "sqlite"):
+            return self._upsert(connection, cart, product, variant, quantity)
+        return self._add_quantity_fallback(cart, product, variant, quantity)
+
+    def add_quantities(self, cart, lines):
+        """
+        Add quantities to many lines of one cart, creating them if needed:
+        `lines` is [(product, variant, quantity), ...].
+
+        PostgreSQL / SQLite: one INSERT ... ON CONFLICT DO UPDATE per batch
+        of lines with a variant and one per batch without (the two have
+        different conflict targets). Other backends: add_quantity() per line.
+        """
+        # A statement can't update the same row twice: fold repeated lines
+        merged = {}
+        for product, variant, quantity in lines:
+            key = (product.pk, variant.pk if variant else None)
+            if key in merged:
+                quantity += merged[key][2]
+            merged[key] = (product, variant, quantity)
+
+        connection = connections[self.db]
+        if connection.vendor not in ("postgresql", "sqlite"):
+            for product, variant, quantity in merged.values():
+                self._add_quantity_fallback(cart, product, variant, quantity)
+            return
+
+        fields = [self.model._meta.get_field(name) for name in self._upsert_fields]
+        without_variant = [row for row in merged.values() if row[1] is None]
+        with_variant = [row for row in merged.values() if row[1] is not None]
+        for rows in (without_variant, with_variant):
+            if not rows:
+                continue
+            batch_size = connection.ops.bulk_batch_size(fields, rows)
+            for start in range(0, len(rows), batch_size):
+                sql, params = self._upsert_insert(
+                    connection, cart, rows[start : start + batch_size]
+                )
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+
+    def _upsert_insert(self, connection, cart, rows):
+        """
+        INSERT ... ON CONFLICT DO UPDATE adding to the quantities of `rows`
+        ([(product, variant, quantity), ...], all with or all without a
+        variant), and its params.
+        """
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+        now = timezone.now()
+
+        fields = [opts.get_field(name) for name in self._upsert_fields]
+        column = {field.name: qn(field.column) for field in fields}
+        params = []
+        for product, variant, quantity in rows:
+            values = [
+                opts.pk.get_default(),
+                now,
+                now,
+                cart.pk,
+                product.pk,
+                variant.pk if variant else None,
+                quantity,
+            ]
+            params += [
+                field.get_db_prep_save(value, connection)
+                for field, value in zip(fields, values)
+            ]
+        qty_col, cart_col = column["quantity"], column["cart"]
+
+        if rows[0][1] is None:
+            target = f"({cart_col}, {column['product']}) WHERE {column['variant']} IS NULL"
+        else:
+            target = f"({cart_col}, {column['product']}, {column['variant']})"
+
+        placeholders = f"({', '.join(['%s'] * len(fields))})"
+        sql = (
+            f"INSERT INTO {table} ({', '.join(column.values())}) "
+            f"VALUES {', '.join([placeholders] * len(rows))} "
+            f"ON CONFLICT {target} DO UPDATE SET "
+            f"{qty_col} = {table}.{qty_col} + EXCLUDED.{qty_col}, "
+            f"{column['modified']} = EXCLUDED.{column['modified']}"
+        )
+        return sql, params
+
+    def _upsert(self, connection, cart, product, variant, quantity):
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+        id_col, qty_col = qn(opts.pk.column), qn(opts.get_field("quantity").column)
+        cart_col = qn(opts.get_field("cart").column)
+        insert, params = self._upsert_insert(
+            connection, cart, [(product, variant, quantity)]
+        )
+        cart_pk = opts.get_field("cart").get_db_prep_save(cart.pk, connection)
+
+        if connection.vendor == "postgresql":
+            # The outer SELECT sees the pre-statement snapshot, so add the
+            # upserted line to the sum of the other lines.
+            sql = (
+                f"WITH line AS ({insert} RETURNING {id_col}, {qty_col}) "
+                f"SELECT line.{id_col}, line.{qty_col}, line.{qty_col} + COALESCE("
+                f"(SELECT SUM({qty_col}) FROM {table} "
+                f"WHERE {cart_col} = %s AND {id_col} <> line.{id_col}), 0) FROM line"
+            )
+        else:
+            # SQLite evaluates RETURNING after the row is written.
+            sql = (
+                f"{insert} RETURNING {id_col}, {qty_col}, "
+                f"(SELECT SUM({qty_col}) FROM {table} WHERE {cart_col} = %s)"
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*params, cart_pk])
+            item_id, item_quantity, total = cursor.fetchone()
+
+        return opts.pk.to_python(item_id), item_quantity, total
+
+    def _add_quantity_fallback(self, cart, product, variant, quantity):
+        lookup = {"cart": cart, "product": product, "variant": variant}
+        increment = {
+            "quantity": models.F("quantity") + quantity,
+            "modified": timezone.now(),
+        }
+
+        with transaction.atomic(using=self.db):
+            if not self.filter(**lookup).update(**increment):
+                try:
+                    with transaction.atomic(using=self.db):
+                        self.create(quantity=quantity, **lookup)
+                except IntegrityError:
+                    self.filter(**lookup).update(**increment)
+
+            item_id, item_quantity = self.filter(**lookup).values_list(
+                "id", "quantity"
+            ).get()
+            total = self.filter(cart=cart).aggregate(total=models.Sum("quantity"))
+        return item_id, item_quantity, total["total"]
+
+
 class CartItem(TimeStampedModel, UUIDModel):
     """
     Items in shopping cart.
@@ -49,18 +219,36 @@ class CartItem(TimeStampedModel, UUIDModel):
     )
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
 
+    objects = CartItemManager()
+
     class Meta:
         db_table = "cart_items"
         unique_together = ["cart", "product", "variant"]
+        constraints = [
+            # NULLs never conflict in unique_together; this covers lines
+            # without a variant and is the ON CONFLICT target for them.
+            models.UniqueConstraint(
+                fields=["cart", "product"],
+                condition=models.Q(variant__isnull=True),
+                name="unique_cart_product_without_variant",
+            )
+        ]
 
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
 
+    @property
+    def unit_price(self):
+        # effective_price is set from the price table when lines are loaded
+        price = getattr(self, "effective_price", None)
+        if price is None:
+            price = self.variant.final_price if self.variant else self.product.price
+        return price
+
     @property
     def subtotal(self):
         """Calculate cart item total"""
-        price = self.variant.final_price if self.variant else self.product.price
-        return price * self.quantity
+        return self.unit_price * self.quantity
 
     @property
     def total_price(self):
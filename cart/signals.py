@@ -0,0 +1,13 @@
+# cart/signals.py
+
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from .storage import merge_guest_cart
+
+
+@receiver(user_logged_in)
+def merge_guest_cart_on_login(sender, request, user, **kwargs):
+    """Guest carts only reach the database once their owner logs in"""
+    if request is not None:
+        merge_guest_cart(request, user)
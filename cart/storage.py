@@ -0,0 +1,410 @@
+# cart/storage.py
+
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from products.models import Product, ProductVariant
+from products.pricing import aapply_effective_prices, apply_effective_prices
+
+from .models import Cart, CartItem
+
+
+@dataclass
+class CartLine:
+    """
+    Cart line held outside the database (session / cache backends).
+    Mirrors the CartItem attributes the views and templates rely on.
+    """
+
+    id: str
+    product: Product
+    variant: ProductVariant | None
+    quantity: int
+    effective_price: Decimal | None = None
+
+    @property
+    def unit_price(self):
+        if self.effective_price is not None:
+            return self.effective_price
+        return self.variant.final_price if self.variant else self.product.price
+
+    @property
+    def subtotal(self):
+        return self.unit_price * self.quantity
+
+
+class BaseCartStorage:
+    """
+    Interface shared by every cart backend.
+    A storage is bound to one request and exposes the cart as a list of lines.
+
+    The a*() methods are the async API used by the async views. By default
+    they run the sync method in a thread: sessions have no async API, so
+    anything that reads or writes the session has to go through one.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def lines(self):
+        raise NotImplementedError
+
+    def raw_lines(self):
+        """Return [(product_id, variant_id, quantity), ...] without loading products"""
+        raise NotImplementedError
+
+    def add(self, product, variant, quantity):
+        """Add quantity to a line, return (line, cart_total_quantity)"""
+        raise NotImplementedError
+
+    def set_quantity(self, line_id, quantity):
+        """Return False if the line does not belong to this cart"""
+        raise NotImplementedError
+
+    def remove(self, line_id):
+        """Return False if the line does not belong to this cart"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def discard(self):
+        """Drop the cart entirely once its lines have been persisted elsewhere"""
+        self.clear()
+
+    def total_quantity(self):
+        raise NotImplementedError
+
+    def total_price(self):
+        return sum(line.subtotal for line in self.lines())
+
+    async def alines(self):
+        return await sync_to_async(self.lines)()
+
+    async def aadd(self, product, variant, quantity):
+        return await sync_to_async(self.add)(product, variant, quantity)
+
+    async def aset_quantity(self, line_id, quantity):
+        return await sync_to_async(self.set_quantity)(line_id, quantity)
+
+    async def aremove(self, line_id):
+        return await sync_to_async(self.remove)(line_id)
+
+    async def aclear(self):
+        return await sync_to_async(self.clear)()
+
+
+class DatabaseCartStorage(BaseCartStorage):
+    """
+    ORM backend: Cart / CartItem rows.
+    User-based for authenticated users, session-based for guests.
+    """
+
+    def __init__(self, request, user=None):
+        super().__init__(request)
+        self.user = user
+
+    def _lookup(self):
+        if self.user is not None:
+            return {"user": self.user, "is_active": True}
+
+        session_key = self.request.session.session_key
+        if not session_key:
+            return None
+        return {"session_key": session_key, "user": None, "is_active": True}
+
+    def get_cart(self, create=False):
+        lookup = self._lookup()
+        if lookup is None:
+            if not create:
+                return None
+            self.request.session.create()
+            lookup = self._lookup()
+
+        if create:
+            cart, _ = Cart.objects.get_or_create(**lookup)
+            return cart
+        return Cart.objects.filter(**lookup).first()
+
+    def lines(self):
+        cart = self.get_cart()
+        if cart is None:
+            return []
+        return apply_effective_prices(
+            list(cart.items.select_related("product", "variant__product"))
+        )
+
+    async def alines(self):
+        # Reads only the session key (from the cookie), never the session
+        lookup = self._lookup()
+        cart = await Cart.objects.filter(**lookup).afirst() if lookup else None
+        if cart is None:
+            return []
+        items = cart.items.select_related("product", "variant__product")
+        return await aapply_effective_prices([item async for item in items])
+
+    def raw_lines(self):
+        cart = self.get_cart()
+        if cart is None:
+            return []
+        return list(cart.items.values_list("product_id", "variant_id", "quantity"))
+
+    def add(self, product, variant, quantity):
+        cart = self.get_cart(create=True)
+        item_id, item_quantity, total = CartItem.objects.add_quantity(
+            cart, product, variant, quantity
+        )
+        item = CartItem(
+            id=item_id,
+            cart=cart,
+            product=product,
+            variant=variant,
+            quantity=item_quantity,
+        )
+        item._state.adding = False
+        return item, total
+
+    def _items(self):
+        cart = self.get_cart()
+        if cart is None:
+            return CartItem.objects.none()
+        return cart.items.all()
+
+    def set_quantity(self, line_id, quantity):
+        # `modified` keeps the cart from counting as stale in purge_carts
+        try:
+            return bool(
+                self._items()
+                .filter(id=line_id)
+                .update(quantity=quantity, modified=timezone.now())
+            )
+        except ValidationError:
+            return False
+
+    def remove(self, line_id):
+        cart = self.get_cart()
+        if cart is None:
+            return False
+        try:
+            deleted, _ = cart.items.filter(id=line_id).delete()
+        except ValidationError:
+            return False
+        if deleted:
+            # No line is left to carry the activity for purge_carts
+            Cart.objects.filter(pk=cart.pk).update(modified=timezone.now())
+        return bool(deleted)
+
+    def clear(self):
+        self._items().delete()
+
+    def discard(self):
+        cart = self.get_cart()
+        if cart is None:
+            return
+        cart.items.all().delete()
+        cart.is_active = False
+        cart.save(update_fields=["is_active", "modified"])
+
+    def total_quantity(self):
+        return self._items().aggregate(total=models.Sum("quantity"))["total"] or 0
+
+
+class KeyedCartStorage(BaseCartStorage):
+    """
+    Base for backends keeping lines as a plain dict outside the database:
+        {"<product_id>:<variant_id>": {"product": ..., "variant": ..., "quantity": ...}}
+    Nothing touches the carts tables until the lines are merged.
+    """
+
+    def _load(self):
+        raise NotImplementedError
+
+    def _save(self, data):
+        raise NotImplementedError
+
+    @staticmethod
+    def line_key(product_id, variant_id):
+        return f"{product_id}:{variant_id or ''}"
+
+    def lines(self):
+        data = self._load()
+        if not data:
+            return []
+
+        products = Product.objects.in_bulk({row["product"] for row in data.values()})
+        variants = ProductVariant.objects.select_related("product").in_bulk(
+            {row["variant"] for row in data.values() if row["variant"]}
+        )
+
+        lines = []
+        for key, row in data.items():
+            product = products.get(uuid.UUID(row["product"]))
+            variant = variants.get(uuid.UUID(row["variant"])) if row["variant"] else None
+            if product is None or (row["variant"] and variant is None):
+                continue
+            lines.append(CartLine(key, product, variant, row["quantity"]))
+        return apply_effective_prices(lines)
+
+    def raw_lines(self):
+        return [
+            (row["product"], row["variant"], row["quantity"])
+            for row in self._load().values()
+        ]
+
+    def add(self, product, variant, quantity):
+        data = self._load()
+        key = self.line_key(product.pk, variant.pk if variant else None)
+        row = data.setdefault(
+            key,
+            {
+                "product": str(product.pk),
+                "variant": str(variant.pk) if variant else None,
+                "quantity": 0,
+            },
+        )
+        row["quantity"] += quantity
+        self._save(data)
+        total = sum(line["quantity"] for line in data.values())
+        return CartLine(key, product, variant, row["quantity"]), total
+
+    def set_quantity(self, line_id, quantity):
+        data = self._load()
+        if line_id not in data:
+            return False
+        data[line_id]["quantity"] = quantity
+        self._save(data)
+        return True
+
+    def remove(self, line_id):
+        data = self._load()
+        if data.pop(line_id, None) is None:
+            return False
+        self._save(data)
+        return True
+
+    def clear(self):
+        self._save({})
+
+    def total_quantity(self):
+        return sum(row["quantity"] for row in self._load().values())
+
+
+class SessionCartStorage(KeyedCartStorage):
+    """
+    Guest cart kept in the session.
+    Combine with SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
+    for a completely DB-free guest mode.
+    """
+
+    session_key = "cart"
+
+    def _load(self):
+        return self.request.session.get(self.session_key, {})
+
+    def _save(self, data):
+        self.request.session[self.session_key] = data
+
+
+class CacheCartStorage(KeyedCartStorage):
+    """
+    Guest cart kept in the cache (CART_CACHE_ALIAS), write-behind:
+    rows are only written to the database when the cart is merged on
+    login or checkout. The cache key is a token stored in the session,
+    so it survives the session key rotation done by login().
+    """
+
+    token_key = "cart_token"
+
+    def __init__(self, request):
+        super().__init__(request)
+        self.cache = caches[getattr(settings, "CART_CACHE_ALIAS", "default")]
+        self.timeout = getattr(settings, "CART_CACHE_TIMEOUT", settings.SESSION_COOKIE_AGE)
+
+    def _cache_key(self, create=False):
+        token = self.request.session.get(self.token_key)
+        if token is None and create:
+            token = self.request.session[self.token_key] = uuid.uuid4().hex
+        return f"cart:{token}" if token else None
+
+    def _load(self):
+        key = self._cache_key()
+        if key is None:
+            return {}
+        return self.cache.get(key, {})
+
+    def _save(self, data):
+        key = self._cache_key(create=bool(data))
+        if key is None:
+            return
+        if data:
+            self.cache.set(key, data, self.timeout)
+        else:
+            self.cache.delete(key)
+
+
+def get_guest_storage(request):
+    storage_class = import_string(
+        getattr(settings, "CART_GUEST_STORAGE", "cart.storage.SessionCartStorage")
+    )
+    return storage_class(request)
+
+
+def get_cart_storage(request):
+    """Return the storage for the current visitor"""
+    if request.user.is_authenticated:
+        return DatabaseCartStorage(request, user=request.user)
+    return get_guest_storage(request)
+
+
+async def aget_cart_storage(request):
+    """
+    Async version of get_cart_storage().
+    Resolves request.user in a thread instead of using request.auser(): the
+    two cache separately, so the context processors would load the user again.
+    """
+    return await sync_to_async(get_cart_storage)(request)
+
+
+def merge_guest_cart(request, user):
+    """
+    Persist the guest cart into the user's database cart.
+    Returns the number of merged lines.
+    """
+    guest = get_guest_storage(request)
+    raw_lines = guest.raw_lines()
+    if not raw_lines:
+        return 0
+
+    products = Product.objects.in_bulk({product_id for product_id, _, _ in raw_lines})
+    variants = ProductVariant.objects.in_bulk(
+        {variant_id for _, variant_id, _ in raw_lines if variant_id}
+    )
+
+    lines = []
+    for product_id, variant_id, quantity in raw_lines:
+        product = products.get(_as_uuid(product_id))
+        variant = variants.get(_as_uuid(variant_id)) if variant_id else None
+        if product is None or (variant_id and variant is None):
+            continue
+        lines.append((product, variant, quantity))
+
+    target = DatabaseCartStorage(request, user=user)
+    with transaction.atomic():
+        if lines:
+            CartItem.objects.add_quantities(target.get_cart(create=True), lines)
+        guest.discard()
+
+    return len(lines)
+
+
+def _as_uuid(value):
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
@@ -1,3 +1,207 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Category, Product, ProductVariant
+
+from .models import Cart, CartItem
+
+User = get_user_model()
+
+
+def make_product(name="Shoe", price="10.00", **kwargs):
+    category, _ = Category.objects.get_or_create(name="Shoes", slug="shoes")
+    return Product.objects.create(
+        name=name,
+        description=name,
+        category=category,
+        price=Decimal(price),
+        cost_price=Decimal("1.00"),
+        stock_quantity=kwargs.pop("stock_quantity", 100),
+        **kwargs,
+    )
+
+
+class GuestCartStorageTests(TestCase):
+    def setUp(self):
+        self.product = make_product()
+
+    def add(self, quantity=1):
+        return self.client.post(
+            reverse("cart:add"), {"product_id": self.product.id, "quantity": quantity}
+        )
+
+    def test_session_guest_cart_does_not_write_cart_rows(self):
+        self.add(2)
+        response = self.add(3)
+
+        self.assertEqual(response.json()["item_quantity"], 5)
+        self.assertEqual(response.json()["cart_total_qty"], 5)
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(CartItem.objects.exists())
+
+        response = self.client.get(reverse("cart:detail"))
+        self.assertContains(response, "Shoe")
+        self.assertEqual(response.context["cart_total"], Decimal("50.00"))
+
+    @override_settings(CART_GUEST_STORAGE="cart.storage.CacheCartStorage")
+    def test_cache_guest_cart_update_and_remove(self):
+        item_id = self.add(1).json()["item_id"]
+
+        self.client.post(reverse("cart:update"), {f"quantities[{item_id}]": 4})
+        response = self.client.get(reverse("cart:detail"))
+        self.assertEqual(response.context["items"][0].quantity, 4)
+
+        self.client.post(reverse("cart:remove"), {"item_id": item_id})
+        self.assertRedirects(
+            self.client.get(reverse("cart:detail")), reverse("products:product_list")
+        )
+        self.assertFalse(Cart.objects.exists())
+
+    @override_settings(CART_GUEST_STORAGE="cart.storage.DatabaseCartStorage")
+    def test_database_guest_cart(self):
+        self.add(2)
+        self.assertEqual(CartItem.objects.get().quantity, 2)
+
+    def test_guest_cart_is_persisted_on_login(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "pw")
+        self.add(2)
+
+        self.client.force_login(user)
+
+        item = CartItem.objects.get(cart__user=user, cart__is_active=True)
+        self.assertEqual(item.quantity, 2)
+        self.assertEqual(self.add(1).json()["cart_total_qty"], 3)
+
+
+class PurgeCartsCommandTests(TestCase):
+    def test_purges_stale_guest_and_inactive_carts_only(self):
+        product = make_product()
+        user = User.objects.create_user("buyer", "buyer@example.com", "pw")
+        stale_guest = Cart.objects.create(session_key="old")
+        inactive = Cart.objects.create(user=user, is_active=False)
+        live_user = Cart.objects.create(user=user)
+        fresh_guest = Cart.objects.create(session_key="new")
+        for cart in (stale_guest, inactive, live_user, fresh_guest):
+            CartItem.objects.create(cart=cart, product=product, quantity=1)
+
+        old = timezone.now() - timedelta(days=60)
+        Cart.objects.exclude(pk=fresh_guest.pk).update(modified=old)
+        CartItem.objects.exclude(cart=fresh_guest).update(modified=old)
+
+        call_command("purge_carts", batch_size=1, sleep=0, stdout=StringIO())
+
+        self.assertQuerySetEqual(
+            Cart.objects.all(),
+            [live_user, fresh_guest],
+            ordered=False,
+        )
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_recent_line_writes_keep_an_old_cart(self):
+        product = make_product()
+        cart = Cart.objects.create(session_key="old")
+        old = timezone.now() - timedelta(days=60)
+        Cart.objects.update(modified=old)
+        CartItem.objects.add_quantity(cart, product, None, 1)
+
+        call_command("purge_carts", sleep=0, stdout=StringIO())
+        self.assertTrue(Cart.objects.filter(pk=cart.pk).exists())
+
+        CartItem.objects.update(modified=old)
+        call_command("purge_carts", sleep=0, stdout=StringIO())
+        self.assertFalse(Cart.objects.filter(pk=cart.pk).exists())
+
+
+class AddQuantityTests(TestCase):
+    def setUp(self):
+        self.cart = Cart.objects.create(session_key="abc")
+        self.product = make_product()
+        self.variant = ProductVariant.objects.create(
+            product=self.product, name="Large", sku="SHOE-L"
+        )
+
+    def test_upsert_returns_line_and_cart_totals(self):
+        add = CartItem.objects.add_quantity
+
+        first_id, qty, total = add(self.cart, self.product, None, 2)
+        self.assertEqual((qty, total), (2, 2))
+
+        same_id, qty, total = add(self.cart, self.product, None, 3)
+        self.assertEqual((same_id, qty, total), (first_id, 5, 5))
+
+        _, qty, total = add(self.cart, self.product, self.variant, 1)
+        self.assertEqual((qty, total), (1, 6))
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_fallback_matches_upsert(self):
+        add = CartItem.objects._add_quantity_fallback
+
+        add(self.cart, self.product, None, 2)
+        _, qty, total = add(self.cart, self.product, None, 3)
+        self.assertEqual((qty, total), (5, 5))
+
+        _, qty, total = add(self.cart, self.product, self.variant, 1)
+        self.assertEqual((qty, total), (1, 6))
+
+    def test_add_quantities_upserts_each_conflict_target_once(self):
+        other = make_product("Boot", sku="BOOT")
+        CartItem.objects.add_quantity(self.cart, self.product, None, 2)
+
+        lines = [
+            (self.product, None, 1),
+            (other, None, 4),
+            (self.product, self.variant, 1),
+            (self.product, self.variant, 2),  # folded into the line above
+        ]
+        with self.assertNumQueries(2):
+            CartItem.objects.add_quantities(self.cart, lines)
+
+        self.assertEqual(
+            set(self.cart.items.values_list("product__name", "variant", "quantity")),
+            {("Shoe", None, 3), ("Boot", None, 4), ("Shoe", self.variant.pk, 3)},
+        )
+
+
+class ConcurrentAddToCartTests(TransactionTestCase):
+    threads = 8
+    adds_per_thread = 25
+    # Retries of one add before the lock counts as a deadlock
+    lock_retries = 1000
+
+    def test_no_increments_are_lost(self):
+        cart = Cart.objects.create(session_key="abc")
+        product = make_product()
+
+        def worker():
+            try:
+                for _ in range(self.adds_per_thread):
+                    for attempt in range(self.lock_retries):
+                        try:
+                            CartItem.objects.add_quantity(cart, product, None, 1)
+                            break
+                        except OperationalError:
+                            # SQLite shared-cache table lock; Postgres never gets here
+                            if attempt == self.lock_retries - 1:
+                                raise
+                            time.sleep(0.001)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        item = CartItem.objects.get()
+        self.assertEqual(item.quantity, self.threads * self.adds_per_thread)
@@ -1,63 +1,52 @@
-from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import models, transaction
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404, redirect
 from django.views import View
-from django.views.generic import DetailView
+from django.views.generic import TemplateView
 
 from products.models import Product, ProductVariant
+from promotions.engine import price_cart
 
-from .models import Cart, CartItem
-
-User = get_user_model()
+from .storage import aget_cart_storage, merge_guest_cart
 
 
 class CartMixin:
     """
-    Helper mixin to fetch or create the current cart.
-    - Auth users: user-based cart
-    - Guests: session-based cart
+    Helper mixin to fetch the storage backing the current cart.
+    - Auth users: user-based cart (database)
+    - Guests: CART_GUEST_STORAGE (session by default)
+    The cart views are async; they only use the storage's a*() methods.
     """
 
-    def _get_or_create_cart(self, request):
-        if request.user.is_authenticated:
-            cart, _ = Cart.objects.get_or_create(user=request.user, is_active=True)
-            return cart
-
-        # Guest cart
-        if not request.session.session_key:
-            request.session.create()
-        session_key = request.session.session_key
+    async def get_cart_storage(self, request):
+        return await aget_cart_storage(request)
 
-        cart, _ = Cart.objects.get_or_create(
-            session_key=session_key, user=None, is_active=True
-        )
-        return cart
 
-
-class CartDetailView(CartMixin, DetailView):
-    model = Cart
+class CartDetailView(CartMixin, TemplateView):
     template_name = "cart/cart_detail.html"
-    context_object_name = "cart"
-
-    def get_object(self, queryset=None):
-        return self._get_or_create_cart(self.request)
 
-    def get(self, request, *args, **kwargs):
-        cart = self.get_object()
+    async def get(self, request, *args, **kwargs):
+        storage = await self.get_cart_storage(request)
+        items = await storage.alines()
 
-        if not cart.items.exists():
+        if not items:
             return redirect("products:product_list")
 
-        self.object = cart
-        context = self.get_context_data()
+        subtotal = sum(item.subtotal for item in items)
+        promotions = await sync_to_async(price_cart)(items)
+        context = self.get_context_data(
+            items=items,
+            cart_subtotal=subtotal,
+            promotions=[(rule.name, amount) for rule, amount in promotions.applied],
+            cart_total=subtotal - promotions.discount,
+        )
         return self.render_to_response(context)
 
 
 class AddToCartView(CartMixin, View):
-    def post(self, request, *args, **kwargs):
-        cart = self._get_or_create_cart(request)
+    async def post(self, request, *args, **kwargs):
+        storage = await self.get_cart_storage(request)
 
         product_id = request.POST.get("product_id")
         variant_id = request.POST.get("variant_id")
@@ -69,25 +58,15 @@ class AddToCartView(CartMixin, View):
         if quantity <= 0:
             return JsonResponse({"error": "quantity must be >= 1"}, status=400)
 
-        product = get_object_or_404(Product, id=product_id)
+        product = await aget_object_or_404(Product, id=product_id)
         variant = None
 
         if variant_id:
-            variant = get_object_or_404(ProductVariant, id=variant_id, product=product)
-
-        item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            variant=variant,
-            defaults={"quantity": quantity},
-        )
-
-        if not created:
-            item.quantity += quantity
-
-        item.save()
+            variant = await aget_object_or_404(
+                ProductVariant, id=variant_id, product=product
+            )
 
-        total_qty = cart.items.aggregate(total=models.Sum("quantity"))["total"] or 0
+        item, total_qty = await storage.aadd(product, variant, quantity)
 
         return JsonResponse(
             {
@@ -106,8 +85,8 @@ class UpdateCartItemView(CartMixin, View):
 
     """
 
-    def post(self, request, *args, **kwargs):
-        cart = self._get_or_create_cart(request)
+    async def post(self, request, *args, **kwargs):
+        storage = await self.get_cart_storage(request)
 
         updated = 0
 
@@ -123,9 +102,8 @@ class UpdateCartItemView(CartMixin, View):
                 if quantity < 1:
                     continue
 
-                item = get_object_or_404(CartItem, id=item_id, cart=cart)
-                item.quantity = quantity
-                item.save()
+                if not await storage.aset_quantity(item_id, quantity):
+                    raise Http404("No cart item matches the given query.")
                 updated += 1
 
         return redirect("cart:detail")
@@ -138,15 +116,15 @@ class RemoveCartItemView(CartMixin, View):
         - item_id (required)
     """
 
-    def post(self, request, *args, **kwargs):
-        cart = self._get_or_create_cart(request)
+    async def post(self, request, *args, **kwargs):
+        storage = await self.get_cart_storage(request)
         item_id = request.POST.get("item_id")
 
         if not item_id:
             return JsonResponse({"error": "item_id is required"}, status=400)
 
-        item = get_object_or_404(CartItem, id=item_id, cart=cart)
-        item.delete()
+        if not await storage.aremove(item_id):
+            raise Http404("No cart item matches the given query.")
 
         return redirect("products:product_list")
 
@@ -156,9 +134,9 @@ class ClearCartView(CartMixin, View):
     Clear all items from the current cart.
     """
 
-    def post(self, request, *args, **kwargs):
-        cart = self._get_or_create_cart(request)
-        cart.items.all().delete()
+    async def post(self, request, *args, **kwargs):
+        storage = await self.get_cart_storage(request)
+        await storage.aclear()
 
         return redirect("products:product_list")
 
@@ -166,38 +144,13 @@ class ClearCartView(CartMixin, View):
 class MergeGuestCartView(LoginRequiredMixin, View):
     """
     Merge guest cart into user cart after login.
-    Call this after login if you want to combine carts.
+    Guest carts are merged automatically on login (see cart/signals.py);
+    call this if the guest cart was filled afterwards.
+    Stays sync: LoginRequiredMixin reads request.user in dispatch().
     """
 
     def post(self, request, *args, **kwargs):
-        if not request.session.session_key:
+        if not merge_guest_cart(request, request.user):
             return JsonResponse({"message": "No guest cart to merge"}, status=200)
 
-        session_key = request.session.session_key
-
-        try:
-            guest_cart = Cart.objects.get(
-                session_key=session_key, user=None, is_active=True
-            )
-        except Cart.DoesNotExist:
-            return JsonResponse({"message": "No guest cart to merge"}, status=200)
-
-        user_cart, _ = Cart.objects.get_or_create(user=request.user, is_active=True)
-
-        with transaction.atomic():
-            for item in guest_cart.items.all():
-                merged_item, created = CartItem.objects.get_or_create(
-                    cart=user_cart,
-                    product=item.product,
-                    variant=item.variant,
-                    defaults={"quantity": item.quantity},
-                )
-                if not created:
-                    merged_item.quantity += item.quantity
-                    merged_item.save()
-
-            guest_cart.items.all().delete()
-            guest_cart.is_active = False
-            guest_cart.save()
-
         return JsonResponse({"message": "Guest cart merged into user cart"}, status=200)
@@ -2,6 +2,11 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with any ASGI server, e.g.
+``DJANGO_SETTINGS_MODULE=config.settings.prod uvicorn config.asgi:application``;
+the storefront and cart views are async and do not hold a thread while
+waiting on the database. There is no default settings module: a server
+started without one must not come up with DEBUG and the dev database.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -10,7 +15,11 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.core.exceptions import ImproperlyConfigured
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+if not os.environ.get('DJANGO_SETTINGS_MODULE'):
+    raise ImproperlyConfigured(
+        'Set DJANGO_SETTINGS_MODULE (e.g. config.settings.prod) to serve over ASGI.'
+    )
 
 application = get_asgi_application()
@@ -40,12 +40,17 @@ INSTALLED_APPS = [
     "orders",
     "reviews",
     "promotions",
+    "reports",
+    "jobs",
     # 3rd party
     "rest_framework",
 ]
 
 
 MIDDLEWARE = [
+    "core.middleware.ProfilingMiddleware",
+    "core.middleware.SQLInstrumentationMiddleware",
+    "core.middleware.ReplicaPinMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -123,3 +128,68 @@ MEDIA_ROOT = BASE_DIR / "media"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "accounts.User"
+
+# Cart storage
+# Authenticated users always use the database cart; guests use the backend
+# below and are merged into the database on login.
+# Options: cart.storage.SessionCartStorage, cart.storage.CacheCartStorage,
+#          cart.storage.DatabaseCartStorage
+CART_GUEST_STORAGE = "cart.storage.SessionCartStorage"
+CART_CACHE_ALIAS = "default"
+
+# Delivered orders can be refunded for this long; orders.archive leaves
+# them in place until it has passed
+ORDER_RETURN_WINDOW_DAYS = 30
+
+# Sales rollups (reports.rollups): kept in step by order signals; a job
+# rebuilds the last SALES_ROLLUP_RECONCILE_DAYS every
+# SALES_ROLLUP_RECONCILE_SECONDS to repair changes that bypassed them
+SALES_ROLLUP_RECONCILE_DAYS = 60
+SALES_ROLLUP_RECONCILE_SECONDS = 24 * 60 * 60
+
+# Per-request query stats (core.middleware.SQLInstrumentationMiddleware)
+SQL_INSTRUMENTATION_ENABLED = False
+SQL_N_PLUS_ONE_THRESHOLD = 5
+SQL_INSTRUMENTATION_STRICT = False
+
+# Sampling profiler (core.middleware.ProfilingMiddleware): collapsed-stack
+# dumps of a fraction of requests, of PROFILING_PATHS, and of requests
+# sending `X-Profile: <PROFILING_TOKEN>`; see `manage.py profile_report`.
+# Only the newest PROFILING_MAX_DUMPS dumps are kept.
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_PATHS = []
+PROFILING_TOKEN = ""
+PROFILING_INTERVAL_MS = 5
+PROFILING_DIR = BASE_DIR / "profiles"
+PROFILING_MAX_DUMPS = 1000
+
+# Read replicas (core.routers.PrimaryReplicaRouter): aliases in DATABASES
+# serving the reads of REPLICA_READ_APPS. After a write the visitor reads
+# from the primary for REPLICA_PIN_SECONDS.
+DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"]
+DATABASE_REPLICAS = []
+REPLICA_READ_APPS = ["products", "reviews"]
+REPLICA_PIN_SECONDS = 5
+
+# Conditional GETs of the catalog pages (products.conditional): list
+# generations live in this cache; shared proxies may serve anonymous pages
+# for CATALOG_CACHE_SECONDS
+CATALOG_CACHE_ALIAS = "default"
+CATALOG_CACHE_SECONDS = 60
+# Page data and rendered fragments, keyed on those validators (warm them
+# after a deploy with `manage.py warm_cache`). Cache misses of list pages
+# read from the primary, so a lagging replica can't fill a new generation.
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+# Listing read model (products.listings): kept in step by signals, repaired
+# from the source tables by a job every LISTING_RECONCILE_SECONDS
+LISTING_RECONCILE_SECONDS = 60 * 60
+
+# Primary keys of UUIDModel: 7 (time-ordered, index friendly) or 4 (random)
+UUID_PK_VERSION = 7
+
+# Coupon lookups (promotions.coupons); unknown codes are cached briefly too
+COUPON_CACHE_ALIAS = "default"
+COUPON_CACHE_TIMEOUT = 300
+COUPON_NEGATIVE_CACHE_TIMEOUT = 60
@@ -1,4 +1,6 @@
 # config/settings/dev.py
+import os
+
 from .base import *
 
 DEBUG = True
@@ -14,7 +16,35 @@ DATABASES = {
     }
 }
 
+# DEV_REPLICAS=2 adds SQLite copies of db.sqlite3 as read replicas.
+# They only change when `manage.py sync_replicas` copies the primary over,
+# which makes replication lag easy to see.
+DATABASE_REPLICAS = [
+    f"replica{n}" for n in range(1, int(os.environ.get("DEV_REPLICAS", 0)) + 1)
+]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / f"db.{alias}.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    }
+
 
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
+
+# Query stats on every request (config.settings.test makes N+1s fail)
+SQL_INSTRUMENTATION_ENABLED = True
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.sql": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
+    },
+}
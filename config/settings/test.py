@@ -0,0 +1,14 @@
+# config/settings/test.py
+# `manage.py test` picks this module; other runners need
+# DJANGO_SETTINGS_MODULE=config.settings.test
+from .dev import *
+
+# N+1 patterns fail the test suite
+SQL_INSTRUMENTATION_STRICT = True
+
+# Tests share one cache but never commit, so catalog generations never move
+# and cached pages would leak between tests; tests opt in with
+# override_settings
+CATALOG_CACHE_TIMEOUT = 0
+
+LOGGING["loggers"]["core.sql"]["level"] = "WARNING"
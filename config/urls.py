@@ -25,6 +25,7 @@ from products.views import ProductDetailView
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("cart/", include("cart.urls")),
+    path("orders/", include("orders.urls")),
     path("", include("products.urls")),
     path("product/<slug:slug>/", ProductDetailView.as_view(), name="product_detail"),
 ]
@@ -0,0 +1,291 @@
+# core/benchmarks.py
+
+import math
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.template import Context, Template
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.listings import reconcile_listings
+from products.models import Brand, Category, Product, ProductImage, ProductVariant
+
+
+@dataclass
+class Result:
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    queries: int
+    peak_kib: float
+    calibration_ms: float
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values`"""
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+_CALIBRATION_TEMPLATE = Template(
+    "{% for product in products %}{{ product.name }} {{ product.price }}"
+    "{{ product.description|truncatewords:5 }}{% endfor %}"
+)
+
+
+def calibrate(rounds=30):
+    """
+    Median ms of a fixed slice of request work (one ORM query, one template
+    render) on the seeded catalogue. Timings are judged relative to it, so
+    a slower machine or a busier moment doesn't read as a regression.
+    """
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        products = list(Product.objects.order_by("pk")[:20])
+        _CALIBRATION_TEMPLATE.render(Context({"products": products}))
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+@transaction.atomic
+def seed(products=2000, categories=40, brands=25, seed=0):
+    """
+    Deterministic catalogue: the same `seed` always gives the same names,
+    prices and variants, so runs are comparable.
+    """
+    rng = random.Random(seed)
+    category_rows = Category.objects.bulk_create(
+        Category(name=f"Category {n:03d}", slug=f"category-{n:03d}")
+        for n in range(categories)
+    )
+    brand_rows = Brand.objects.bulk_create(
+        Brand(name=f"Brand {n:03d}", slug=f"brand-{n:03d}") for n in range(brands)
+    )
+
+    product_rows = []
+    for n in range(products):
+        price = Decimal(rng.randint(1000, 100_000)) / 100
+        product_rows.append(
+            Product(
+                name=f"Product {n:05d}",
+                slug=f"product-{n:05d}",
+                description="Benchmark product " * 10,
+                sku=f"BENCH-{n:05d}",
+                brand=rng.choice(brand_rows),
+                category=rng.choice(category_rows),
+                price=price,
+                cost_price=(price * Decimal("0.6")).quantize(Decimal("0.01")),
+                stock_quantity=rng.randint(50, 500),
+            )
+        )
+    Product.objects.bulk_create(product_rows, batch_size=500)
+    ProductImage.objects.bulk_create(
+        (
+            ProductImage(
+                product=product,
+                image="products/default.jpg",
+                alt_text=product.name,
+                is_primary=True,
+            )
+            for product in product_rows
+        ),
+        batch_size=500,
+    )
+    ProductVariant.objects.bulk_create(
+        (
+            ProductVariant(
+                product=product,
+                name=size,
+                sku=f"{product.sku}-{size}",
+                price_adjustment=Decimal(rng.randint(0, 1000)) / 100,
+                stock_quantity=rng.randint(10, 100),
+            )
+            for product in product_rows[::2]
+            for size in ("S", "M", "L")
+        ),
+        batch_size=500,
+    )
+    reconcile_listings()  # bulk_create sends no signals
+    get_user_model().objects.create_user(
+        "bench", "bench@example.com", "bench-password"
+    )
+    return product_rows
+
+
+class Storefront:
+    """
+    Benchmark scenarios. Each one is a generator: code before a `yield` is
+    setup, the yielded (method, url, data) request is the measured part.
+    """
+
+    cart_lines = 10
+
+    def __init__(self, products):
+        self.products = products
+        self.variants = {
+            variant.product_id: variant
+            for variant in ProductVariant.objects.filter(name="M")
+        }
+        self.user = get_user_model().objects.get(username="bench")
+
+    def _fill_guest_cart(self, client, lines):
+        for product in self.products[:lines]:
+            client.post(
+                reverse("cart:add"), {"product_id": product.pk, "quantity": 1}
+            )
+
+    def product_list(self, client):
+        pages = len(self.products) // 12
+        for n in range(10**9):
+            yield "get", reverse("products:product_list"), {"page": n % pages + 1}
+
+    def product_detail(self, client):
+        for n in range(10**9):
+            product = self.products[n * 7 % len(self.products)]
+            yield "get", reverse("products:product_detail", args=[product.slug]), {}
+
+    def add_to_cart(self, client):
+        for n in range(10**9):
+            if n % 20 == 0:
+                client.cookies.clear()  # start a fresh guest cart
+            product = self.products[n * 13 % len(self.products)]
+            data = {"product_id": product.pk, "quantity": 1}
+            if product.pk in self.variants:
+                data["variant_id"] = self.variants[product.pk].pk
+            yield "post", reverse("cart:add"), data
+
+    def update_cart(self, client):
+        self._fill_guest_cart(client, self.cart_lines)
+        items = client.get(reverse("cart:detail")).context["items"]
+        for n in range(10**9):
+            data = {f"quantities[{item.id}]": 1 + n % 5 for item in items}
+            yield "post", reverse("cart:update"), data
+
+    def cart_detail(self, client):
+        self._fill_guest_cart(client, self.cart_lines)
+        while True:
+            yield "get", reverse("cart:detail"), {}
+
+    def cart_detail_user(self, client):
+        client.force_login(self.user)
+        self._fill_guest_cart(client, self.cart_lines)
+        while True:
+            yield "get", reverse("cart:detail"), {}
+
+    def merge_guest_cart(self, client):
+        client.force_login(self.user)
+        while True:
+            session = client.session
+            session["cart"] = {
+                f"{product.pk}:": {
+                    "product": str(product.pk),
+                    "variant": None,
+                    "quantity": 1,
+                }
+                for product in self.products[: self.cart_lines // 2]
+            }
+            session.save()
+            yield "post", reverse("cart:merge"), {}
+
+    scenarios = [
+        "product_list",
+        "product_detail",
+        "add_to_cart",
+        "update_cart",
+        "cart_detail",
+        "cart_detail_user",
+        "merge_guest_cart",
+    ]
+
+
+def run_scenario(scenario, iterations=50, warmup=5, allocation_samples=5):
+    """
+    Drive one scenario through the test client. Latency and query counts
+    come from untraced runs, bracketed by calibrate() to record how fast
+    the machine was meanwhile; peak allocations from a few extra runs
+    under tracemalloc, which would otherwise distort the timings.
+    """
+    client = Client()
+    requests = scenario(client)
+
+    def send():
+        method, url, data = next(requests)
+        response = getattr(client, method)(url, data)
+        if response.status_code >= 400:
+            raise AssertionError(f"{method.upper()} {url}: {response.status_code}")
+
+    for _ in range(warmup):
+        send()
+
+    calibration = calibrate()
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            send()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, len(captured))
+    calibration = (calibration + calibrate()) / 2
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(allocation_samples):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            send()
+            peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        p50_ms=round(statistics.median(timings), 2),
+        p95_ms=round(percentile(timings, 95), 2),
+        p99_ms=round(percentile(timings, 99), 2),
+        queries=queries,
+        peak_kib=round(max(peaks), 1) if peaks else 0.0,
+        calibration_ms=round(calibration, 3),
+    )
+
+
+def compare(results, baseline, threshold=0.25, min_delta_ms=1.0):
+    """
+    Regressions of `results` against `baseline` (both {name: dict}).
+    Any extra query is a regression. The baseline's p95 is scaled by how
+    much slower this run's calibration was, so only the scenario's own
+    slowdown counts, and that is a regression when it is more than
+    `threshold` (a fraction) and `min_delta_ms`. A faster calibration
+    never tightens the limit: one quick moment in thirty rounds is noise
+    the tail of the timed loop doesn't share.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries (baseline {before['queries']})"
+            )
+        scale = 1.0
+        if result.get("calibration_ms") and before.get("calibration_ms"):
+            scale = max(result["calibration_ms"] / before["calibration_ms"], 1.0)
+        expected = before["p95_ms"] * scale
+        limit = expected * (1 + threshold)
+        if result["p95_ms"] > limit and result["p95_ms"] - expected > min_delta_ms:
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']}ms (baseline {before['p95_ms']}ms "
+                f"x{scale:.2f} machine speed, limit {limit:.2f}ms)"
+            )
+    return regressions
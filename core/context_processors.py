@@ -1,17 +1,11 @@
 # core/context_processors.py
 
 
-from django.db.models import Sum
-
-from cart.views import CartMixin
+from cart.storage import get_cart_storage
 
 
 def cart_item_count(request):
-    helper = CartMixin()
     try:
-        cart = helper._get_or_create_cart(request)
-        return {
-            "cart_item_count": cart.items.aggregate(total=Sum("quantity"))["total"] or 0
-        }
+        return {"cart_item_count": get_cart_storage(request).total_quantity()}
     except Exception:
         return {"cart_item_count": 0}
@@ -0,0 +1,126 @@
+# core/instrumentation.py
+
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+_SITE_PACKAGES = (os.sep + "site-packages" + os.sep, os.sep + "django" + os.sep)
+
+
+class NPlusOneError(Exception):
+    """Raised in strict mode when a request repeats one query shape too often"""
+
+
+def normalize_sql(sql):
+    """
+    Query shape: literals and IN-lists collapsed, so the same query with
+    other parameters (or another number of them) compares equal.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def _caller():
+    """First frame of project code that led to the query"""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        path = frame.filename
+        if path.startswith(base_dir) and not any(
+            part in path for part in _SITE_PACKAGES
+        ):
+            return f"{os.path.relpath(path, base_dir)}:{frame.lineno}"
+    return None
+
+
+@dataclass
+class QueryShape:
+    sql: str
+    count: int = 0
+    duration: float = 0.0
+    # Where the query was issued once it looked like an N+1
+    caller: str | None = None
+
+
+@dataclass
+class QueryRecorder:
+    """
+    connection.execute_wrapper() callable collecting per-request stats:
+    query count, DB time, exact duplicates and counts per query shape.
+    """
+
+    threshold: int = 5
+    count: int = 0
+    duration: float = 0.0
+    shapes: dict = field(default_factory=dict)
+    exact: Counter = field(default_factory=Counter)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+
+            shape = normalize_sql(sql)
+            stats = self.shapes.get(shape)
+            if stats is None:
+                stats = self.shapes[shape] = QueryShape(shape)
+            stats.count += 1
+            stats.duration += elapsed
+            if stats.count == self.threshold:
+                stats.caller = _caller()
+            self.exact[sql, repr(params)] += 1
+
+    def record(self, aliases=None):
+        """Context manager instrumenting every (or the given) connection"""
+        stack = ExitStack()
+        for alias in aliases or connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+    @property
+    def duplicates(self):
+        """Identical statement + parameters run more than once"""
+        return {key: n for key, n in self.exact.items() if n > 1}
+
+    @property
+    def n_plus_one(self):
+        """Shapes repeated at least `threshold` times, worst first"""
+        return sorted(
+            (shape for shape in self.shapes.values() if shape.count >= self.threshold),
+            key=lambda shape: shape.count,
+            reverse=True,
+        )
+
+    def summary(self):
+        return {
+            "queries": self.count,
+            "db_ms": round(self.duration * 1000, 2),
+            "duplicates": sum(n - 1 for n in self.duplicates.values()),
+            "n_plus_one": [
+                {
+                    "sql": shape.sql[:300],
+                    "count": shape.count,
+                    "ms": round(shape.duration * 1000, 2),
+                    "caller": shape.caller,
+                }
+                for shape in self.n_plus_one
+            ],
+        }
+
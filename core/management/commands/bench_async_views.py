@@ -0,0 +1,157 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmarks import percentile, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the storefront with simulated database latency from a fixed "
+        "pool of sync workers (WSGI style) and from the ASGI handler, and "
+        "compare throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=200)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="Requests in flight"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Sync worker threads"
+        )
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=20,
+            help="Simulated round trip added to every query",
+        )
+        parser.add_argument("--path", help="URL to request (default: product list)")
+
+    def handle(self, *args, **options):
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+
+        latency = options["latency_ms"] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            connection.execute_wrappers.append(slow_query)
+
+        try:
+            seed(products=options["products"])
+            connection_created.connect(add_latency)
+            for connection in connections.all(initialized_only=True):
+                connection.execute_wrappers.append(slow_query)
+
+            with override_settings(SQL_INSTRUMENTATION_ENABLED=False):
+                path = options["path"] or reverse("products:product_list")
+                results = {
+                    f"sync, {options['workers']} workers": self._sync(path, options),
+                    f"asgi, {options['concurrency']} in flight": self._asgi(
+                        path, options
+                    ),
+                }
+        finally:
+            connection_created.disconnect(add_latency)
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+        self.stdout.write(
+            f"{options['requests']} x GET {path}, "
+            f"{options['latency_ms']:g}ms per query"
+        )
+        for name, (elapsed, latencies) in results.items():
+            self.stdout.write(
+                f"  {name:<22}{options['requests'] / elapsed:>8.1f} req/s"
+                f"  p50 {percentile(latencies, 50):>7.1f}ms"
+                f"  p95 {percentile(latencies, 95):>7.1f}ms"
+            )
+
+    def _sync(self, path, options):
+        def get(_):
+            started = time.perf_counter()
+            response = Client().get(path)
+            assert response.status_code == 200, response.status_code
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            latencies = list(pool.map(get, range(options["requests"])))
+        return time.perf_counter() - started, latencies
+
+    def _asgi(self, path, options):
+        # Run the event loop in a new thread, as a server would: started from
+        # this thread, every request would inherit its database connection
+        # through the context and queue on it.
+        with ThreadPoolExecutor(max_workers=1) as loop_thread:
+            return loop_thread.submit(
+                asyncio.run, self._serve_asgi(path, options)
+            ).result()
+
+    async def _serve_asgi(self, path, options):
+        application = get_asgi_application()
+        in_flight = asyncio.Semaphore(options["concurrency"])
+
+        async def get():
+            async with in_flight:
+                started = time.perf_counter()
+                status = await _asgi_get(application, path)
+                assert status == 200, status
+                return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(get() for _ in range(options["requests"])))
+        return time.perf_counter() - started, latencies
+
+
+async def _asgi_get(application, path):
+    """One GET through the ASGI callable, as a server would send it"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    request = [{"type": "http.request", "body": b"", "more_body": False}]
+    disconnected = asyncio.Event()
+    status = None
+
+    async def receive():
+        if request:
+            return request.pop()
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif not message.get("more_body"):
+            disconnected.set()
+
+    await application(scope, receive, send)
+    return status
@@ -0,0 +1,115 @@
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from core.benchmarks import Storefront, compare, run_scenario, seed
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "storefront.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the storefront views on a seeded test database and compare "
+        "latency and query counts with a stored baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=Storefront.scenarios,
+            help="Run only this scenario (repeatable)",
+        )
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help=(
+                "Allowed p95 slowdown as a fraction of the baseline, after "
+                "scaling it by this run's calibration"
+            ),
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Store these results as the new baseline instead of comparing",
+        )
+
+    def handle(self, *args, **options):
+        # The catalogue size shapes every timing: only compare like with like
+        fixture = {"products": options["products"], "seed": options["seed"]}
+        baseline_path = options["baseline"]
+        baseline = None
+        if not options["update_baseline"] and baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text())
+            if baseline["fixture"] != fixture:
+                recorded = " ".join(
+                    f"--{name} {value}" for name, value in baseline["fixture"].items()
+                )
+                raise CommandError(
+                    f"{baseline_path} was recorded with {recorded}: run with "
+                    "those options, or pass another --baseline"
+                )
+
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            # Measure the views, not the instrumentation middleware
+            with override_settings(SQL_INSTRUMENTATION_ENABLED=False):
+                results = self._run(options)
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+        if options["update_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(
+                json.dumps({"fixture": fixture, "scenarios": results}, indent=2)
+                + "\n"
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"Baseline written to {baseline_path}")
+            )
+            return
+
+        if baseline is None:
+            self.stdout.write(f"No baseline at {baseline_path}; nothing to compare")
+            return
+        regressions = compare(results, baseline["scenarios"], options["threshold"])
+        if regressions:
+            raise CommandError("Regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def _run(self, options):
+        products = seed(products=options["products"], seed=options["seed"])
+        storefront = Storefront(products)
+
+        results = {}
+        self.stdout.write(
+            f"{'scenario':<20}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'queries':>9}{'peak KiB':>10}{'calib ms':>10}"
+        )
+        for name in options["scenario"] or Storefront.scenarios:
+            result = run_scenario(
+                getattr(storefront, name),
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+            )
+            results[name] = asdict(result)
+            self.stdout.write(
+                f"{name:<20}{result.p50_ms:>9.2f}{result.p95_ms:>9.2f}"
+                f"{result.p99_ms:>9.2f}{result.queries:>9}{result.peak_kib:>10.1f}"
+                f"{result.calibration_ms:>10.3f}"
+            )
+        return results
@@ -0,0 +1,126 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+
+from core.uuids import uuid7
+
+GENERATORS = {"4": uuid.uuid4, "7": uuid7}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load an order_items-shaped scratch table keyed by uuid4 and by uuid7 "
+        "and compare insert throughput and index size"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--versions", nargs="+", choices=sorted(GENERATORS), default=["4", "7"]
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Leave the scratch tables in place"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise CommandError("Index sizes are only measured on SQLite / PostgreSQL")
+
+        for version in options["versions"]:
+            table = f"bench_order_items_uuid{version}"
+            self._create(table)
+            try:
+                elapsed = self._load(
+                    table, GENERATORS[version], options["rows"], options["batch_size"]
+                )
+                sizes = self._sizes(table)
+            finally:
+                if not options["keep"]:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"DROP TABLE {connection.ops.quote_name(table)}")
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"uuid{version}: {options['rows']} rows in {elapsed:.1f}s "
+                    f"({options['rows'] / elapsed:,.0f} rows/s)"
+                )
+            )
+            for name, (size, fill) in sizes.items():
+                fill = f", {fill:.0%} full" if fill is not None else ""
+                self.stdout.write(f"  {name}: {size / 2**20:.1f} MiB{fill}")
+
+    def _create(self, table):
+        uuid_type = connection.data_types["UUIDField"]
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {qn(table)}")
+            cursor.execute(
+                f"CREATE TABLE {qn(table)} ("
+                f"id {uuid_type} NOT NULL PRIMARY KEY, "
+                f"order_id {uuid_type} NOT NULL, "
+                f"product_id {uuid_type} NOT NULL, "
+                "unit_price decimal NOT NULL, "
+                "quantity integer NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX {qn(table + '_order_id')} ON {qn(table)} (order_id)"
+            )
+
+    def _load(self, table, generate, rows, batch_size):
+        field = models.UUIDField()
+        qn = connection.ops.quote_name
+        sql = (
+            f"INSERT INTO {qn(table)} (id, order_id, product_id, unit_price, quantity) "
+            "VALUES (%s, %s, %s, %s, %s)"
+        )
+        products = [
+            field.get_db_prep_value(uuid.uuid4(), connection) for _ in range(500)
+        ]
+        price = connection.ops.adapt_decimalfield_value(Decimal("19.99"), 10, 2)
+
+        started = time.perf_counter()
+        order_id = None
+        for start in range(0, rows, batch_size):
+            batch = []
+            for n in range(start, min(start + batch_size, rows)):
+                if n % 3 == 0:  # three lines per order
+                    order_id = field.get_db_prep_value(generate(), connection)
+                batch.append(
+                    (
+                        field.get_db_prep_value(generate(), connection),
+                        order_id,
+                        products[n % len(products)],
+                        price,
+                        1 + n % 4,
+                    )
+                )
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+        return time.perf_counter() - started
+
+    def _sizes(self, table):
+        """{index or table name: (bytes, leaf fill ratio or None)}"""
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(
+                    "SELECT s.name, SUM(s.pgsize), "
+                    "1.0 - SUM(s.unused) * 1.0 / SUM(s.pgsize) "
+                    "FROM dbstat s JOIN sqlite_master m ON s.name = m.name "
+                    "WHERE m.tbl_name = %s GROUP BY s.name",
+                    [table],
+                )
+                return {name: (size, fill) for name, size, fill in cursor.fetchall()}
+
+            cursor.execute(
+                "SELECT indexrelname, pg_relation_size(indexrelid) "
+                "FROM pg_stat_user_indexes WHERE relname = %s",
+                [table],
+            )
+            sizes = {name: (size, None) for name, size in cursor.fetchall()}
+            cursor.execute("SELECT pg_relation_size(%s)", [table])
+            sizes[table] = (cursor.fetchone()[0], None)
+            return sizes
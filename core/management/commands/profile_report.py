@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import aggregate, dump_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge the profiler's collapsed-stack dumps by view: print the "
+        "hottest frames and optionally write one flamegraph input per view"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir", type=Path, help="Dump directory (default: PROFILING_DIR)"
+        )
+        parser.add_argument(
+            "--view", help='Only views containing this, e.g. "product_detail"'
+        )
+        parser.add_argument(
+            "--top", type=int, default=10, help="Frames to list per view"
+        )
+        parser.add_argument(
+            "--output", type=Path, help="Write the merged stacks of each view here"
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options["dir"] or settings.PROFILING_DIR)
+        output = options["output"] and Path(options["output"])
+        if not directory.is_dir():
+            raise CommandError(f"No profile dumps in {directory}")
+
+        views = {
+            root: profile
+            for root, profile in aggregate(directory).items()
+            if not options["view"] or options["view"] in root
+        }
+        if not views:
+            self.stdout.write("No matching profiles")
+            return
+
+        by_samples = sorted(views.items(), key=lambda item: -item[1].samples)
+        for root, profile in by_samples:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"{root}: {profile.requests} requests, {profile.samples} samples"
+                )
+            )
+            if profile.samples:
+                self.stdout.write(f"  {'self':>6} {'total':>6}  frame")
+                total = profile.total_samples()
+                for frame, count in profile.self_samples().most_common(
+                    options["top"]
+                ):
+                    self.stdout.write(
+                        f"  {count / profile.samples:>6.1%} "
+                        f"{total[frame] / profile.samples:>6.1%}  {frame}"
+                    )
+
+            if output and profile.samples:
+                output.mkdir(parents=True, exist_ok=True)
+                path = output / f"{dump_name(root)}.collapsed"
+                path.write_text(
+                    "".join(
+                        f"{stack} {count}\n"
+                        for stack, count in profile.stacks.most_common()
+                        if count
+                    )
+                )
+                self.stdout.write(f"  -> {path}")
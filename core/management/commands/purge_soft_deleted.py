@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import SoftDeleteModel
+from core.purge import purge_soft_deleted, purgeable, soft_delete_models
+
+
+class Command(BaseCommand):
+    help = "Hard-delete rows soft-deleted long ago, in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            help="app_label.Model to purge (repeatable; default: all of them)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Purge rows soft-deleted more than this many days ago",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to pause between batches",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["model"]:
+            try:
+                models = [apps.get_model(label) for label in options["model"]]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            for model in models:
+                if not issubclass(model, SoftDeleteModel):
+                    raise CommandError(f"{model._meta.label} is not soft-deletable")
+        else:
+            models = soft_delete_models()
+
+        for model in models:
+            if options["dry_run"]:
+                cutoff = timezone.now() - timedelta(days=options["days"])
+                count = purgeable(model, cutoff).count()
+                self.stdout.write(f"{model._meta.label}: {count} rows would be purged")
+                continue
+
+            purged = purge_soft_deleted(
+                model,
+                days=options["days"],
+                batch_size=options["batch_size"],
+                sleep=options["sleep"],
+                log=self.stdout.write if options["verbosity"] > 1 else None,
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"{model._meta.label}: purged {purged} rows")
+            )
@@ -0,0 +1,37 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.routers import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over the DATABASE_REPLICAS files; "
+        "a stand-in for replication when trying the replica router locally"
+    )
+
+    def handle(self, *args, **options):
+        aliases = replicas()
+        if not aliases:
+            raise CommandError("No DATABASE_REPLICAS configured (try DEV_REPLICAS=2)")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in [DEFAULT_DB_ALIAS, *aliases]:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(
+                    f"{alias} is not SQLite; replicas of other databases are "
+                    "kept up to date by the database itself"
+                )
+
+        primary.ensure_connection()
+        for alias in aliases:
+            replica = connections[alias]
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict["NAME"])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f"{alias} synced from the primary"))
@@ -0,0 +1,239 @@
+# core/middleware.py
+
+import hmac
+import json
+import logging
+import random
+import sys
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import routers
+from .instrumentation import NPlusOneError, QueryRecorder
+from .profiling import StackSampler, write_collapsed
+
+logger = logging.getLogger("core.sql")
+profile_logger = logging.getLogger("core.profiling")
+
+
+class HybridMiddleware:
+    """
+    Base for middleware with a sync __call__ and an async __acall__: Django
+    picks the one matching the rest of the stack, so async views under ASGI
+    don't pay a thread switch per middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+
+class SQLInstrumentationMiddleware(HybridMiddleware):
+    """
+    Records every query a request runs (via connection.execute_wrapper)
+    and reports query count, DB time, duplicates and N+1 shapes as a
+    Server-Timing header and one structured log line.
+
+    Settings:
+        SQL_INSTRUMENTATION_ENABLED   off by default (enable in dev)
+        SQL_N_PLUS_ONE_THRESHOLD      repeats of one query shape to flag
+        SQL_INSTRUMENTATION_STRICT    raise NPlusOneError instead of warning
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "SQL_INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.threshold = getattr(settings, "SQL_N_PLUS_ONE_THRESHOLD", 5)
+        self.strict = getattr(settings, "SQL_INSTRUMENTATION_STRICT", False)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        recorder = QueryRecorder(threshold=self.threshold)
+        started = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.report(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder(threshold=self.threshold)
+        started = time.perf_counter()
+        # Connections belong to threads: the async ORM queries in the
+        # request's sync thread, so the wrappers are installed there
+        recording = await sync_to_async(recorder.record)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+        return self.report(request, response, recorder, started)
+
+    def report(self, request, response, recorder, started):
+        elapsed = time.perf_counter() - started
+
+        summary = recorder.summary()
+        timing = (
+            f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries", '
+            f"app;dur={elapsed * 1000:.2f}"
+        )
+        if summary["n_plus_one"]:
+            timing += f';desc="{len(summary["n_plus_one"])} N+1"'
+        if response.has_header("Server-Timing"):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response["Server-Timing"] = timing
+
+        payload = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "ms": round(elapsed * 1000, 2),
+            **summary,
+        }
+        if summary["n_plus_one"]:
+            logger.warning(json.dumps(payload), extra={"sql": payload})
+            if self.strict:
+                shape = summary["n_plus_one"][0]
+                raise NPlusOneError(
+                    f"{request.method} {request.path} ran {shape['count']}x "
+                    f"(from {shape['caller']}): {shape['sql']}"
+                )
+        else:
+            logger.info(json.dumps(payload), extra={"sql": payload})
+        return response
+
+
+class ReplicaPinMiddleware(HybridMiddleware):
+    """
+    Scopes core.routers.PrimaryReplicaRouter to the request and gives
+    read-your-writes: a request that writes sets a cookie pinning the
+    visitor's reads to the primary for REPLICA_PIN_SECONDS, long enough
+    for the replicas to catch up. A forged cookie only costs replica reads.
+
+    Not used unless DATABASE_REPLICAS is set.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "DATABASE_REPLICAS", None):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = routers.start_request(pinned=routers.PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request(token)
+        return self.pin(response, wrote)
+
+    async def __acall__(self, request):
+        # The routing state is a context variable: sync_to_async copies the
+        # context into the ORM's thread, so the router sees it there too
+        token = routers.start_request(pinned=routers.PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = routers.finish_request(token)
+        return self.pin(response, wrote)
+
+    def pin(self, response, wrote):
+        if wrote:
+            response.set_cookie(
+                routers.PIN_COOKIE,
+                "1",
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Samples the stacks of chosen requests (core.profiling.StackSampler)
+    and writes one collapsed-stack dump per request to PROFILING_DIR, ready
+    for a flamegraph tool; `manage.py profile_report` merges them by view.
+
+    A request is profiled when any of these holds:
+        PROFILING_SAMPLE_RATE    fraction of all requests (0.0 - 1.0)
+        PROFILING_PATHS          path prefixes to profile every time
+        PROFILING_TOKEN          sent in the X-Profile header
+
+    Other requests cost a random() call and two lookups. Only the newest
+    PROFILING_MAX_DUMPS dumps are kept. Not used unless PROFILING_ENABLED
+    is set.
+
+    Async requests are sampled on the event loop's thread. Time they spend
+    in the ORM or other sync code (run in worker threads) shows up as one
+    "(await)" frame, not broken down; profile such code under WSGI.
+    """
+
+    header = "HTTP_X_PROFILE"
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+        self.paths = tuple(getattr(settings, "PROFILING_PATHS", ()))
+        self.token = getattr(settings, "PROFILING_TOKEN", "").encode()
+        self.interval = getattr(settings, "PROFILING_INTERVAL_MS", 5) / 1000
+        self.directory = settings.PROFILING_DIR
+        self.keep = getattr(settings, "PROFILING_MAX_DUMPS", 1000)
+
+    def should_profile(self, request):
+        if self.rate and random.random() < self.rate:
+            return True
+        if self.paths and request.path.startswith(self.paths):
+            return True
+        sent = request.META.get(self.header)
+        return bool(self.token and sent) and hmac.compare_digest(
+            sent.encode(), self.token
+        )
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        with StackSampler(self.interval, top=sys._getframe()) as sampler:
+            response = self.get_response(request)
+        return self.record(request, response, sampler)
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+
+        # Samples the event loop's thread: time the request spends awaiting
+        # (sync code and the ORM run in other threads) shows up as AWAITING
+        with StackSampler(self.interval, top=sys._getframe()) as sampler:
+            response = await self.get_response(request)
+        return self.record(request, response, sampler)
+
+    def record(self, request, response, sampler):
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        path = write_collapsed(
+            self.directory, f"{request.method} {view}", sampler.stacks, self.keep
+        )
+        response["X-Profile-Dump"] = path.name
+        profile_logger.info(
+            "%s %s profiled: %d samples in %.1fms, %s",
+            request.method,
+            request.path,
+            sum(sampler.stacks.values()),
+            sampler.elapsed * 1000,
+            path,
+        )
+        return response
@@ -1,7 +1,9 @@
 # core/models.py
-import uuid
 
 from django.db import models
+from django.utils import timezone
+
+from .uuids import generate_uuid
 
 
 class TimeStampedModel(models.Model):
@@ -15,26 +17,81 @@ class TimeStampedModel(models.Model):
 
 
 class UUIDModel(models.Model):
-    """Abstract base class for UUID primary keys"""
+    """
+    Abstract base class for UUID primary keys.
+    Time-ordered (v7) by default, see core.uuids.generate_uuid.
+    """
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=generate_uuid, editable=False)
 
     class Meta:
         abstract = True
 
 
+class SoftDeleteQuerySet(models.QuerySet):
+    """Set-based soft delete / restore: one UPDATE for the whole queryset"""
+
+    def _stamp(self, **changes):
+        if any(field.name == "modified" for field in self.model._meta.fields):
+            changes["modified"] = timezone.now()
+        return self.update(**changes)
+
+    def soft_delete(self):
+        return self.filter(is_deleted=False)._stamp(
+            is_deleted=True, deleted_at=timezone.now()
+        )
+
+    def restore(self):
+        return self.filter(is_deleted=True)._stamp(is_deleted=False, deleted_at=None)
+
+    def alive(self):
+        return self.filter(is_deleted=False)
+
+    def deleted(self):
+        return self.filter(is_deleted=True)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Hides soft-deleted rows unless created with alive_only=False"""
+
+    def __init__(self, *args, alive_only=True, **kwargs):
+        self.alive_only = alive_only
+        super().__init__(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return queryset.filter(is_deleted=False) if self.alive_only else queryset
+
+
 class SoftDeleteModel(models.Model):
-    """Abstract base class for soft deletion"""
+    """
+    Abstract base class for soft deletion.
+    `objects` only sees live rows, `all_objects` sees everything.
+    Subclasses should set Meta.default_manager_name = "all_objects" so
+    unique validation, the admin and dumpdata still see deleted rows.
+    """
 
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    all_objects = SoftDeleteManager(alive_only=False)
+    objects = SoftDeleteManager()
+
     class Meta:
         abstract = True
 
     def soft_delete(self):
-        from django.utils import timezone
-
         self.is_deleted = True
         self.deleted_at = timezone.now()
-        self.save()
+        self._save_soft_delete_fields()
+
+    def restore(self):
+        self.is_deleted = False
+        self.deleted_at = None
+        self._save_soft_delete_fields()
+
+    def _save_soft_delete_fields(self):
+        fields = ["is_deleted", "deleted_at"]
+        if any(field.name == "modified" for field in self._meta.fields):
+            fields.append("modified")
+        self.save(update_fields=fields)
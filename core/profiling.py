@@ -0,0 +1,154 @@
+# core/profiling.py
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+_SUFFIX = ".collapsed"
+
+# Stands in for the stack while a sampled coroutine is suspended
+AWAITING = "(await)"
+
+
+@lru_cache(maxsize=4096)
+def _label(code):
+    """module/path.py:Qualified.name, relative to the sys.path entry holding it"""
+    path = code.co_filename
+    roots = [root for root in sys.path if root and path.startswith(root + os.sep)]
+    if roots:
+        path = os.path.relpath(path, max(roots, key=len))
+    return f"{path}:{code.co_qualname}"
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread every `interval` seconds from a
+    background thread, counting collapsed stacks ("root;...;leaf").
+    Frames from `top` outwards (the server and middleware that started the
+    sampler) are left out. A sample that never reaches `top` caught the
+    thread elsewhere: an event loop running other tasks while the sampled
+    coroutine awaits. It is counted as AWAITING.
+
+    Unlike cProfile this adds no cost to the sampled code, only one
+    sys._current_frames() per interval.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None, top=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.top = top
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None and frame is not self.top:
+                labels.append(_label(frame.f_code))
+                frame = frame.f_back
+            if frame is None and self.top is not None:
+                labels = [AWAITING]
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+            del frame
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+
+def dump_name(root):
+    """File name stem of a root frame, e.g. GET.products.product_list"""
+    return root.replace(" ", ".").replace(":", ".")
+
+
+def prune_dumps(directory, keep):
+    """Delete all but the `keep` newest dumps in `directory`"""
+    dumps = []
+    for path in Path(directory).glob(f"*{_SUFFIX}"):
+        try:
+            dumps.append((path.stat().st_mtime_ns, path))
+        except FileNotFoundError:  # pruned by another process
+            continue
+    dumps.sort(reverse=True)
+    for _, path in dumps[keep:]:
+        path.unlink(missing_ok=True)
+
+
+def write_collapsed(directory, root, stacks, keep=None):
+    """
+    One dump per profiled request, in the collapsed format flamegraph.pl,
+    speedscope and inferno read. `root` ("GET view_name") is the first
+    frame of every stack, so dumps can be merged by view. With `keep`,
+    older dumps beyond that many are deleted so the directory stays bounded.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{dump_name(root)}.{time.time_ns()}.{os.getpid()}{_SUFFIX}"
+    lines = [f"{root};{stack} {count}" for stack, count in stacks.most_common()]
+    if not lines:
+        # Faster than one interval: still record that the request was profiled
+        lines = [f"{root} 0"]
+    path.write_text("\n".join(lines) + "\n")
+    if keep:
+        prune_dumps(directory, keep)
+    return path
+
+
+@dataclass
+class ViewProfile:
+    """Dumps of one view merged: stack counts and per-frame self samples"""
+
+    requests: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def self_samples(self):
+        """Samples whose innermost frame is each frame"""
+        frames = Counter()
+        for stack, count in self.stacks.items():
+            frames[stack.rsplit(";", 1)[-1]] += count
+        return frames
+
+    def total_samples(self):
+        """Samples with each frame anywhere on the stack"""
+        frames = Counter()
+        for stack, count in self.stacks.items():
+            for frame in set(stack.split(";")):
+                frames[frame] += count
+        return frames
+
+
+def aggregate(directory):
+    """{root frame: ViewProfile} from the dumps in `directory`"""
+    views = defaultdict(ViewProfile)
+    for path in sorted(Path(directory).glob(f"*{_SUFFIX}")):
+        roots = set()
+        for line in path.read_text().splitlines():
+            stack, _, count = line.rpartition(" ")
+            if not stack or not count.isdigit():
+                continue
+            root = stack.split(";", 1)[0]
+            roots.add(root)
+            views[root].stacks[stack] += int(count)
+        for root in roots:
+            views[root].requests += 1
+    return dict(views)
@@ -0,0 +1,69 @@
+# core/purge.py
+
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import SoftDeleteModel
+
+
+def soft_delete_models():
+    return [
+        model
+        for model in apps.get_models()
+        if issubclass(model, SoftDeleteModel) and not model._meta.proxy
+    ]
+
+
+def purgeable(model, cutoff):
+    """Rows soft-deleted before `cutoff` that nothing PROTECTs"""
+    queryset = model.all_objects.filter(is_deleted=True, deleted_at__lt=cutoff)
+    for relation in model._meta.related_objects:
+        if relation.on_delete in (models.PROTECT, models.RESTRICT):
+            # e.g. products that appear on orders stay soft-deleted forever
+            queryset = queryset.exclude(
+                Exists(
+                    relation.related_model._base_manager.filter(
+                        **{relation.field.name: OuterRef("pk")}
+                    )
+                )
+            )
+    return queryset
+
+
+def purge_soft_deleted(model, days=90, batch_size=1000, sleep=0.0, log=None):
+    """
+    Hard-delete rows of `model` (a SoftDeleteModel or its "app.Model"
+    label, so this can run as a job) soft-deleted more than `days` ago,
+    `batch_size` rows per transaction. Returns the number of rows purged.
+    """
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    cutoff = timezone.now() - timedelta(days=days)
+    queryset = purgeable(model, cutoff).order_by("pk")
+
+    purged = 0
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+        last_pk = pks[-1]
+
+        with transaction.atomic():
+            _, deleted = model.all_objects.filter(pk__in=pks).delete()
+        purged += deleted.get(model._meta.label, 0)
+        if log:
+            log(f"{model._meta.label}: purged {purged} rows")
+
+        if len(pks) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+
+    return purged
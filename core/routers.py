@@ -0,0 +1,86 @@
+# core/routers.py
+
+import random
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "db_primary"
+
+_request = ContextVar("replica_routing", default=None)
+
+
+@dataclass
+class RoutingState:
+    """Where the current request reads from; see PrimaryReplicaRouter"""
+
+    replica: str | None
+    pinned: bool = False
+    wrote: bool = False
+
+
+def replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def start_request(pinned=False):
+    """
+    Route the reads of the current request (context) until finish_request().
+    One replica is picked per request so all its reads see the same snapshot.
+    """
+    aliases = replicas()
+    replica = random.choice(aliases) if aliases else None
+    return _request.set(RoutingState(replica=replica, pinned=pinned))
+
+
+def finish_request(token):
+    """Stop routing; returns True if the request wrote to the primary"""
+    state = _request.get()
+    _request.reset(token)
+    return state is not None and state.wrote
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads of the catalog apps (REPLICA_READ_APPS) to a replica in
+    DATABASE_REPLICAS and everything else to the primary.
+
+    Only requests are routed (see core.middleware.ReplicaPinMiddleware):
+    management commands and jobs keep reading the primary. Within a request,
+    reads go to the primary once it has written, inside a transaction, and
+    for REPLICA_PIN_SECONDS after a previous request wrote, so users see
+    their own changes despite replication lag.
+    """
+
+    def _replica_for(self, model):
+        state = _request.get()
+        if state is None or state.replica is None or state.pinned:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label not in getattr(settings, "REPLICA_READ_APPS", ()):
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_read(self, model, **hints):
+        return self._replica_for(model)
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in replicas():
+            return False
+        return None
@@ -1,3 +1,406 @@
-from django.test import TestCase
+import asyncio
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.management import CommandError, call_command
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import path
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import Address, User
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from reviews.models import Review
+
+from .benchmarks import Storefront, compare, percentile, run_scenario, seed
+from .instrumentation import NPlusOneError, normalize_sql
+from .profiling import AWAITING, StackSampler
+from .routers import PIN_COOKIE, finish_request, start_request
+from .uuids import generate_uuid, uuid7, uuid7_timestamp
+
+
+def make_products(count):
+    category = Category.objects.create(name="Shoes", slug="shoes")
+    return [
+        Product.objects.create(
+            name=f"Shoe {n}",
+            description="Shoe",
+            category=category,
+            price=Decimal("10.00"),
+            cost_price=Decimal("5.00"),
+        )
+        for n in range(count)
+    ]
+
+
+class SoftDeleteTests(TestCase):
+    def test_managers_split_live_and_deleted_rows(self):
+        first, second, third = make_products(3)
+        first.soft_delete()
+
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(Product.all_objects.count(), 3)
+        self.assertEqual(list(Product.all_objects.deleted()), [first])
+        # Unique checks and related lookups still see deleted rows
+        self.assertIs(Product._default_manager, Product.all_objects)
+
+        first.restore()
+        self.assertEqual(Product.objects.count(), 3)
+
+    def test_queryset_soft_delete_and_restore_are_single_updates(self):
+        make_products(5)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(Product.objects.filter(name__lt="Shoe 3").soft_delete(), 3)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]["sql"].startswith("UPDATE"))
+        self.assertEqual(Product.objects.count(), 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Product.all_objects.restore(), 3)
+        self.assertFalse(Product.all_objects.filter(deleted_at__isnull=False).exists())
+
+    def test_purge_skips_recent_and_protected_rows(self):
+        old, ordered, recent, live = make_products(4)
+        user = User.objects.create_user("buyer", "buyer@example.com", "pw")
+        address = Address.objects.create(
+            user=user,
+            full_name="Buyer",
+            phone="1",
+            address_line1="1 Main St",
+            city="Town",
+            state="State",
+            postal_code="1",
+            country="Country",
+        )
+        order = Order.objects.create(
+            order_number="ORD-1", customer=user, shipping_address=address, total=10
+        )
+        OrderItem.objects.create(
+            order=order,
+            product=ordered,
+            product_name="Shoe",
+            product_sku="SHOE",
+            unit_price=10,
+            unit_cost=5,
+            quantity=1,
+        )
+        Product.objects.filter(pk__in=[old.pk, ordered.pk, recent.pk]).soft_delete()
+        Product.all_objects.filter(pk__in=[old.pk, ordered.pk]).update(
+            deleted_at=timezone.now() - timedelta(days=200)
+        )
+
+        out = StringIO()
+        call_command("purge_soft_deleted", "--sleep", "0", stdout=out)
+
+        self.assertIn("products.Product: purged 1 rows", out.getvalue())
+        self.assertEqual(
+            set(Product.all_objects.values_list("pk", flat=True)),
+            {ordered.pk, recent.pk, live.pk},
+        )
+
+
+class UUID7Tests(TestCase):
+    def test_uuid7_layout_and_timestamp(self):
+        value = uuid7()
+
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, "specified in RFC 4122")
+        self.assertAlmostEqual(uuid7_timestamp(value), time.time(), delta=1)
+
+    def test_uuid7_is_monotonic_within_a_process(self):
+        values = [uuid7() for _ in range(50_000)]
+
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
+        # Bytes order matches too, which is what char(32) / uuid columns sort by
+        self.assertEqual([v.hex for v in values], sorted(v.hex for v in values))
+
+    def test_models_use_the_configured_version(self):
+        self.assertEqual(make_products(1)[0].pk.version, 7)
+        with override_settings(UUID_PK_VERSION=4):
+            self.assertEqual(generate_uuid().version, 4)
+
+
+def n_plus_one_view(request):
+    names = [
+        Product.objects.get(pk=pk).name
+        for pk in Product.objects.values_list("pk", flat=True)
+    ]
+    return HttpResponse(", ".join(names))
+
+
+def routing_view(request):
+    """Where a catalog read would go, before and after an optional write"""
+    reads = [router.db_for_read(Product)]
+    if "write" in request.GET:
+        router.db_for_write(Review)
+        reads.append(router.db_for_read(Product))
+    return HttpResponse(",".join(reads))
+
+
+async def async_n_plus_one_view(request):
+    return await sync_to_async(n_plus_one_view)(request)
+
+
+async def async_routing_view(request):
+    # The ORM resolves the router in its sync thread
+    return await sync_to_async(routing_view)(request)
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def slow_view(request):
+    busy_wait(0.03)
+    return HttpResponse("done")
+
+
+async def async_slow_view(request):
+    busy_wait(0.03)
+    await asyncio.sleep(0.03)
+    return HttpResponse("done")
+
+
+urlpatterns = [
+    path("n-plus-one/", n_plus_one_view),
+    path("async/n-plus-one/", async_n_plus_one_view),
+    path("routing/", routing_view),
+    path("async/routing/", async_routing_view),
+    path("slow/", slow_view, name="slow"),
+    path("async/slow/", async_slow_view, name="async_slow"),
+]
+
+
+@override_settings(ROOT_URLCONF="core.tests", SQL_N_PLUS_ONE_THRESHOLD=3)
+class SQLInstrumentationTests(TestCase):
+    def test_normalize_sql(self):
+        sql = "SELECT * FROM t WHERE a IN (%s, %s,%s) AND b = 'x''y'  LIMIT 21"
+        self.assertEqual(
+            normalize_sql(sql), "SELECT * FROM t WHERE a IN (...) AND b = ? LIMIT ?"
+        )
+
+    def test_server_timing_header(self):
+        make_products(2)
+        with override_settings(SQL_INSTRUMENTATION_STRICT=False):
+            response = self.client.get("/n-plus-one/")
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+
+    @override_settings(SQL_INSTRUMENTATION_STRICT=False)
+    async def test_async_requests_are_recorded_too(self):
+        await sync_to_async(make_products)(2)
+        response = await self.async_client.get("/async/n-plus-one/")
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+
+    @override_settings(SQL_INSTRUMENTATION_STRICT=False)
+    def test_n_plus_one_is_logged_with_its_caller(self):
+        make_products(4)
+        with self.assertLogs("core.sql", "WARNING") as logs:
+            response = self.client.get("/n-plus-one/")
+
+        self.assertIn("N+1", response["Server-Timing"])
+        payload = logs.records[0].sql
+        self.assertEqual(payload["n_plus_one"][0]["count"], 4)
+        self.assertTrue(payload["n_plus_one"][0]["caller"].startswith("core/tests.py"))
+
+    @override_settings(SQL_INSTRUMENTATION_STRICT=True)
+    def test_strict_mode_raises(self):
+        make_products(4)
+        with self.assertRaises(NPlusOneError), self.assertLogs("core.sql", "WARNING"):
+            self.client.get("/n-plus-one/")
+
+
+class StorefrontBenchmarkTests(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_compare_flags_extra_queries_and_slow_p95(self):
+        baseline = {
+            "list": {"p95_ms": 10.0, "queries": 4},
+            "detail": {"p95_ms": 2.0, "queries": 3},
+        }
+        results = {
+            "list": {"p95_ms": 14.0, "queries": 5},
+            "detail": {"p95_ms": 2.9, "queries": 3},  # +45% but under 1ms
+            "new": {"p95_ms": 50.0, "queries": 9},  # no baseline yet
+        }
+        regressions = compare(results, baseline, threshold=0.25)
+
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(r.startswith("list:") for r in regressions))
+
+    def test_compare_scales_timings_by_calibration(self):
+        baseline = {
+            "list": {"p95_ms": 10.0, "queries": 4, "calibration_ms": 1.0},
+            "detail": {"p95_ms": 10.0, "queries": 3, "calibration_ms": 1.0},
+        }
+        results = {
+            # The whole machine is 50% slower: not a regression
+            "list": {"p95_ms": 15.0, "queries": 4, "calibration_ms": 1.5},
+            # Same machine speed, scenario 50% slower: a regression
+            "detail": {"p95_ms": 15.0, "queries": 3, "calibration_ms": 1.0},
+        }
+        regressions = compare(results, baseline, threshold=0.25)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("detail: p95"))
+
+        # A faster calibration doesn't shrink the baseline
+        results["detail"].update(p95_ms=12.0, calibration_ms=0.5)
+        self.assertEqual(compare(results, baseline, threshold=0.25), [])
+
+    def test_refuses_a_baseline_of_another_catalogue_size(self):
+        directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        path = directory / "baseline.json"
+        path.write_text('{"fixture": {"products": 2000, "seed": 0}, "scenarios": {}}')
+
+        with self.assertRaisesMessage(CommandError, "--products 2000"):
+            call_command(
+                "bench_storefront", products=500, baseline=path, stdout=StringIO()
+            )
+
+    @override_settings(SQL_INSTRUMENTATION_ENABLED=False)
+    def test_scenarios_run_against_seeded_catalogue(self):
+        storefront = Storefront(seed(products=20, categories=4, brands=3))
+        for name in Storefront.scenarios:
+            with self.subTest(name):
+                result = run_scenario(
+                    getattr(storefront, name),
+                    iterations=2,
+                    warmup=1,
+                    allocation_samples=1,
+                )
+                self.assertGreater(result.queries, 0)
+                self.assertGreater(result.calibration_ms, 0)
+
+
+@override_settings(ROOT_URLCONF="core.tests", DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(SimpleTestCase):
+    def test_catalog_reads_go_to_the_replica_within_a_request(self):
+        token = start_request()
+        try:
+            self.assertEqual(router.db_for_read(Product), "replica")
+            self.assertEqual(router.db_for_read(Review), "replica")
+            self.assertEqual(router.db_for_read(Order), "default")
+            self.assertEqual(router.db_for_write(Product), "default")
+        finally:
+            self.assertTrue(finish_request(token))
+
+        # Outside a request (commands, jobs) everything stays on the primary
+        self.assertEqual(router.db_for_read(Product), "default")
+
+    def test_write_pins_the_rest_of_the_request_and_the_visitor(self):
+        response = self.client.get("/routing/")
+        self.assertEqual(response.content, b"replica")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        response = self.client.get("/routing/", {"write": 1})
+        self.assertEqual(response.content, b"replica,default")
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+
+        response = self.client.get("/routing/")
+        self.assertEqual(response.content, b"default")
+
+    async def test_async_requests_are_routed_and_pinned(self):
+        response = await self.async_client.get("/async/routing/", {"write": 1})
+        self.assertEqual(response.content, b"replica,default")
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        response = await self.async_client.get("/async/routing/")
+        self.assertEqual(response.content, b"default")
+
+    def test_relations_across_primary_and_replica_are_allowed(self):
+        product, review = Product(), Review()
+        product._state.db, review._state.db = "replica", "default"
+        self.assertTrue(router.allow_relation(product, review))
+        self.assertFalse(router.allow_migrate("replica", "products"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTransactionTests(TestCase):
+    def test_reads_inside_a_transaction_use_the_primary(self):
+        token = start_request()
+        try:
+            self.assertEqual(router.db_for_read(Product), "default")
+        finally:
+            finish_request(token)
+
+
+@override_settings(
+    ROOT_URLCONF="core.tests",
+    PROFILING_ENABLED=True,
+    PROFILING_PATHS=["/slow/"],
+    PROFILING_TOKEN="let-me-in",
+    PROFILING_INTERVAL_MS=1,
+)
+class ProfilingTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(self.settings(PROFILING_DIR=self.directory))
+
+    def test_sampler_sees_the_busy_frame(self):
+        with StackSampler(interval=0.001) as sampler:
+            busy_wait(0.03)
+        self.assertTrue(
+            any("core/tests.py:busy_wait" in stack for stack in sampler.stacks)
+        )
+
+    def test_only_chosen_requests_are_profiled(self):
+        self.assertNotIn("X-Profile-Dump", self.client.get("/routing/"))
+        self.assertNotIn(
+            "X-Profile-Dump", self.client.get("/routing/", HTTP_X_PROFILE="guess")
+        )
+        response = self.client.get("/routing/", HTTP_X_PROFILE="let-me-in")
+        self.assertTrue((self.directory / response["X-Profile-Dump"]).exists())
+
+    async def test_async_views_sample_the_event_loop(self):
+        response = await self.async_client.get(
+            "/async/slow/", headers={"X-Profile": "let-me-in"}
+        )
+        dump = (self.directory / response["X-Profile-Dump"]).read_text()
+        self.assertIn(";core/tests.py:async_slow_view;core/tests.py:busy_wait ", dump)
+        self.assertIn(f"GET async_slow;{AWAITING} ", dump)
+
+    @override_settings(PROFILING_MAX_DUMPS=2)
+    def test_only_the_newest_dumps_are_kept(self):
+        names = [
+            self.client.get("/routing/", HTTP_X_PROFILE="let-me-in")["X-Profile-Dump"]
+            for _ in range(4)
+        ]
+        self.assertEqual(
+            sorted(path.name for path in self.directory.iterdir()), sorted(names[2:])
+        )
+
+    def test_report_merges_dumps_by_view(self):
+        for _ in range(2):
+            response = self.client.get("/slow/")
+        dump = (self.directory / response["X-Profile-Dump"]).read_text()
+        self.assertTrue(dump.startswith("GET slow;"))
+        self.assertIn(";core/tests.py:slow_view;core/tests.py:busy_wait ", dump)
+
+        out = StringIO()
+        call_command(
+            "profile_report",
+            dir=self.directory,
+            output=self.directory / "merged",
+            stdout=out,
+        )
+        self.assertIn("GET slow: 2 requests", out.getvalue())
+        self.assertIn("core/tests.py:busy_wait", out.getvalue())
+        merged = (self.directory / "merged" / "GET.slow.collapsed").read_text()
+        for line in merged.splitlines():
+            self.assertTrue(line.startswith("GET slow;"))
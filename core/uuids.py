@@ -0,0 +1,65 @@
+# core/uuids.py
+
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+_pid = None
+
+
+def uuid7():
+    """
+    Time-ordered UUID (RFC 9562 version 7): 48-bit Unix milliseconds,
+    then a 12-bit counter, then 62 random bits.
+
+    Within a process the values strictly increase: the counter starts
+    from a random point each millisecond and is bumped for every id in
+    the same millisecond (borrowing from the next millisecond if it runs
+    out, or if the clock steps back).
+    """
+    global _last_ms, _counter, _pid
+
+    random_bits = int.from_bytes(os.urandom(10), "big")
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if _pid != os.getpid():
+            _pid, _last_ms = os.getpid(), 0
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # Leave headroom for the ids still to come in this millisecond
+            _counter = (random_bits >> 64) & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76  # version
+    value |= counter << 64
+    value |= 0b10 << 62  # RFC 4122 variant
+    value |= random_bits & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=value)
+
+
+def uuid7_timestamp(value):
+    """Creation time (Unix seconds) encoded in a uuid7()"""
+    return (value.int >> 80) / 1000
+
+
+def generate_uuid():
+    """
+    Primary key default for UUIDModel. UUID_PK_VERSION = 7 (the default)
+    gives time-ordered keys that append to the right of the primary key
+    index; 4 restores fully random keys.
+    """
+    if getattr(settings, "UUID_PK_VERSION", 7) == 4:
+        return uuid.uuid4()
+    return uuid7()
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.action(description="Requeue selected jobs")
+def requeue(modeladmin, request, queryset):
+    queryset.update(status="queued", attempts=0, claim_token="", locked_by="")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["name", "status", "priority", "attempts", "run_at", "locked_by"]
+    list_filter = ["status", "name"]
+    search_fields = ["name"]
+    readonly_fields = ["last_error", "claim_token", "locked_by", "locked_at"]
+    actions = [requeue]
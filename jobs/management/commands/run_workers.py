@@ -0,0 +1,41 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (database-backed, no external broker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument(
+            "--stale-timeout",
+            type=int,
+            default=600,
+            help="Seconds after which a running job is assumed lost and requeued",
+        )
+        parser.add_argument(
+            "--burst", action="store_true", help="Exit once the queue is empty"
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options["concurrency"],
+            mode=options["mode"],
+            poll_interval=options["poll_interval"],
+            stale_timeout=options["stale_timeout"],
+        )
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+
+        self.stdout.write(f"Worker {worker.worker_id} started ({options['mode']})")
+        worker.run(burst=options["burst"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Worker stopped: {worker.processed} done, {worker.failed} failed"
+            )
+        )
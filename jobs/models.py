@@ -0,0 +1,57 @@
+# jobs/models.py
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from core.models import TimeStampedModel
+
+
+class Job(TimeStampedModel):
+    """
+    A unit of background work: a dotted path to a function plus arguments.
+    Claimed by `manage.py run_workers` (see jobs/queue.py).
+    """
+
+    STATUS = [
+        ("queued", _("Queued")),
+        ("running", _("Running")),
+        ("done", _("Done")),
+        ("failed", _("Failed")),
+    ]
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS, default="queued")
+    # Higher runs first
+    priority = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+
+    claim_token = models.CharField(max_length=32, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "jobs"
+        indexes = [
+            # Claim query: queued jobs that are due, best priority first
+            models.Index(
+                fields=["-priority", "run_at"],
+                condition=models.Q(status="queued"),
+                name="jobs_queued_idx",
+            ),
+            models.Index(
+                fields=["locked_at"],
+                condition=models.Q(status="running"),
+                name="jobs_running_idx",
+            ),
+            models.Index(fields=["claim_token"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.status}]"
@@ -0,0 +1,152 @@
+# jobs/queue.py
+
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+
+def _job_name(func):
+    if isinstance(func, str):
+        return func
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def enqueue(
+    func, *args, priority=0, run_at=None, delay=None, max_attempts=3, **kwargs
+):
+    """
+    Queue `func(*args, **kwargs)` for a worker. `func` is a module-level
+    function or its dotted path; arguments must be JSON-serializable.
+    """
+    if delay is not None:
+        run_at = timezone.now() + timedelta(seconds=delay)
+    return Job.objects.create(
+        name=_job_name(func),
+        args=list(args),
+        kwargs=kwargs,
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_on_commit(func, *args, **kwargs):
+    """Queue the job only once the current transaction commits"""
+    transaction.on_commit(lambda: enqueue(func, *args, **kwargs))
+
+
+def _due_jobs(now):
+    return Job.objects.filter(status="queued", run_at__lte=now).order_by(
+        "-priority", "run_at", "id"
+    )
+
+
+def claim(worker_id, limit=1):
+    """
+    Atomically mark up to `limit` due jobs as running for `worker_id`.
+
+    Backends with SKIP LOCKED (PostgreSQL, MySQL 8) lock candidate rows so
+    concurrent workers skip past each other. Elsewhere (SQLite) a single
+    UPDATE ... WHERE id IN (due jobs) AND status = 'queued' tags the rows
+    with a claim token; the token then identifies this worker's jobs.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    claimed = {
+        "status": "running",
+        "claim_token": token,
+        "locked_by": worker_id,
+        "locked_at": now,
+        "modified": now,
+    }
+    connection = connections[router.db_for_write(Job)]
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic(using=connection.alias):
+            ids = list(
+                _due_jobs(now)
+                .select_for_update(skip_locked=True)
+                .values_list("id", flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            Job.objects.filter(id__in=ids).update(**claimed)
+    else:
+        # Single statement, so SQLite takes its write lock up front
+        due = _due_jobs(now).values("id")[:limit]
+        if not Job.objects.filter(id__in=due, status="queued").update(**claimed):
+            return []
+
+    return list(
+        Job.objects.filter(claim_token=token, status="running").order_by(
+            "-priority", "run_at", "id"
+        )
+    )
+
+
+def complete(job):
+    Job.objects.filter(pk=job.pk, claim_token=job.claim_token).update(
+        status="done", modified=timezone.now()
+    )
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`: exponential with jitter"""
+    base = getattr(settings, "JOBS_RETRY_BACKOFF", 10)
+    cap = getattr(settings, "JOBS_RETRY_BACKOFF_MAX", 3600)
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def fail(job, error):
+    """Record a failed attempt and schedule a retry if attempts remain"""
+    attempts = job.attempts + 1
+    now = timezone.now()
+    if attempts < job.max_attempts:
+        changes = {
+            "status": "queued",
+            "run_at": now + timedelta(seconds=backoff(attempts)),
+        }
+    else:
+        changes = {"status": "failed"}
+
+    Job.objects.filter(pk=job.pk, claim_token=job.claim_token).update(
+        attempts=attempts,
+        last_error="".join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )[-5000:],
+        modified=now,
+        **changes,
+    )
+
+
+def requeue_stale(timeout):
+    """
+    Put back jobs whose worker died while running them. The lost run counts
+    as an attempt, so a job that kills its worker every time ends up failed
+    instead of being handed out forever.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status="running", locked_at__lt=now - timedelta(seconds=timeout)
+    )
+    lost = {
+        "attempts": F("attempts") + 1,
+        "last_error": "Worker lost while running the job",
+        "claim_token": "",
+        "locked_by": "",
+        "modified": now,
+    }
+    with transaction.atomic(using=router.db_for_write(Job)):
+        failed = stale.filter(attempts__gte=F("max_attempts") - 1).update(
+            status="failed", **lost
+        )
+        return failed + stale.update(status="queued", **lost)
@@ -0,0 +1,101 @@
+import os
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim, enqueue, requeue_stale
+from .worker import Worker
+
+calls = []
+
+
+def record(value):
+    calls.append(value)
+
+
+def explode():
+    raise RuntimeError("boom")
+
+
+def check_connection(parent_pid):
+    if os.getpid() == parent_pid:
+        raise RuntimeError("ran in the parent")
+    if connection.connection is not None:
+        raise RuntimeError("inherited a database connection")
+
+
+class QueueTests(TestCase):
+    def test_claim_orders_by_priority_and_never_hands_out_twice(self):
+        low = enqueue(record, 1)
+        high = enqueue(record, 2, priority=10)
+        enqueue(record, 3, delay=3600)
+
+        first = claim("a", limit=1)
+        second = claim("b", limit=5)
+
+        self.assertEqual([job.pk for job in first], [high.pk])
+        self.assertEqual([job.pk for job in second], [low.pk])
+        self.assertEqual(claim("c", limit=5), [])
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = enqueue(record, 1)
+        claim("dead-worker")
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(requeue_stale(timeout=60), 1)
+        self.assertEqual(claim("b")[0].pk, job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+
+    def test_stale_job_fails_once_out_of_attempts(self):
+        job = enqueue(record, 1, max_attempts=2)
+        for _ in range(2):
+            claim("dead-worker")
+            Job.objects.filter(pk=job.pk).update(
+                locked_at=timezone.now() - timedelta(hours=1)
+            )
+            self.assertEqual(requeue_stale(timeout=60), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 2))
+        self.assertEqual(claim("b"), [])
+
+
+@override_settings(JOBS_RETRY_BACKOFF=0)
+class WorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_burst_runs_jobs_in_a_thread_pool(self):
+        for n in range(10):
+            enqueue(record, n)
+
+        worker = Worker(concurrency=3, poll_interval=0.01)
+        worker.run(burst=True)
+
+        self.assertEqual(sorted(calls), list(range(10)))
+        self.assertEqual(Job.objects.filter(status="done").count(), 10)
+
+    def test_failures_are_retried_then_marked_failed(self):
+        job = enqueue(explode, max_attempts=3)
+
+        with self.assertLogs("jobs.worker", "WARNING"):
+            Worker(concurrency=1, poll_interval=0.01).run(burst=True)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 3))
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+    def test_process_mode_children_open_their_own_connections(self):
+        job = enqueue(check_connection, os.getpid(), max_attempts=1)
+        self.assertIsNotNone(connection.connection)
+
+        Worker(concurrency=1, mode="process", poll_interval=0.01).run(burst=True)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done", job.last_error)
@@ -0,0 +1,109 @@
+# jobs/worker.py
+
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+import django
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from .queue import claim, complete, fail, requeue_stale
+
+logger = logging.getLogger(__name__)
+
+
+def execute(name, args, kwargs):
+    """Run one job body (in a pool thread or process)"""
+    try:
+        return import_string(name)(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+class Worker:
+    """
+    Claims due jobs and runs them in a thread or process pool.
+    The claiming loop runs in the calling thread; only job bodies run in
+    the pool, so status updates always use this process' connection.
+    """
+
+    def __init__(
+        self,
+        concurrency=4,
+        mode="thread",
+        poll_interval=1.0,
+        stale_timeout=600,
+        worker_id=None,
+    ):
+        self.concurrency = concurrency
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.processed = self.failed = 0
+        self._stopping = False
+
+    def stop(self, *args):
+        self._stopping = True
+
+    def _executor(self):
+        if self.mode == "process":
+            # Spawned, not forked: a forked child inherits whatever database
+            # connection the claiming loop holds, and closing it on the child
+            # side would end the parent's session on the shared socket. Each
+            # child starts a fresh interpreter and sets Django up itself.
+            return ProcessPoolExecutor(
+                self.concurrency,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix="job")
+
+    def _finish(self, job, future):
+        error = future.exception()
+        if error is None:
+            complete(job)
+            self.processed += 1
+        else:
+            logger.warning("Job %s (%s) failed: %r", job.pk, job.name, error)
+            fail(job, error)
+            self.failed += 1
+
+    def run(self, burst=False):
+        """Process jobs until stop() is called, or the queue is empty if `burst`"""
+        running = {}
+        last_requeue = 0
+        with self._executor() as executor:
+            while not self._stopping:
+                if time.monotonic() - last_requeue > self.stale_timeout / 2:
+                    requeue_stale(self.stale_timeout)
+                    last_requeue = time.monotonic()
+
+                free = self.concurrency - len(running)
+                for job in claim(self.worker_id, free) if free else []:
+                    future = executor.submit(execute, job.name, job.args, job.kwargs)
+                    running[future] = job
+
+                if not running:
+                    if burst:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+
+                done, _ = wait(
+                    running, timeout=self.poll_interval, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    self._finish(running.pop(future), future)
+
+            for future in wait(running).done:
+                self._finish(running.pop(future), future)
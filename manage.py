@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    # Set default to dev settings
+    # Set default to dev settings, or test settings for the test runner
+    if sys.argv[1:2] == ['test']:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.test')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.dev')
     try:
         from django.core.management import execute_from_command_line
@@ -1,3 +1,81 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
 
-# Register your models here.
+from .exports import ORDER_LINE_COLUMNS, PICK_LIST_COLUMNS, OrderExport, iter_csv
+from .models import Order, OrderEvent, OrderItem
+from .transitions import bulk_transition
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    fields = ["product_name", "product_sku", "unit_price", "unit_cost", "quantity"]
+    readonly_fields = fields
+    can_delete = False
+
+
+class OrderEventInline(admin.TabularInline):
+    model = OrderEvent
+    extra = 0
+    fields = ["created", "from_status", "to_status", "actor", "note"]
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+def _transition_action(to_status):
+    @admin.action(description=f"Mark selected orders as {to_status}")
+    def action(modeladmin, request, queryset):
+        changed = bulk_transition(queryset, to_status, actor=request.user)
+        skipped = queryset.count() - len(changed)
+        modeladmin.message_user(
+            request,
+            f"{len(changed)} orders marked as {to_status}, {skipped} skipped.",
+            messages.WARNING if skipped else messages.SUCCESS,
+        )
+
+    action.__name__ = f"mark_{to_status}"
+    return action
+
+
+def _csv_download(filename, export):
+    response = StreamingHttpResponse(iter_csv(export), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ["order_number", "customer", "status", "total", "created"]
+    list_filter = ["status"]
+    search_fields = ["order_number", "customer__email"]
+    list_select_related = ["customer"]
+    raw_id_fields = ["customer", "shipping_address"]
+    # Status only changes through orders.transitions
+    readonly_fields = ["status", "shipped_at", "delivered_at"]
+    inlines = [OrderItemInline, OrderEventInline]
+    empty_value_display = "-empty-"
+    actions = [
+        _transition_action("processing"),
+        _transition_action("shipped"),
+        _transition_action("delivered"),
+        _transition_action("cancelled"),
+        _transition_action("refunded"),
+        "export_orders",
+        "download_pick_list",
+    ]
+
+    @admin.action(description="Export selected orders (CSV)")
+    def export_orders(self, request, queryset):
+        return _csv_download(
+            "orders.csv", OrderExport(ORDER_LINE_COLUMNS, orders=queryset)
+        )
+
+    @admin.action(description="Download pick list for selected processing orders")
+    def download_pick_list(self, request, queryset):
+        return _csv_download(
+            "pick-list.csv",
+            OrderExport(PICK_LIST_COLUMNS, status="processing", orders=queryset),
+        )
@@ -0,0 +1,88 @@
+# orders/archive.py
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    ArchivedOrder,
+    ArchivedOrderEvent,
+    ArchivedOrderItem,
+    Order,
+    OrderEvent,
+    OrderItem,
+)
+
+# Final states; nothing changes an order once it gets here
+ARCHIVABLE_STATUSES = ["cancelled", "refunded"]
+
+
+def _copy_rows(queryset, target):
+    """bulk_create `target` rows from the columns both tables share"""
+    source_fields = {field.attname for field in queryset.model._meta.concrete_fields}
+    fields = [
+        field.attname
+        for field in target._meta.concrete_fields
+        if field.attname in source_fields
+    ]
+    rows = [target(**row) for row in queryset.values(*fields)]
+    target.objects.bulk_create(rows)
+    return len(rows)
+
+
+def archive_orders(months=12, batch_size=500, sleep=0.0, limit=None, log=None):
+    """
+    Move finished orders older than `months` (with their lines and events)
+    into the archive tables, `batch_size` orders per transaction.
+    Delivered orders can still be refunded, so they only count as finished
+    once ORDER_RETURN_WINDOW_DAYS have passed since delivery.
+    Returns the number of archived orders.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(days=30 * months)
+    returns_closed = now - timedelta(days=settings.ORDER_RETURN_WINDOW_DAYS)
+    candidates = (
+        Order.objects.filter(created__lt=cutoff)
+        .filter(
+            Q(status__in=ARCHIVABLE_STATUSES)
+            | Q(status="delivered", delivered_at__lt=returns_closed)
+        )
+        .order_by("created", "id")
+    )
+
+    archived = 0
+    while limit is None or archived < limit:
+        size = batch_size if limit is None else min(batch_size, limit - archived)
+        started = time.monotonic()
+        with transaction.atomic():
+            ids = list(
+                candidates.select_for_update().values_list("id", flat=True)[:size]
+            )
+            if not ids:
+                break
+
+            orders = Order.objects.filter(id__in=ids)
+            _copy_rows(orders, ArchivedOrder)
+            items = _copy_rows(
+                OrderItem.objects.filter(order_id__in=ids), ArchivedOrderItem
+            )
+            _copy_rows(OrderEvent.objects.filter(order_id__in=ids), ArchivedOrderEvent)
+
+            OrderEvent.objects.filter(order_id__in=ids).delete()
+            OrderItem.objects.filter(order_id__in=ids).delete()
+            orders.delete()
+
+        archived += len(ids)
+        if log:
+            log(
+                f"archived {len(ids)} orders / {items} lines "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+        if sleep:
+            time.sleep(sleep)
+
+    return archived
@@ -0,0 +1,189 @@
+# orders/checkout.py
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+
+from cart.models import Cart
+from products.listings import refresh_listings
+from products.models import Product, ProductVariant
+from products.pricing import current_prices, resolve_price
+from promotions.coupons import CouponError, redeem_coupon
+from promotions.engine import PromotionLine, evaluate, get_index
+
+from .models import Order, OrderItem
+from .numbering import allocate_order_number
+
+
+class CheckoutError(Exception):
+    """Raised when a cart cannot be converted into an order"""
+
+
+def _decrement_stock(model, quantities):
+    """
+    One conditional UPDATE for all rows of `model`.
+    Fails (and rolls back the checkout) unless every row has enough stock.
+    """
+    if not quantities:
+        return
+
+    enough_stock = Q()
+    for pk, quantity in quantities.items():
+        enough_stock |= Q(pk=pk, stock_quantity__gte=quantity)
+
+    updated = model.objects.filter(enough_stock).update(
+        stock_quantity=Case(
+            *[
+                When(pk=pk, then=F("stock_quantity") - quantity)
+                for pk, quantity in quantities.items()
+            ],
+            default=F("stock_quantity"),
+        )
+    )
+    if updated != len(quantities):
+        raise CheckoutError("Some items are out of stock.")
+
+
+def _redeem_coupon(code, amount):
+    try:
+        _, discount = redeem_coupon(code, amount)
+    except CouponError as e:
+        raise CheckoutError(str(e))
+    return discount
+
+
+def checkout(cart, shipping_address, coupon_code="", customer_notes=""):
+    """
+    Convert an active user cart into an Order in a single transaction:
+        1. lock the cart, then products, then variants, each in primary key order
+        2. decrement stock with one conditional UPDATE per table, then
+           refresh the listings of whatever sold out
+        3. snapshot lines (price and cost) into OrderItem with one bulk_create
+        4. apply automatic promotions, redeem the coupon, deactivate the cart
+    """
+    if cart.user_id is None:
+        raise CheckoutError("Guest carts must be merged before checkout.")
+    if shipping_address.user_id != cart.user_id:
+        raise CheckoutError("Unknown shipping address.")
+
+    # Allocated outside the transaction; a failed checkout just leaves a gap
+    order_number = allocate_order_number()
+
+    with transaction.atomic():
+        # Lock the cart first so a double submit cannot check it out twice
+        cart = (
+            Cart.objects.select_for_update().filter(pk=cart.pk, is_active=True).first()
+        )
+        if cart is None:
+            raise CheckoutError("This cart has already been checked out.")
+
+        lines = list(cart.items.values_list("product_id", "variant_id", "quantity"))
+        if not lines:
+            raise CheckoutError("Your cart is empty.")
+
+        product_ids = sorted({product_id for product_id, _, _ in lines})
+        variant_ids = sorted({variant_id for _, variant_id, _ in lines if variant_id})
+
+        products = {
+            product.pk: product
+            for product in Product.objects.select_for_update()
+            .filter(pk__in=product_ids)
+            .order_by("pk")
+        }
+        variants = {
+            variant.pk: variant
+            for variant in ProductVariant.objects.select_for_update()
+            .filter(pk__in=variant_ids)
+            .order_by("pk")
+        }
+
+        prices = current_prices(
+            [(product_id, variant_id) for product_id, variant_id, _ in lines]
+        )
+        product_stock = defaultdict(int)
+        variant_stock = defaultdict(int)
+        order_items = []
+        subtotal = 0
+
+        for product_id, variant_id, quantity in lines:
+            product = products.get(product_id)
+            variant = variants.get(variant_id) if variant_id else None
+            # Product.objects already leaves out soft-deleted products
+            if product is None or not product.is_available:
+                raise CheckoutError("Some items are no longer available.")
+            if variant_id and variant is None:
+                raise CheckoutError("Some items are no longer available.")
+
+            unit_price = resolve_price(product, variant, prices)
+            if variant:
+                variant_stock[variant.pk] += quantity
+                name = f"{product.name} - {variant.name}"
+                sku = variant.sku
+            else:
+                product_stock[product.pk] += quantity
+                name = product.name
+                sku = product.sku or ""
+
+            subtotal += unit_price * quantity
+            order_items.append(
+                OrderItem(
+                    product=product,
+                    variant=variant,
+                    product_name=name[:200],
+                    product_sku=sku,
+                    unit_price=unit_price,
+                    unit_cost=product.cost_price,
+                    quantity=quantity,
+                )
+            )
+
+        _decrement_stock(Product, product_stock)
+        _decrement_stock(ProductVariant, variant_stock)
+        # Listings flag what just sold out (the rows above hold the old stock)
+        sold_out = [
+            pk
+            for pk, quantity in product_stock.items()
+            if products[pk].stock_quantity == quantity
+        ]
+        sold_out += [
+            variants[pk].product_id
+            for pk, quantity in variant_stock.items()
+            if variants[pk].stock_quantity == quantity
+        ]
+        refresh_listings(sold_out)
+
+        promotion_discount = evaluate(
+            [
+                PromotionLine(
+                    key=n,
+                    product_id=item.product.pk,
+                    category_id=item.product.category_id,
+                    brand_id=item.product.brand_id,
+                    unit_price=item.unit_price,
+                    quantity=item.quantity,
+                )
+                for n, item in enumerate(order_items)
+            ],
+            get_index(),
+        ).discount
+        discount = promotion_discount
+        if coupon_code:
+            discount += _redeem_coupon(coupon_code, subtotal - promotion_discount)
+
+        order = Order.objects.create(
+            order_number=order_number,
+            customer_id=cart.user_id,
+            shipping_address=shipping_address,
+            discount=discount,
+            total=subtotal - discount,
+            customer_notes=customer_notes,
+        )
+        for item in order_items:
+            item.order = order
+        OrderItem.objects.bulk_create(order_items)
+
+        cart.is_active = False
+        cart.save(update_fields=["is_active", "modified"])
+
+    return order
@@ -0,0 +1,19 @@
+# orders/forms.py
+
+from django import forms
+
+from accounts.models import Address
+
+
+class CheckoutForm(forms.Form):
+    shipping_address = forms.ModelChoiceField(queryset=Address.objects.none())
+    coupon_code = forms.CharField(max_length=50, required=False)
+    customer_notes = forms.CharField(widget=forms.Textarea, required=False)
+
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+        field = self.fields["shipping_address"]
+        field.queryset = Address.objects.filter(user=user).order_by("-is_default")
+        field.label_from_instance = lambda address: (
+            f"{address.full_name}, {address.address_line1}, {address.city}"
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from orders.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Move old cancelled / refunded orders, and delivered ones past the "
+        "return window, to the archive tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=12,
+            help="Archive finished orders older than this many months",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to pause between batches",
+        )
+        parser.add_argument("--limit", type=int, help="Stop after this many orders")
+
+    def handle(self, *args, **options):
+        count = archive_orders(
+            months=options["months"],
+            batch_size=options["batch_size"],
+            sleep=options["sleep"],
+            limit=options["limit"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {count} orders"))
@@ -0,0 +1,52 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from orders.numbering import OrderNumberAllocator
+
+
+def _allocate(args):
+    name, block_size, count = args
+    allocator = OrderNumberAllocator(name=name, block_size=block_size)
+    try:
+        return [allocator.allocate() for _ in range(count)]
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Allocate order numbers from several processes and check for duplicates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=4)
+        parser.add_argument("--count", type=int, default=10000, help="Per process")
+        parser.add_argument("--block-size", type=int, default=100)
+        parser.add_argument("--sequence", default="bench")
+
+    def handle(self, *args, **options):
+        processes = options["processes"]
+        job = (options["sequence"], options["block_size"], options["count"])
+
+        # Children must open their own connections
+        connections.close_all()
+        started = time.perf_counter()
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            results = pool.map(_allocate, [job] * processes)
+        elapsed = time.perf_counter() - started
+
+        numbers = [number for result in results for number in result]
+        duplicates = len(numbers) - len(set(numbers))
+        for result in results:
+            if result != sorted(result):
+                raise CommandError("Numbers were not increasing within a process")
+        if duplicates:
+            raise CommandError(f"{duplicates} duplicate order numbers")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(numbers)} numbers from {processes} processes in {elapsed:.2f}s "
+                f"({len(numbers) / elapsed:.0f}/s), 0 duplicates"
+            )
+        )
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.exports import (
+    ORDER_LINE_COLUMNS,
+    PICK_LIST_COLUMNS,
+    OrderExport,
+    write_csv,
+    write_parquet,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream order lines (or the processing pick list) to CSV or Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+        parser.add_argument(
+            "--output", help="Output file (CSV defaults to stdout, Parquet requires it)"
+        )
+        parser.add_argument(
+            "--pick-list",
+            action="store_true",
+            help="Lines of every processing order with shipping addresses",
+        )
+        parser.add_argument("--since", help="Only orders after this watermark")
+        parser.add_argument(
+            "--watermark-file",
+            help="Read --since from this file and store the new watermark in it",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--include-archived",
+            action="store_true",
+            help="Also export orders moved to the archive tables",
+        )
+
+    def handle(self, *args, **options):
+        since = options["since"]
+        watermark_file = options["watermark_file"] and Path(options["watermark_file"])
+        if watermark_file and watermark_file.exists() and not since:
+            since = watermark_file.read_text().strip() or None
+
+        if options["pick_list"]:
+            export = OrderExport(
+                PICK_LIST_COLUMNS,
+                since=since,
+                status="processing",
+                chunk_size=options["chunk_size"],
+            )
+        else:
+            export = OrderExport(
+                ORDER_LINE_COLUMNS,
+                since=since,
+                chunk_size=options["chunk_size"],
+                include_archived=options["include_archived"],
+            )
+
+        output = options["output"]
+        if options["format"] == "parquet":
+            if not output:
+                raise CommandError("--output is required for Parquet exports")
+            try:
+                count = write_parquet(export, output)
+            except ImportError:
+                raise CommandError("Parquet exports need the pyarrow package")
+        elif output:
+            with open(output, "w", newline="") as stream:
+                count = write_csv(export, stream)
+        else:
+            count = write_csv(export, self.stdout)
+
+        if watermark_file and export.watermark:
+            watermark_file.write_text(export.watermark)
+
+        self.stderr.write(
+            f"Exported {count} lines, watermark: {export.watermark or '-'}"
+        )
@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.models import Address
+from cart.models import Cart, CartItem
+from orders.checkout import checkout
+from products.factories import ProductFactory
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Run concurrent checkouts against throwaway carts and report throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checkouts", type=int, default=1000)
+        parser.add_argument("--lines", type=int, default=5)
+        parser.add_argument("--products", type=int, default=50)
+        parser.add_argument("--workers", type=int, default=8)
+
+    def handle(self, *args, **options):
+        products = ProductFactory.create_batch(
+            options["products"], stock_quantity=10**9, price=Decimal("10.00")
+        )
+
+        carts = []
+        for n in range(options["checkouts"]):
+            user = User.objects.create(username=f"loadtest-{n}-{time.time_ns()}")
+            user.email = f"{user.username}@example.com"
+            user.save(update_fields=["email"])
+            address = Address.objects.create(
+                user=user,
+                full_name=user.username,
+                phone="0",
+                address_line1="1 Load St",
+                city="Test",
+                state="Test",
+                postal_code="0",
+                country="Test",
+            )
+            cart = Cart.objects.create(user=user)
+            CartItem.objects.bulk_create(
+                CartItem(
+                    cart=cart, product=products[(n + i) % len(products)], quantity=1
+                )
+                for i in range(options["lines"])
+            )
+            carts.append((cart, address))
+
+        def run(args):
+            try:
+                started = time.perf_counter()
+                checkout(*args)
+                return time.perf_counter() - started
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            latencies = sorted(pool.map(run, carts))
+        elapsed = time.perf_counter() - started
+
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(latencies)} checkouts in {elapsed:.2f}s "
+                f"({len(latencies) / elapsed:.0f}/s, p95 {p95 * 1000:.1f}ms)"
+            )
+        )
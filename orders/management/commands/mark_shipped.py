@@ -0,0 +1,38 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.models import Order
+from orders.transitions import bulk_transition
+
+
+class Command(BaseCommand):
+    help = "Mark orders shipped from a carrier CSV (order_number,tracking_number)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--note", default="Carrier file import")
+
+    def handle(self, *args, **options):
+        with open(options["path"], newline="") as stream:
+            tracking_numbers = {
+                row["order_number"]: row.get("tracking_number", "")
+                for row in csv.DictReader(stream)
+            }
+
+        started = time.perf_counter()
+        changed = bulk_transition(
+            Order.objects.filter(order_number__in=tracking_numbers),
+            "shipped",
+            note=options["note"],
+            tracking_numbers=tracking_numbers,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Shipped {len(changed)} of {len(tracking_numbers)} orders "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-19 11:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def snapshot_costs(apps, schema_editor):
+    # Lines placed before the snapshot existed get today's cost, the best
+    # figure left; from here on checkout records the cost it sold at
+    Product = apps.get_model('products', 'Product')
+    cost = Product._base_manager.filter(pk=OuterRef('product_id')).values(
+        'cost_price'
+    )[:1]
+    for name in ('OrderItem', 'ArchivedOrderItem'):
+        model = apps.get_model('orders', name)
+        model._base_manager.filter(unit_cost__isnull=True).update(
+            unit_cost=Subquery(cost)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_time_ordered_uuid_pk'),
+        ('products', '0007_time_ordered_uuid_pk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorderitem',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(snapshot_costs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='archivedorderitem',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=2, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=2, max_digits=10),
+        ),
+    ]
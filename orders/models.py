@@ -93,6 +93,8 @@ class OrderItem(TimeStampedModel, UUIDModel):
     product_name = models.CharField(max_length=200)
     product_sku = models.CharField(max_length=50)
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Product.cost_price at purchase time: margins must not move with it
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
 
     class Meta:
@@ -105,3 +107,161 @@ class OrderItem(TimeStampedModel, UUIDModel):
     def subtotal(self):
         """Calculate line item total"""
         return self.unit_price * self.quantity
+
+
+class OrderNumberSequence(models.Model):
+    """
+    Hi/lo counter behind order numbers.
+    Each worker process reserves a block of numbers at a time
+    (see orders/numbering.py); unused numbers are simply skipped.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    class Meta:
+        db_table = 'order_number_sequences'
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+class OrderEvent(models.Model):
+    """
+    Append-only log of order status transitions.
+    Written by orders/transitions.py, never updated.
+    """
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='events'
+    )
+    from_status = models.CharField(max_length=20, choices=Order.ORDER_STATUS)
+    to_status = models.CharField(max_length=20, choices=Order.ORDER_STATUS)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    note = models.CharField(max_length=200, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'order_events'
+        ordering = ['created']
+        indexes = [
+            models.Index(fields=['order', 'created']),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} -> {self.to_status}"
+
+
+class ArchivedOrder(UUIDModel):
+    """
+    Cold storage for old delivered / cancelled / refunded orders.
+    Same columns as Order; rows are moved here by orders/archive.py
+    so the hot tables and their indexes stay small.
+    """
+    # Copied as-is, so no auto_now / auto_now_add
+    created = models.DateTimeField()
+    modified = models.DateTimeField()
+    order_number = models.CharField(max_length=50, unique=True)
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='archived_orders'
+    )
+    status = models.CharField(max_length=20, choices=Order.ORDER_STATUS)
+    shipping_address = models.ForeignKey(
+        Address,
+        on_delete=models.PROTECT,
+        related_name='+'
+    )
+    discount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    tracking_number = models.CharField(max_length=100, blank=True)
+    shipped_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    customer_notes = models.TextField(blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'orders_archive'
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['customer', '-created']),
+        ]
+
+    def __str__(self):
+        return f"Order {self.order_number} (archived)"
+
+
+class ArchivedOrderItem(UUIDModel):
+    """
+    Lines of an ArchivedOrder, same columns as OrderItem.
+    """
+    created = models.DateTimeField()
+    modified = models.DateTimeField()
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        related_name='items'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.PROTECT,
+        related_name='+'
+    )
+    variant = models.ForeignKey(
+        ProductVariant,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    product_name = models.CharField(max_length=200)
+    product_sku = models.CharField(max_length=50)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.IntegerField()
+
+    class Meta:
+        db_table = 'order_items_archive'
+
+    def __str__(self):
+        return f"{self.product_name} x {self.quantity}"
+
+    @property
+    def subtotal(self):
+        return self.unit_price * self.quantity
+
+
+class ArchivedOrderEvent(models.Model):
+    """
+    Status history of an ArchivedOrder, same columns as OrderEvent.
+    """
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        related_name='events'
+    )
+    from_status = models.CharField(max_length=20, choices=Order.ORDER_STATUS)
+    to_status = models.CharField(max_length=20, choices=Order.ORDER_STATUS)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    note = models.CharField(max_length=200, blank=True)
+    created = models.DateTimeField()
+
+    class Meta:
+        db_table = 'order_events_archive'
+        ordering = ['created']
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} -> {self.to_status}"
@@ -0,0 +1,86 @@
+# orders/numbering.py
+
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import OrderNumberSequence
+
+
+class OrderNumberAllocator:
+    """
+    Hands out human-friendly, increasing order numbers (ORD-00001234).
+
+    Hi/lo scheme: the process reserves `block_size` numbers with one UPDATE
+    on OrderNumberSequence and then allocates from memory, so the sequence
+    row is only touched once per block. Numbers left in a block when the
+    process exits are skipped (gaps are fine, duplicates are not).
+    """
+
+    def __init__(self, name="orders", block_size=None, prefix=None, width=8):
+        self.name = name
+        self.block_size = block_size or getattr(
+            settings, "ORDER_NUMBER_BLOCK_SIZE", 100
+        )
+        if prefix is None:
+            prefix = getattr(settings, "ORDER_NUMBER_PREFIX", "ORD-")
+        self.prefix = prefix
+        self.width = width
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next = self._hi = 0
+
+    def allocate(self):
+        with self._lock:
+            # A forked child must never reuse its parent's block
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._next = self._hi = 0
+
+            if self._next < self._hi:
+                number = self._next
+                self._next += 1
+            else:
+                number, hi = self._reserve()
+                if connection.in_atomic_block:
+                    # The reservation is only durable once the surrounding
+                    # transaction commits; after a rollback it may be handed
+                    # out again, so keep the rest of the block only on commit.
+                    transaction.on_commit(lambda: self._keep_block(number + 1, hi))
+                else:
+                    self._next, self._hi = number + 1, hi
+
+        return f"{self.prefix}{number:0{self.width}d}"
+
+    def _reserve(self):
+        """Reserve the next block with one UPDATE, return (lo, hi)"""
+        sequence = OrderNumberSequence.objects.filter(name=self.name)
+        increment = {"next_value": F("next_value") + self.block_size}
+
+        # Write first, so the row lock is taken before anything is read
+        with transaction.atomic():
+            if not sequence.update(**increment):
+                try:
+                    with transaction.atomic():
+                        OrderNumberSequence.objects.create(
+                            name=self.name, next_value=1 + self.block_size
+                        )
+                except IntegrityError:
+                    sequence.update(**increment)
+            hi = sequence.values_list("next_value", flat=True).get()
+        return hi - self.block_size, hi
+
+    def _keep_block(self, lo, hi):
+        with self._lock:
+            if self._pid == os.getpid() and self._next >= self._hi:
+                self._next, self._hi = lo, hi
+
+
+allocator = OrderNumberAllocator()
+
+
+def allocate_order_number():
+    return allocator.allocate()
@@ -0,0 +1,52 @@
+# orders/pagination.py
+
+import base64
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(created, pk):
+    raw = f"{created.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created, pk) or None for a missing / malformed cursor"""
+    try:
+        created, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created), uuid.UUID(pk)
+    except (ValueError, UnicodeError, AttributeError):
+        return None
+
+
+def keyset_page(querysets, cursor, page_size):
+    """
+    Seek pagination over (-created, -id): the page after `cursor` is read
+    straight off the index, no matter how deep it is.
+
+    `querysets` may be a single queryset or several (e.g. hot and archived
+    orders); each is seeked separately and the results merged.
+    Returns (rows, next_cursor).
+    """
+    if not isinstance(querysets, (list, tuple)):
+        querysets = [querysets]
+
+    position = decode_cursor(cursor) if cursor else None
+    rows = []
+    for queryset in querysets:
+        if position:
+            created, pk = position
+            queryset = queryset.filter(
+                Q(created__lt=created) | Q(created=created, id__lt=pk)
+            )
+        rows += queryset.order_by("-created", "-id")[: page_size + 1]
+
+    if len(querysets) > 1:
+        rows.sort(key=lambda row: (row.created, row.pk), reverse=True)
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    return rows, encode_cursor(rows[-1].created, rows[-1].pk)
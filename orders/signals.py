@@ -0,0 +1,7 @@
+# orders/signals.py
+
+from django.dispatch import Signal
+
+# Sent by orders.transitions after a set-based status UPDATE (post_save is
+# not). Arguments: changes=[(order_id, from_status), ...], to_status.
+orders_transitioned = Signal()
@@ -1,3 +1,490 @@
-from django.test import TestCase
+import csv
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Address
+from cart.models import Cart, CartItem
+from products.models import Category, Product, ProductListing, ProductVariant
+from promotions.models import Coupon
+
+from .archive import archive_orders
+from .checkout import CheckoutError, checkout
+from .exports import PICK_LIST_COLUMNS, OrderExport
+from .models import (
+    ArchivedOrder,
+    ArchivedOrderItem,
+    Order,
+    OrderEvent,
+    OrderItem,
+    OrderNumberSequence,
+)
+from .numbering import OrderNumberAllocator
+from .transitions import InvalidTransition, bulk_transition, transition
+
+User = get_user_model()
+
+
+def make_customer(username="buyer"):
+    user = User.objects.create_user(username, f"{username}@example.com", "pw")
+    address = Address.objects.create(
+        user=user,
+        full_name="Buyer",
+        phone="123",
+        address_line1="1 Main St",
+        city="Town",
+        state="State",
+        postal_code="12345",
+        country="Country",
+    )
+    return user, address
+
+
+def make_product(name, price, stock):
+    category, _ = Category.objects.get_or_create(name="Shoes", slug="shoes")
+    return Product.objects.create(
+        name=name,
+        description=name,
+        sku=name.upper(),
+        category=category,
+        price=Decimal(price),
+        cost_price=Decimal("1.00"),
+        stock_quantity=stock,
+    )
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.user, self.address = make_customer()
+        self.shoe = make_product("shoe", "10.00", stock=5)
+        self.hat = make_product("hat", "20.00", stock=0)
+        self.large_hat = ProductVariant.objects.create(
+            product=self.hat,
+            name="Large",
+            sku="HAT-L",
+            price_adjustment=Decimal("5.00"),
+            stock_quantity=3,
+        )
+        self.cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=self.cart, product=self.shoe, quantity=2)
+        CartItem.objects.create(
+            cart=self.cart, product=self.hat, variant=self.large_hat, quantity=1
+        )
+
+    def test_checkout_creates_order_and_decrements_stock(self):
+        order = checkout(self.cart, self.address)
+
+        self.assertEqual(order.total, Decimal("45.00"))
+        self.assertQuerySetEqual(
+            order.items.order_by("product_sku").values_list(
+                "product_name", "product_sku", "unit_price", "quantity"
+            ),
+            [
+                ("hat - Large", "HAT-L", Decimal("25.00"), 1),
+                ("shoe", "SHOE", Decimal("10.00"), 2),
+            ],
+        )
+        self.shoe.refresh_from_db()
+        self.large_hat.refresh_from_db()
+        self.assertEqual(self.shoe.stock_quantity, 3)
+        self.assertEqual(self.large_hat.stock_quantity, 2)
+        self.cart.refresh_from_db()
+        self.assertFalse(self.cart.is_active)
+
+        with self.assertRaises(CheckoutError):
+            checkout(self.cart, self.address)
+
+    def test_insufficient_stock_rolls_back(self):
+        CartItem.objects.filter(product=self.shoe).update(quantity=6)
+
+        with self.assertRaises(CheckoutError):
+            checkout(self.cart, self.address)
+
+        self.assertFalse(Order.objects.exists())
+        self.large_hat.refresh_from_db()
+        self.assertEqual(self.large_hat.stock_quantity, 3)
+        self.cart.refresh_from_db()
+        self.assertTrue(self.cart.is_active)
+
+    def test_selling_the_last_unit_updates_the_listing(self):
+        CartItem.objects.filter(product=self.shoe).update(quantity=5)
+        checkout(self.cart, self.address)
+
+        self.assertFalse(ProductListing.objects.get(pk=self.shoe.pk).in_stock)
+        self.assertTrue(ProductListing.objects.get(pk=self.hat.pk).in_stock)
+
+    def test_coupon_is_applied_and_redeemed(self):
+        now = timezone.now()
+        coupon = Coupon.objects.create(
+            code="SAVE10",
+            description="10% off",
+            discount_type="percentage",
+            discount_value=Decimal("10"),
+            max_discount=Decimal("4.00"),
+            usage_limit=1,
+            valid_from=now - timedelta(days=1),
+            valid_to=now + timedelta(days=1),
+        )
+
+        order = checkout(self.cart, self.address, coupon_code="SAVE10")
+
+        self.assertEqual(order.discount, Decimal("4.00"))
+        self.assertEqual(order.total, Decimal("41.00"))
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.usage_count, 1)
+
+    def test_checkout_view(self):
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("orders:checkout"), {"shipping_address": self.address.pk}
+        )
+
+        order = Order.objects.get()
+        self.assertRedirects(
+            response, reverse("orders:detail", args=[order.order_number])
+        )
+        self.assertEqual(OrderItem.objects.count(), 2)
+
+
+class OrderHistoryTests(TestCase):
+    def setUp(self):
+        self.user, self.address = make_customer()
+        product = make_product("shoe", "10.00", stock=100)
+        for n in range(25):
+            order = Order.objects.create(
+                order_number=f"ORD-{n:08d}",
+                customer=self.user,
+                shipping_address=self.address,
+                total=Decimal("20.00"),
+            )
+            OrderItem.objects.create(
+                order=order,
+                product=product,
+                product_name="shoe",
+                product_sku="SHOE",
+                unit_price=Decimal("10.00"),
+                unit_cost=Decimal("1.00"),
+                quantity=2,
+            )
+        # Identical timestamps exercise the id tie-breaker
+        Order.objects.update(created=timezone.now())
+        self.client.force_login(self.user)
+
+    def test_keyset_pages_cover_every_order_once(self):
+        seen = []
+        url = reverse("orders:history")
+        params = {}
+        while True:
+            # session, user, orders, items, cart badge
+            with self.assertNumQueries(5):
+                response = self.client.get(url, params)
+            seen += [order.order_number for order in response.context["orders"]]
+            if not response.context["next_cursor"]:
+                break
+            params = {"after": response.context["next_cursor"]}
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        self.assertContains(response, "20.00")
+
+    def test_detail_is_limited_to_the_customer(self):
+        other, _ = make_customer("other")
+        order = Order.objects.first()
+
+        response = self.client.get(reverse("orders:detail", args=[order.order_number]))
+        self.assertEqual(response.context["order"].items.all()[0].line_total, 20)
+
+        self.client.force_login(other)
+        response = self.client.get(reverse("orders:detail", args=[order.order_number]))
+        self.assertEqual(response.status_code, 404)
+
+
+class OrderNumberAllocatorTests(TransactionTestCase):
+    def test_numbers_are_increasing_within_a_process(self):
+        allocator = OrderNumberAllocator(name="test", block_size=10)
+
+        numbers = [allocator.allocate() for _ in range(25)]
+
+        self.assertEqual(numbers[0], "ORD-00000001")
+        self.assertEqual(numbers, sorted(set(numbers)))
+        self.assertEqual(OrderNumberSequence.objects.get(name="test").next_value, 31)
+
+    def test_concurrent_workers_never_share_numbers(self):
+        # Each allocator stands in for one worker process
+        allocators = [
+            OrderNumberAllocator(name="test", block_size=7) for _ in range(4)
+        ]
+        results = [[] for _ in allocators]
+
+        def worker(allocator, result):
+            try:
+                for _ in range(200):
+                    for attempt in range(1000):
+                        try:
+                            result.append(allocator.allocate())
+                            break
+                        except OperationalError:
+                            # SQLite shared-cache table lock; a deadlock
+                            # fails the test instead of hanging it
+                            if attempt == 999:
+                                raise
+                            time.sleep(0.001)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=args)
+            for args in zip(allocators, results)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        numbers = [number for result in results for number in result]
+        self.assertEqual(len(numbers), 800)
+        self.assertEqual(len(set(numbers)), 800)
+        for result in results:
+            self.assertEqual(result, sorted(result))
+
+    def test_block_is_not_reused_after_rollback(self):
+        allocator = OrderNumberAllocator(name="test", block_size=10)
+
+        try:
+            with transaction.atomic():
+                first = allocator.allocate()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(first, "ORD-00000001")
+        self.assertEqual(allocator.allocate(), "ORD-00000001")
+        self.assertEqual(allocator.allocate(), "ORD-00000002")
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.user, self.address = make_customer()
+        product = make_product("shoe", "10.00", stock=100)
+        for n, status in enumerate(["pending", "processing", "processing"]):
+            order = Order.objects.create(
+                order_number=f"ORD-{n:08d}",
+                customer=self.user,
+                shipping_address=self.address,
+                status=status,
+                total=Decimal("30.00"),
+            )
+            for quantity in (1, 2):
+                OrderItem.objects.create(
+                    order=order,
+                    product=product,
+                    product_name="shoe",
+                    product_sku="SHOE",
+                    unit_price=Decimal("10.00"),
+                    unit_cost=Decimal("1.00"),
+                    quantity=quantity,
+                )
+            Order.objects.filter(pk=order.pk).update(
+                created=timezone.now() + timedelta(minutes=n)
+            )
+
+    def export(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command("export_orders", *args, stdout=stdout, stderr=stderr)
+        return list(csv.reader(StringIO(stdout.getvalue())))
+
+    def test_csv_export_streams_every_line_in_order(self):
+        rows = self.export()
+
+        self.assertEqual(rows[0][0], "order_number")
+        self.assertEqual(
+            [row[0] for row in rows[1:]],
+            ["ORD-00000000"] * 2 + ["ORD-00000001"] * 2 + ["ORD-00000002"] * 2,
+        )
+        self.assertEqual(Decimal(rows[2][-1]), Decimal("20.00"))
+
+    def test_pick_list_only_has_processing_orders(self):
+        rows = self.export("--pick-list")
+
+        self.assertEqual({row[0] for row in rows[1:]}, {"ORD-00000001", "ORD-00000002"})
+        self.assertEqual(rows[1][PICK_LIST_COLUMNS.index("city")], "Town")
+
+    def test_watermark_resumes_after_last_exported_order(self):
+        export = OrderExport(since=None)
+        rows = export.rows()
+        for _ in range(3):  # stop half-way through the second order
+            next(rows)
+        resumed = OrderExport(since=export.watermark)
+
+        self.assertEqual(
+            [row[0] for row in resumed.rows()],
+            ["ORD-00000001"] * 2 + ["ORD-00000002"] * 2,
+        )
+        self.assertEqual(list(OrderExport(since=resumed.watermark).rows()), [])
+
+
+class OrderTransitionTests(TestCase):
+    def setUp(self):
+        self.user, self.address = make_customer()
+        self.orders = [
+            Order.objects.create(
+                order_number=f"ORD-{n:08d}",
+                customer=self.user,
+                shipping_address=self.address,
+                status=status,
+                total=Decimal("10.00"),
+            )
+            for n, status in enumerate(["processing", "processing", "pending"])
+        ]
+
+    def test_bulk_transition_skips_disallowed_orders(self):
+        # savepoint, lock, update, events, release
+        with self.assertNumQueries(5):
+            changed = bulk_transition(
+                [order.pk for order in self.orders],
+                "shipped",
+                tracking_numbers={"ORD-00000000": "TRACK-1"},
+            )
+
+        self.assertCountEqual(changed, [self.orders[0].pk, self.orders[1].pk])
+        shipped = Order.objects.get(order_number="ORD-00000000")
+        self.assertEqual(shipped.status, "shipped")
+        self.assertEqual(shipped.tracking_number, "TRACK-1")
+        self.assertIsNotNone(shipped.shipped_at)
+        untracked, skipped = Order.objects.filter(
+            order_number__in=["ORD-00000001", "ORD-00000002"]
+        ).order_by("order_number")
+        self.assertEqual(untracked.tracking_number, "")
+        self.assertEqual(skipped.status, "pending")
+        self.assertEqual(
+            list(OrderEvent.objects.values_list("from_status", "to_status")),
+            [("processing", "shipped")] * 2,
+        )
+
+    def test_single_transition(self):
+        order = transition(self.orders[2], "processing", actor=self.user)
+
+        self.assertEqual(order.status, "processing")
+        self.assertEqual(order.events.get().actor, self.user)
+        with self.assertRaises(InvalidTransition):
+            transition(order, "delivered")
+
+    def test_mark_shipped_command(self):
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / "carrier.csv"
+        path.write_text("order_number,tracking_number\nORD-00000001,TRACK-9\n")
+
+        call_command("mark_shipped", str(path), stdout=StringIO())
+
+        order = Order.objects.get(order_number="ORD-00000001")
+        self.assertEqual((order.status, order.tracking_number), ("shipped", "TRACK-9"))
+
+
+class OrderArchiveTests(TestCase):
+    def setUp(self):
+        self.user, self.address = make_customer()
+        product = make_product("shoe", "10.00", stock=100)
+        statuses = ["delivered", "cancelled", "processing", "delivered"]
+        for n, status in enumerate(statuses):
+            order = Order.objects.create(
+                order_number=f"ORD-{n:08d}",
+                customer=self.user,
+                shipping_address=self.address,
+                status=status,
+                total=Decimal("20.00"),
+            )
+            OrderItem.objects.create(
+                order=order,
+                product=product,
+                product_name="shoe",
+                product_sku="SHOE",
+                unit_price=Decimal("10.00"),
+                unit_cost=Decimal("1.00"),
+                quantity=2,
+            )
+            OrderEvent.objects.create(
+                order=order, from_status="pending", to_status=status
+            )
+            # The last order is recent
+            age = timedelta(days=3) if n == 3 else timedelta(days=400 - n)
+            delivered_at = timezone.now() - age if status == "delivered" else None
+            Order.objects.filter(pk=order.pk).update(
+                created=timezone.now() - age, delivered_at=delivered_at
+            )
+        self.client.force_login(self.user)
+
+    def test_old_finished_orders_are_moved(self):
+        old = Order.objects.get(order_number="ORD-00000000")
+
+        out = StringIO()
+        call_command("archive_orders", "--batch-size", "1", "--sleep", "0", stdout=out)
+
+        self.assertIn("Archived 2 orders", out.getvalue())
+        self.assertEqual(
+            set(Order.objects.values_list("order_number", flat=True)),
+            {"ORD-00000002", "ORD-00000003"},
+        )
+        archived = ArchivedOrder.objects.get(order_number="ORD-00000000")
+        self.assertEqual((archived.pk, archived.created), (old.pk, old.created))
+        self.assertEqual(archived.items.get().subtotal, Decimal("20.00"))
+        self.assertEqual(archived.events.get().to_status, "delivered")
+        self.assertEqual(OrderItem.objects.count(), 2)
+        self.assertEqual(ArchivedOrderItem.objects.count(), 2)
+
+    def test_delivered_orders_wait_for_the_return_window(self):
+        # An old order delivered recently can still be refunded
+        Order.objects.filter(order_number="ORD-00000000").update(
+            delivered_at=timezone.now() - timedelta(days=29)
+        )
+        Order.objects.create(
+            order_number="ORD-00000004",
+            customer=self.user,
+            shipping_address=self.address,
+            status="refunded",
+            total=Decimal("20.00"),
+        )
+        Order.objects.filter(order_number="ORD-00000004").update(
+            created=timezone.now() - timedelta(days=500)
+        )
+
+        self.assertEqual(archive_orders(), 2)
+        self.assertEqual(
+            set(ArchivedOrder.objects.values_list("order_number", flat=True)),
+            {"ORD-00000001", "ORD-00000004"},
+        )
+
+        with self.settings(ORDER_RETURN_WINDOW_DAYS=14):
+            self.assertEqual(archive_orders(), 1)
+        self.assertTrue(ArchivedOrder.objects.filter(order_number="ORD-00000000"))
+
+    def test_archived_orders_stay_visible(self):
+        archive_orders(limit=1)
+        number = ArchivedOrder.objects.get().order_number
+
+        response = self.client.get(reverse("orders:detail", args=[number]))
+        self.assertEqual(response.context["order"].items.get().line_total, 20)
+
+        response = self.client.get(reverse("orders:history"))
+        self.assertEqual(len(response.context["orders"]), 3)
+        response = self.client.get(reverse("orders:history"), {"archived": "1"})
+        self.assertEqual(
+            [order.order_number for order in response.context["orders"]],
+            ["ORD-00000003", "ORD-00000002", "ORD-00000001", "ORD-00000000"],
+        )
+
+        rows = list(OrderExport(include_archived=True).rows())
+        self.assertEqual(
+            [row[0] for row in rows],
+            ["ORD-00000000", "ORD-00000001", "ORD-00000002", "ORD-00000003"],
+        )
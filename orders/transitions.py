@@ -0,0 +1,124 @@
+# orders/transitions.py
+
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Order, OrderEvent
+from .signals import orders_transitioned
+
+# Allowed status changes: from -> {to, ...}
+TRANSITIONS = {
+    "pending": {"processing", "cancelled"},
+    "processing": {"shipped", "cancelled"},
+    "shipped": {"delivered"},
+    "delivered": {"refunded"},
+    "cancelled": set(),
+    "refunded": set(),
+}
+
+# Timestamp set when an order enters a status
+TIMESTAMP_FIELDS = {
+    "shipped": "shipped_at",
+    "delivered": "delivered_at",
+}
+
+
+class InvalidTransition(Exception):
+    """Raised when an order's status does not allow the requested change"""
+
+
+def allowed_sources(to_status):
+    if to_status not in TRANSITIONS:
+        raise InvalidTransition(f"Unknown status {to_status!r}.")
+    return [status for status, targets in TRANSITIONS.items() if to_status in targets]
+
+
+def can_transition(from_status, to_status):
+    return to_status in TRANSITIONS.get(from_status, ())
+
+
+def bulk_transition(
+    orders, to_status, actor=None, note="", tracking_numbers=None, batch_size=1000
+):
+    """
+    Move many orders to `to_status` with set-based statements:
+    per batch, one locking SELECT, one UPDATE and one bulk_create of
+    OrderEvents. Orders whose current status doesn't allow the change
+    are skipped.
+
+    `orders` is a queryset (or iterable of primary keys);
+    `tracking_numbers` optionally maps order_number -> tracking number.
+    Returns the ids of the orders that changed.
+    """
+    sources = allowed_sources(to_status)
+    if hasattr(orders, "values_list"):
+        orders = orders.values_list("pk", flat=True)
+    order_ids = iter(list(orders))
+
+    changed = []
+    while batch := list(islice(order_ids, batch_size)):
+        with transaction.atomic():
+            rows = list(
+                Order.objects.select_for_update()
+                .filter(pk__in=batch, status__in=sources)
+                .order_by("pk")
+                .values_list("pk", "status", "order_number")
+            )
+            if not rows:
+                continue
+
+            now = timezone.now()
+            updates = {"status": to_status, "modified": now}
+            if to_status in TIMESTAMP_FIELDS:
+                updates[TIMESTAMP_FIELDS[to_status]] = now
+            if tracking_numbers:
+                whens = [
+                    When(pk=pk, then=Value(tracking_numbers[number]))
+                    for pk, _, number in rows
+                    if number in tracking_numbers
+                ]
+                if whens:
+                    updates["tracking_number"] = Case(
+                        *whens, default=F("tracking_number")
+                    )
+
+            ids = [pk for pk, _, _ in rows]
+            Order.objects.filter(pk__in=ids).update(**updates)
+            OrderEvent.objects.bulk_create(
+                OrderEvent(
+                    order_id=pk,
+                    from_status=status,
+                    to_status=to_status,
+                    actor=actor,
+                    note=note,
+                )
+                for pk, status, _ in rows
+            )
+            orders_transitioned.send(
+                sender=Order,
+                changes=[(pk, status) for pk, status, _ in rows],
+                to_status=to_status,
+            )
+        changed += ids
+
+    return changed
+
+
+def transition(order, to_status, actor=None, note="", tracking_number=""):
+    """
+    Move a single order to `to_status`, raising InvalidTransition if its
+    current status doesn't allow it. Updates `order` in place.
+    """
+    tracking = {order.order_number: tracking_number} if tracking_number else None
+    if not bulk_transition([order.pk], to_status, actor, note, tracking):
+        raise InvalidTransition(
+            f"Order {order.order_number} cannot move from "
+            f"{order.status!r} to {to_status!r}."
+        )
+    order.refresh_from_db(
+        fields=["status", "modified", "tracking_number", *TIMESTAMP_FIELDS.values()]
+    )
+    return order
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .views import CheckoutView, OrderDetailView, OrderHistoryView
+
+app_name = "orders"
+
+urlpatterns = [
+    path("", OrderHistoryView.as_view(), name="history"),
+    path("checkout/", CheckoutView.as_view(), name="checkout"),
+    path("<str:order_number>/", OrderDetailView.as_view(), name="detail"),
+]
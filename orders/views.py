@@ -1,3 +1,138 @@
-from django.shortcuts import render
+# orders/views.py
 
-# Create your views here.
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Prefetch,
+    prefetch_related_objects,
+)
+from django.http import Http404
+from django.shortcuts import redirect
+from django.views.generic import DetailView, FormView, TemplateView
+
+from cart.storage import DatabaseCartStorage
+
+from .checkout import CheckoutError, checkout
+from .forms import CheckoutForm
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from .pagination import keyset_page
+
+
+def order_items_prefetch(model=OrderItem):
+    """
+    Order lines from their snapshot columns only (no join back to products),
+    with the line total computed by the database.
+    """
+    return Prefetch(
+        "items",
+        queryset=model.objects.only(
+            "order_id", "product_name", "product_sku", "unit_price", "quantity"
+        )
+        .annotate(
+            line_total=ExpressionWrapper(
+                F("unit_price") * F("quantity"),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+        )
+        .order_by("created"),
+    )
+
+
+class CheckoutView(LoginRequiredMixin, FormView):
+    """
+    Convert the user's cart into an order.
+    """
+
+    form_class = CheckoutForm
+    template_name = "orders/checkout.html"
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            storage = DatabaseCartStorage(request, user=request.user)
+            self.cart = storage.get_cart()
+            self.items = storage.lines()
+            if not self.items:
+                return redirect("cart:detail")
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["items"] = self.items
+        context["cart_total"] = sum(item.subtotal for item in self.items)
+        return context
+
+    def form_valid(self, form):
+        try:
+            order = checkout(self.cart, **form.cleaned_data)
+        except CheckoutError as exc:
+            form.add_error(None, str(exc))
+            return self.form_invalid(form)
+
+        return redirect("orders:detail", order_number=order.order_number)
+
+
+class OrderHistoryView(LoginRequiredMixin, TemplateView):
+    """
+    Customer order history, keyset-paginated on (customer, -created).
+    ?archived=1 also walks the archived orders.
+    """
+
+    template_name = "orders/order_history.html"
+    paginate_by = 10
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        include_archived = self.request.GET.get("archived") == "1"
+        querysets = [Order.objects.filter(customer=self.request.user)]
+        if include_archived:
+            querysets.append(ArchivedOrder.objects.filter(customer=self.request.user))
+
+        orders, next_cursor = keyset_page(
+            querysets, self.request.GET.get("after"), self.paginate_by
+        )
+        prefetch_related_objects(
+            [order for order in orders if isinstance(order, Order)],
+            order_items_prefetch(),
+        )
+        prefetch_related_objects(
+            [order for order in orders if isinstance(order, ArchivedOrder)],
+            order_items_prefetch(ArchivedOrderItem),
+        )
+        context["orders"] = orders
+        context["next_cursor"] = next_cursor
+        context["include_archived"] = include_archived
+        return context
+
+
+class OrderDetailView(LoginRequiredMixin, DetailView):
+    """
+    Single order of the current customer.
+    """
+
+    template_name = "orders/order_detail.html"
+    context_object_name = "order"
+    slug_field = "order_number"
+    slug_url_kwarg = "order_number"
+
+    def get_queryset(self):
+        return Order.objects.filter(customer=self.request.user).prefetch_related(
+            order_items_prefetch()
+        )
+
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            # Old orders live in the archive
+            return super().get_object(
+                ArchivedOrder.objects.filter(
+                    customer=self.request.user
+                ).prefetch_related(order_items_prefetch(ArchivedOrderItem))
+            )
@@ -1,11 +1,35 @@
 from django.contrib import admin
 
-from .models import Brand, Category, Product, ProductImage, ProductVariant
+from .listings import refresh_listings
+from .models import (
+    Brand,
+    Category,
+    PriceWindow,
+    Product,
+    ProductImage,
+    ProductVariant,
+)
 
 
 @admin.action(description="Mark selected Products as available")
 def make_available(modeladmin, request, queryset):
+    product_ids = list(queryset.values_list("pk", flat=True))
     queryset.update(is_available=True)
+    refresh_listings(product_ids)
+
+
+@admin.action(description="Soft-delete selected Products")
+def soft_delete(modeladmin, request, queryset):
+    product_ids = list(queryset.values_list("pk", flat=True))
+    queryset.soft_delete()
+    refresh_listings(product_ids)
+
+
+@admin.action(description="Restore selected Products")
+def restore(modeladmin, request, queryset):
+    product_ids = list(queryset.values_list("pk", flat=True))
+    queryset.restore()
+    refresh_listings(product_ids)
 
 
 @admin.register(Brand)
@@ -39,14 +63,15 @@ class ProductAdmin(admin.ModelAdmin):
         "category",
         "stock_quantity",
         "is_available",
+        "is_deleted",
     ]
-    list_filter = ["is_available", "brand", "category"]
+    list_filter = ["is_available", "is_deleted", "brand", "category"]
     list_editable = ["is_available"]
     search_fields = ["name", "sku"]
     prepopulated_fields = {"slug": ("name",)}
     inlines = [ProductImageInline]
     empty_value_display = "-empty-"
-    actions = [make_available]
+    actions = [make_available, soft_delete, restore]
 
 
 @admin.register(ProductVariant)
@@ -55,3 +80,20 @@ class ProductVariantAdmin(admin.ModelAdmin):
     list_filter = ["product", "stock_quantity"]
     search_fields = ["name", "sku"]
     empty_value_display = "-empty-"
+
+
+@admin.register(PriceWindow)
+class PriceWindowAdmin(admin.ModelAdmin):
+    list_display = [
+        "product",
+        "variant",
+        "sale_price",
+        "starts_at",
+        "ends_at",
+        "priority",
+        "is_active",
+    ]
+    list_filter = ["is_active"]
+    raw_id_fields = ["product", "variant"]
+    search_fields = ["product__name", "variant__sku"]
+    date_hierarchy = "starts_at"
@@ -0,0 +1,172 @@
+# products/conditional.py
+
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Now
+
+from .models import Category, Product
+
+_GENERATION_KEY = "catalog:generation:{}"
+_CONTENT_KEY = "catalog:content:{}"
+
+
+def _cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def touch(*scopes):
+    """
+    Start a new generation of the given list scopes once the current
+    transaction commits, so a request can never pair new validators with
+    old rows. A generation is the time it started, in nanoseconds.
+    Scopes: "categories" (the sidebar), "products" (the unfiltered list)
+    and "category:<pk>" (one category's list).
+    """
+
+    def bump():
+        now = time.time_ns()
+        keys = [_GENERATION_KEY.format(scope) for scope in scopes]
+        _cache().set_many(dict.fromkeys(keys, now), None)
+
+    transaction.on_commit(bump)
+
+
+def touch_products(category_ids):
+    """Products of these categories changed (rows, images or prices)"""
+    category_ids = set(category_ids) - {None}
+    touch("products", *(f"category:{pk}" for pk in category_ids))
+
+
+async def agenerations(scopes):
+    cache = _cache()
+    keys = [_GENERATION_KEY.format(scope) for scope in scopes]
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            # Unknown after a restart or eviction: start one, keep any racer's
+            await cache.aadd(key, time.time_ns(), None)
+            found[key] = await cache.aget(key)
+    return [found[key] for key in keys]
+
+
+def content_timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 60)
+
+
+def fragment_cache(etag):
+    """
+    Template context for {% cache %} around the visitor-independent parts
+    of a page: the fragments are keyed on the page's validators.
+    """
+    return {
+        "alias": getattr(settings, "CATALOG_CACHE_ALIAS", "default"),
+        "timeout": content_timeout(),
+        "key": etag.strip('"'),
+    }
+
+
+async def acached(key, build):
+    """
+    The value stored under `key`, or `await build()` stored there.
+    Keys start from a page's ETag, so entries never need invalidating: a
+    change moves the page to new keys and the old ones age out after
+    CATALOG_CACHE_TIMEOUT.
+    """
+    cache = _cache()
+    key = _CONTENT_KEY.format(key)
+    value = await cache.aget(key)
+    if value is None:
+        value = await build()
+        await cache.aset(key, value, content_timeout())
+    return value
+
+
+def _etag(*parts):
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+async def list_validators(category_slug=None):
+    """(etag, last_modified) of a product list page, without touching products"""
+    scopes = ["categories"]
+    if category_slug is None:
+        scopes.append("products")
+    else:
+        pk = await (
+            Category.objects.filter(slug=category_slug)
+            .values_list("pk", flat=True)
+            .afirst()
+        )
+        if pk is not None:
+            scopes.append(f"category:{pk}")
+
+    generations = await agenerations(scopes)
+    last_modified = datetime.fromtimestamp(max(generations) / 1e9, timezone.utc)
+    return _etag(category_slug, *generations), last_modified
+
+
+# Aggregates over every row a product page shows: a change to any of them
+# moves the page's validators
+_DETAIL_FINGERPRINT = {
+    "product_modified": Max("modified"),
+    "category_modified": Max("category__modified"),
+    "brand_modified": Max("brand__modified"),
+    "images_modified": Max("images__modified"),
+    "image_count": Count("images", distinct=True),
+    "variants_modified": Max("variants__modified"),
+    "variant_count": Count("variants", distinct=True),
+    "sale_price": Max(
+        "effective_prices__price",
+        filter=Q(
+            effective_prices__variant__isnull=True,
+            effective_prices__ends_at__gt=Now(),
+        ),
+    ),
+}
+
+# Built once: resolving these joins costs several times more than running
+# the query, which only ever touches one product's rows.
+_detail_fingerprint = Product.objects.values("pk").annotate(**_DETAIL_FINGERPRINT)
+
+
+def _detail_validators(slug, row):
+    last_modified = max(
+        value
+        for key, value in row.items()
+        if key.endswith("_modified") and value is not None
+    )
+    return _etag(slug, *row.values()), last_modified
+
+
+async def detail_validators(slug):
+    """
+    (etag, last_modified) of a product page from one aggregate over the
+    product, its category, brand, images, variants and current sale price,
+    or None if there is no such product.
+    """
+    try:
+        row = await _detail_fingerprint.filter(slug=slug).aget()
+    except Product.DoesNotExist:
+        return None
+    return _detail_validators(slug, row)
+
+
+def with_detail_validators(queryset):
+    """Annotate products with the aggregates product_validators() reads"""
+    return queryset.annotate(**_DETAIL_FINGERPRINT)
+
+
+def product_validators(product):
+    """
+    detail_validators() of a product fetched through with_detail_validators(),
+    without a query: the page that renders it can be validated by the same row.
+    """
+    row = {"pk": product.pk}
+    row.update((name, getattr(product, name)) for name in _DETAIL_FINGERPRINT)
+    return _detail_validators(product.slug, row)
@@ -0,0 +1,225 @@
+# products/listings.py
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue
+from reviews.models import Review
+
+from .conditional import touch_products
+from .models import (
+    Category,
+    EffectivePrice,
+    Product,
+    ProductImage,
+    ProductListing,
+    ProductVariant,
+)
+
+RECONCILE_JOB = "products.listings.reconcile_listings_job"
+
+# Batches stay well under the database's limit on query parameters
+CHUNK_SIZE = 500
+
+_FIELDS = [
+    field.attname
+    for field in ProductListing._meta.concrete_fields
+    if not field.primary_key
+]
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start : start + CHUNK_SIZE]
+
+
+def _category_paths():
+    """{category_id: "Root / ... / leaf"} from one read of the small table"""
+    rows = {
+        pk: (name, parent_id)
+        for pk, name, parent_id in Category.objects.values_list(
+            "pk", "name", "parent_id"
+        )
+    }
+    paths = {}
+    for pk in rows:
+        names, seen, current = [], set(), pk
+        while current in rows and current not in seen:
+            seen.add(current)
+            name, current = rows[current]
+            names.append(name)
+        paths[pk] = " / ".join(reversed(names))
+    return paths
+
+
+def build_listings(product_ids, now=None):
+    """
+    {product_id: unsaved ProductListing} for the products of `product_ids`
+    that belong in listings, from one query per source table.
+    """
+    now = now or timezone.now()
+    products = list(
+        Product.objects.filter(pk__in=product_ids, is_available=True).values(
+            "pk",
+            "name",
+            "slug",
+            "price",
+            "stock_quantity",
+            "created",
+            "category_id",
+            "category__slug",
+            "brand__name",
+        )
+    )
+    ids = [product["pk"] for product in products]
+    if not ids:
+        return {}
+
+    images = {
+        product_id: (image, alt_text)
+        for product_id, image, alt_text in ProductImage.objects.filter(
+            product_id__in=ids, is_primary=True
+        ).values_list("product_id", "image", "alt_text")
+    }
+    variants = defaultdict(list)
+    for product_id, pk, adjustment, stock in ProductVariant.objects.filter(
+        product_id__in=ids
+    ).values_list("product_id", "pk", "price_adjustment", "stock_quantity"):
+        variants[product_id].append((pk, adjustment, stock))
+    sales = {
+        (product_id, variant_id): (price, ends_at)
+        for product_id, variant_id, price, ends_at in EffectivePrice.objects.filter(
+            product_id__in=ids, ends_at__gt=now
+        ).values_list("product_id", "variant_id", "price", "ends_at")
+    }
+    reviews = {
+        row["product_id"]: row
+        for row in Review.objects.filter(product_id__in=ids, is_approved=True)
+        .values("product_id")
+        .annotate(rating=Avg("rating"), count=Count("pk"))
+    }
+    paths = _category_paths()
+
+    listings = {}
+    for product in products:
+        pk = product["pk"]
+        sale_price, sale_ends_at = sales.get((pk, None), (None, None))
+        base = product["price"] if sale_price is None else sale_price
+        if variants[pk]:
+            # As products.pricing.resolve_price prices each variant
+            prices = [
+                sales.get((pk, variant_id), (base + adjustment,))[0]
+                for variant_id, adjustment, _ in variants[pk]
+            ]
+            in_stock = any(stock > 0 for _, _, stock in variants[pk])
+        else:
+            prices = [base]
+            in_stock = product["stock_quantity"] > 0
+        image, image_alt = images.get(pk, ("", ""))
+        review = reviews.get(pk)
+
+        listings[pk] = ProductListing(
+            product_id=pk,
+            name=product["name"],
+            slug=product["slug"],
+            category_id=product["category_id"],
+            category_slug=product["category__slug"],
+            category_path=paths.get(product["category_id"], ""),
+            brand_name=product["brand__name"] or "",
+            image=image,
+            image_alt=image_alt,
+            price=product["price"],
+            sale_price=sale_price,
+            sale_ends_at=sale_ends_at,
+            min_price=min(prices),
+            max_price=max(prices),
+            in_stock=in_stock,
+            rating=_rating(review["rating"]) if review else None,
+            review_count=review["count"] if review else 0,
+            created=product["created"],
+        )
+    return listings
+
+
+def _rating(average):
+    return Decimal(str(average)).quantize(Decimal("0.01"))
+
+
+def _values(listing):
+    values = []
+    for name in _FIELDS:
+        value = getattr(listing, name)
+        values.append(value.name if name == "image" else value)
+    return values
+
+
+def refresh_listings(product_ids):
+    """
+    Rebuild the listing rows of `product_ids` in the current transaction,
+    writing only rows that changed, and start new list generations for
+    the categories those rows left or joined. Returns the number of rows
+    created, updated or deleted.
+    """
+    product_ids = set(product_ids) - {None}
+    if not product_ids:
+        return 0
+    changed = 0
+    categories = set()
+    with transaction.atomic():
+        for chunk in _chunks(product_ids):
+            built = build_listings(chunk)
+            current = ProductListing.objects.in_bulk(chunk)
+
+            stale = [pk for pk in current if pk not in built]
+            rows = [
+                row
+                for pk, row in built.items()
+                if pk not in current or _values(current[pk]) != _values(row)
+            ]
+            ProductListing.objects.filter(pk__in=stale).delete()
+            ProductListing.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["product"],
+                update_fields=_FIELDS,
+            )
+
+            changed += len(stale) + len(rows)
+            categories.update(current[pk].category_id for pk in stale)
+            categories.update(row.category_id for row in rows)
+            categories.update(
+                current[row.pk].category_id for row in rows if row.pk in current
+            )
+        if categories:
+            touch_products(categories)
+    return changed
+
+
+def reconcile_listings():
+    """
+    Repair drift from writes that bypass signals (QuerySet.update,
+    bulk_create, raw SQL): rebuild every listing, chunk by chunk, each in
+    its own transaction. Returns the number of rows fixed.
+    """
+    product_ids = set(Product.all_objects.values_list("pk", flat=True))
+    product_ids.update(ProductListing.objects.values_list("pk", flat=True))
+    return sum(refresh_listings(chunk) for chunk in _chunks(product_ids))
+
+
+def reconcile_listings_job():
+    """Job body: reconcile, then queue the next run"""
+    fixed = reconcile_listings()
+    interval = getattr(settings, "LISTING_RECONCILE_SECONDS", 60 * 60)
+    run_at = timezone.now() + timedelta(seconds=interval)
+    if not Job.objects.filter(name=RECONCILE_JOB, status="queued").exists():
+        enqueue(RECONCILE_JOB, run_at=run_at)
+    return fixed
+
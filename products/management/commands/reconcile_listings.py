@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from products.listings import reconcile_listings_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the product listing table from the catalogue, fixing any "
+        "drift, and queue the next reconciliation (run after migrating, or "
+        "from cron when no job worker is running)"
+    )
+
+    def handle(self, *args, **options):
+        count = reconcile_listings_job()
+        self.stdout.write(self.style.SUCCESS(f"{count} listings fixed"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.pricing import refresh_prices_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the effective-price table from the open price windows and "
+        "queue the next refresh (for cron when no job worker is running)"
+    )
+
+    def handle(self, *args, **options):
+        count = refresh_prices_job()
+        self.stdout.write(self.style.SUCCESS(f"{count} effective prices changed"))
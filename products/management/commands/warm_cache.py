@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import percentile
+from products.warming import (
+    HTTPFetcher,
+    LocalFetcher,
+    catalog_paths,
+    default_host,
+    popular_categories,
+    popular_products,
+    warm,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render the best-selling product pages and category listings so "
+        "a fresh deploy starts with warm catalog caches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=30, help="Sales window for popularity"
+        )
+        parser.add_argument("--products", type=int, default=100)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument(
+            "--pages", type=int, default=1, help="List pages per category"
+        )
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=20,
+            help="Requests per second across all workers (0: unlimited)",
+        )
+        parser.add_argument(
+            "--base-url",
+            help=(
+                "Fetch over HTTP from this site instead of rendering in this "
+                "process (needed when the cache is local to the web workers)"
+            ),
+        )
+        parser.add_argument(
+            "--host",
+            help="Host to render pages for (default: the first ALLOWED_HOSTS entry)",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+        host = options["host"] or default_host()
+        if not options["base_url"] and not host:
+            raise CommandError(
+                "ALLOWED_HOSTS names no single host: pass --host or --base-url"
+            )
+
+        paths = catalog_paths(
+            popular_products(options["days"], options["products"]),
+            popular_categories(options["days"], options["categories"]),
+            options["pages"],
+        )
+        if options["base_url"]:
+            fetch = HTTPFetcher(options["base_url"])
+        else:
+            fetch = LocalFetcher(host)
+
+        started = time.perf_counter()
+        results = warm(paths, fetch, options["workers"], options["rate"])
+        elapsed = time.perf_counter() - started
+
+        failed = [result for result in results if result.status != 200]
+        for result in failed:
+            self.stderr.write(f"  {result.status or 'error'} {result.path}")
+        latencies = [result.ms for result in results]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed {len(results) - len(failed)} of {len(paths)} pages "
+                f"in {elapsed:.2f}s (p50 {percentile(latencies, 50):.1f}ms, "
+                f"p95 {percentile(latencies, 95):.1f}ms)"
+            )
+        )
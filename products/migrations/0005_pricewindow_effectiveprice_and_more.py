@@ -0,0 +1,70 @@
+# Generated by Django 5.0.14 on 2026-10-19 08:12
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_remove_brand_logo_remove_brand_website_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceWindow',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('sale_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('priority', models.IntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_windows', to='products.product')),
+                ('variant', models.ForeignKey(blank=True, help_text='Leave empty to discount the product and all its variants', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_windows', to='products.productvariant')),
+            ],
+            options={
+                'db_table': 'price_windows',
+                'ordering': ['-starts_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EffectivePrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('ends_at', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_prices', to='products.product')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.productvariant')),
+                ('window', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.pricewindow')),
+            ],
+            options={
+                'db_table': 'effective_prices',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pricewindow',
+            index=models.Index(fields=['starts_at'], name='price_windo_starts__626e2c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pricewindow',
+            index=models.Index(fields=['ends_at'], name='price_windo_ends_at_23a833_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='pricewindow',
+            constraint=models.CheckConstraint(check=models.Q(('ends_at__gt', models.F('starts_at'))), name='price_window_ends_after_start'),
+        ),
+        migrations.AddConstraint(
+            model_name='effectiveprice',
+            constraint=models.UniqueConstraint(fields=('product', 'variant'), name='unique_effective_price'),
+        ),
+        migrations.AddConstraint(
+            model_name='effectiveprice',
+            constraint=models.UniqueConstraint(condition=models.Q(('variant__isnull', True)), fields=('product',), name='unique_effective_product_price'),
+        ),
+    ]
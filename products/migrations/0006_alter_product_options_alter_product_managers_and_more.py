@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-19 08:15
+
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_pricewindow_effectiveprice_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='product',
+            options={'default_manager_name': 'all_objects', 'ordering': ['-created']},
+        ),
+        migrations.AlterModelManagers(
+            name='product',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_available', True), ('is_deleted', False)), fields=['-created'], name='product_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_available', True), ('is_deleted', False)), fields=['category', '-created'], name='product_live_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='product_deleted_at_idx'),
+        ),
+    ]
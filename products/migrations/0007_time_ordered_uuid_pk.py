@@ -0,0 +1,51 @@
+# Generated by Django 5.0.14 on 2026-10-19 08:16
+
+import core.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_alter_product_options_alter_product_managers_and_more'),
+    ]
+
+    operations = [
+        # The default is applied in Python, so there is nothing to change in
+        # the database (and SQLite would otherwise rebuild every table).
+        # Existing uuid4 keys stay as they are; new rows get uuid7 keys.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='brand',
+                    name='id',
+                    field=models.UUIDField(default=core.uuids.generate_uuid, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='category',
+                    name='id',
+                    field=models.UUIDField(default=core.uuids.generate_uuid, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='pricewindow',
+                    name='id',
+                    field=models.UUIDField(default=core.uuids.generate_uuid, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='product',
+                    name='id',
+                    field=models.UUIDField(default=core.uuids.generate_uuid, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='productimage',
+                    name='id',
+                    field=models.UUIDField(default=core.uuids.generate_uuid, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='productvariant',
+                    name='id',
+                    field=models.UUIDField(default=core.uuids.generate_uuid, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.14 on 2026-10-19 08:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_listings(apps, schema_editor):
+    # Existing catalogs get their rows now rather than at the next reconcile
+    # run; a fresh database has nothing to build (and skipping keeps later
+    # schema changes from breaking `migrate` on one)
+    if not apps.get_model('products', 'Product')._base_manager.exists():
+        return
+    from products.listings import reconcile_listings
+
+    reconcile_listings()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_time_ordered_uuid_pk'),
+        ('reviews', '0002_time_ordered_uuid_pk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='products.product')),
+                ('name', models.CharField(max_length=200)),
+                ('slug', models.SlugField(max_length=200)),
+                ('category_slug', models.SlugField(max_length=100)),
+                ('category_path', models.CharField(help_text='Root / ... / leaf', max_length=500)),
+                ('brand_name', models.CharField(blank=True, max_length=100)),
+                ('image', models.ImageField(blank=True, help_text='Primary image', upload_to='')),
+                ('image_alt', models.CharField(blank=True, max_length=200)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('sale_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('sale_ends_at', models.DateTimeField(blank=True, null=True)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('in_stock', models.BooleanField()),
+                ('rating', models.DecimalField(decimal_places=2, max_digits=3, null=True)),
+                ('review_count', models.IntegerField(default=0)),
+                ('created', models.DateTimeField(help_text='When the product was created')),
+                ('category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.category')),
+            ],
+            options={
+                'db_table': 'product_listings',
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['-created'], name='listing_created_idx'), models.Index(fields=['category_slug', '-created'], name='listing_category_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_listings, migrations.RunPython.noop),
+    ]
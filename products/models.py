@@ -5,6 +5,7 @@ from decimal import Decimal
 
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
 from core.models import SoftDeleteModel, TimeStampedModel, UUIDModel
@@ -96,10 +97,28 @@ class Product(TimeStampedModel, UUIDModel, SoftDeleteModel):
     class Meta:
         db_table = "products"
         ordering = ["-created"]
+        default_manager_name = "all_objects"
         indexes = [
             models.Index(fields=["slug"]),
             models.Index(fields=["sku"]),
             models.Index(fields=["-created"]),
+            # Storefront listings only ever read live, available products
+            models.Index(
+                fields=["-created"],
+                condition=models.Q(is_deleted=False, is_available=True),
+                name="product_live_created_idx",
+            ),
+            models.Index(
+                fields=["category", "-created"],
+                condition=models.Q(is_deleted=False, is_available=True),
+                name="product_live_category_idx",
+            ),
+            # Purge of long-deleted rows
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(is_deleted=True),
+                name="product_deleted_at_idx",
+            ),
         ]
 
     def save(self, *args, **kwargs):
@@ -189,3 +208,144 @@ class ProductVariant(TimeStampedModel, UUIDModel):
     def final_price(self):
         """Calculate final price including adjustment"""
         return self.product.price + self.price_adjustment
+
+
+class PriceWindow(TimeStampedModel, UUIDModel):
+    """
+    Scheduled sale price for a product (or one of its variants) between
+    starts_at and ends_at. Where windows overlap the highest priority wins,
+    then the lowest price. Read through EffectivePrice, never directly.
+    """
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="price_windows"
+    )
+    variant = models.ForeignKey(
+        ProductVariant,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="price_windows",
+        help_text="Leave empty to discount the product and all its variants",
+    )
+    sale_price = models.DecimalField(
+        max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal("0.01"))]
+    )
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    priority = models.IntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        db_table = "price_windows"
+        ordering = ["-starts_at"]
+        indexes = [
+            models.Index(fields=["starts_at"]),
+            models.Index(fields=["ends_at"]),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(ends_at__gt=models.F("starts_at")),
+                name="price_window_ends_after_start",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.variant or self.product}: {self.sale_price}"
+
+
+class EffectivePrice(models.Model):
+    """
+    Materialized result of the price windows open right now: one row per
+    product / variant on sale, rewritten by products.pricing only when a
+    window starts or ends. No row means the regular price applies.
+    """
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="effective_prices"
+    )
+    variant = models.ForeignKey(
+        ProductVariant,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    window = models.ForeignKey(PriceWindow, on_delete=models.CASCADE, related_name="+")
+    ends_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "effective_prices"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "variant"], name="unique_effective_price"
+            ),
+            models.UniqueConstraint(
+                fields=["product"],
+                condition=models.Q(variant__isnull=True),
+                name="unique_effective_product_price",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.variant or self.product}: {self.price}"
+
+
+class ProductListing(models.Model):
+    """
+    Read model of the storefront listings: one flat row per live, available
+    product with everything a product card shows, so a listing page reads
+    this table alone. Maintained by products.listings from the product,
+    its brand, category, primary image, variants, effective prices and
+    approved reviews; never edited directly.
+    """
+
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="listing"
+    )
+    name = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=200)
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    category_slug = models.SlugField(max_length=100)
+    category_path = models.CharField(max_length=500, help_text="Root / ... / leaf")
+    brand_name = models.CharField(max_length=100, blank=True)
+    image = models.ImageField(blank=True, help_text="Primary image")
+    image_alt = models.CharField(max_length=200, blank=True)
+
+    # List price, and the product-wide sale price while it lasts
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    sale_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    sale_ends_at = models.DateTimeField(null=True, blank=True)
+    # Effective prices over the product or its variants
+    min_price = models.DecimalField(max_digits=10, decimal_places=2)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    in_stock = models.BooleanField()
+    rating = models.DecimalField(max_digits=3, decimal_places=2, null=True)
+    review_count = models.IntegerField(default=0)
+    created = models.DateTimeField(help_text="When the product was created")
+
+    class Meta:
+        db_table = "product_listings"
+        ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["-created"], name="listing_created_idx"),
+            models.Index(
+                fields=["category_slug", "-created"], name="listing_category_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def effective_price(self):
+        """Sale price until it ends (even before the refresh job runs)"""
+        if self.sale_price is not None and self.sale_ends_at > timezone.now():
+            return self.sale_price
+        return self.price
@@ -0,0 +1,184 @@
+# products/pricing.py
+
+from django.db import transaction
+from django.db.models import F, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue
+
+from .listings import refresh_listings
+from .models import EffectivePrice, PriceWindow
+
+REFRESH_JOB = "products.pricing.refresh_prices_job"
+
+
+def _open_windows(now):
+    return PriceWindow.objects.filter(
+        is_active=True, starts_at__lte=now, ends_at__gt=now
+    )
+
+
+def winning_windows(now):
+    """{(product_id, variant_id): PriceWindow} for the windows open at `now`"""
+    winners = {}
+    windows = _open_windows(now).order_by("-priority", "sale_price", "created")
+    for window in windows.only(
+        "id", "product_id", "variant_id", "sale_price", "ends_at"
+    ):
+        winners.setdefault((window.product_id, window.variant_id), window)
+    return winners
+
+
+def next_boundary(now):
+    """When the next active window starts or ends after `now`, or None"""
+    windows = PriceWindow.objects.filter(is_active=True)
+    boundaries = [
+        windows.filter(starts_at__gt=now).aggregate(at=Min("starts_at"))["at"],
+        windows.filter(ends_at__gt=now).aggregate(at=Min("ends_at"))["at"],
+    ]
+    boundaries = [at for at in boundaries if at is not None]
+    return min(boundaries) if boundaries else None
+
+
+def refresh_effective_prices(now=None):
+    """
+    Bring the EffectivePrice table in line with the windows open at `now`,
+    touching only rows whose price changed. Returns the number of rows
+    created, updated or deleted.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        winners = winning_windows(now)
+        current = {
+            (row.product_id, row.variant_id): row
+            for row in EffectivePrice.objects.select_for_update()
+        }
+
+        stale = [row.pk for key, row in current.items() if key not in winners]
+        changed = []
+        new = []
+        for key, window in winners.items():
+            row = current.get(key)
+            if row is None:
+                new.append(
+                    EffectivePrice(
+                        product_id=key[0],
+                        variant_id=key[1],
+                        price=window.sale_price,
+                        window_id=window.pk,
+                        ends_at=window.ends_at,
+                    )
+                )
+            elif (row.price, row.window_id, row.ends_at) != (
+                window.sale_price,
+                window.pk,
+                window.ends_at,
+            ):
+                row.price = window.sale_price
+                row.window_id = window.pk
+                row.ends_at = window.ends_at
+                changed.append(row)
+
+        EffectivePrice.objects.filter(pk__in=stale).delete()
+        EffectivePrice.objects.bulk_update(
+            changed, ["price", "window", "ends_at"], batch_size=1000
+        )
+        EffectivePrice.objects.bulk_create(new, batch_size=1000)
+
+        # Their listings (and list pages, once this commits) show the new prices
+        product_ids = {row.product_id for row in changed + new}
+        product_ids.update(key[0] for key in current if key not in winners)
+        refresh_listings(product_ids)
+
+    return len(stale) + len(changed) + len(new)
+
+
+def schedule_refresh(at):
+    """Queue a refresh for `at` unless one is already due by then"""
+    if Job.objects.filter(name=REFRESH_JOB, status="queued", run_at__lte=at).exists():
+        return None
+    return enqueue(REFRESH_JOB, run_at=at)
+
+
+def refresh_prices_job():
+    """Job body: refresh now, then schedule the run for the next boundary"""
+    now = timezone.now()
+    count = refresh_effective_prices(now)
+    boundary = next_boundary(now)
+    if boundary is not None:
+        schedule_refresh(boundary)
+    return count
+
+
+def _current_prices_query(pairs, now):
+    product_ids = {product_id for product_id, _ in pairs}
+    if not product_ids:
+        return None
+    return EffectivePrice.objects.filter(
+        product_id__in=product_ids, ends_at__gt=now or timezone.now()
+    ).values_list("product_id", "variant_id", "price")
+
+
+def current_prices(pairs, now=None):
+    """
+    {(product_id, variant_id): price} of the sale prices in effect for
+    `pairs`, from one query on the precomputed table.
+    """
+    rows = _current_prices_query(pairs, now)
+    if rows is None:
+        return {}
+    return {(product_id, variant_id): price for product_id, variant_id, price in rows}
+
+
+async def acurrent_prices(pairs, now=None):
+    """Async version of current_prices()"""
+    rows = _current_prices_query(pairs, now)
+    if rows is None:
+        return {}
+    return {
+        (product_id, variant_id): price
+        async for product_id, variant_id, price in rows
+    }
+
+
+def resolve_price(product, variant, prices):
+    """Unit price of `product` / `variant` given current_prices() output"""
+    if variant is not None:
+        price = prices.get((product.pk, variant.pk))
+        if price is not None:
+            return price
+        base = prices.get((product.pk, None), product.price)
+        return base + variant.price_adjustment
+    return prices.get((product.pk, None), product.price)
+
+
+def _price_pairs(lines):
+    return [
+        (line.product.pk, line.variant.pk if line.variant else None) for line in lines
+    ]
+
+
+def apply_effective_prices(lines):
+    """Set `effective_price` on cart lines (CartItem / CartLine)"""
+    prices = current_prices(_price_pairs(lines))
+    for line in lines:
+        line.effective_price = resolve_price(line.product, line.variant, prices)
+    return lines
+
+
+async def aapply_effective_prices(lines):
+    """Async version of apply_effective_prices()"""
+    prices = await acurrent_prices(_price_pairs(lines))
+    for line in lines:
+        line.effective_price = resolve_price(line.product, line.variant, prices)
+    return lines
+
+
+def with_effective_price(queryset):
+    """Annotate products with `effective_price` (sale price or list price)"""
+    sale_price = EffectivePrice.objects.filter(
+        product=OuterRef("pk"), variant__isnull=True, ends_at__gt=timezone.now()
+    ).values("price")[:1]
+    return queryset.annotate(effective_price=Coalesce(Subquery(sale_price), F("price")))
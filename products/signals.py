@@ -0,0 +1,73 @@
+# products/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .conditional import touch, touch_products
+from .listings import refresh_listings
+from .models import (
+    Brand,
+    Category,
+    PriceWindow,
+    Product,
+    ProductImage,
+    ProductVariant,
+)
+from .pricing import schedule_refresh
+
+
+@receiver(post_save, sender=PriceWindow)
+@receiver(post_delete, sender=PriceWindow)
+def reschedule_price_refresh(sender, **kwargs):
+    """A changed window may move the next boundary; refresh right away"""
+    transaction.on_commit(lambda: schedule_refresh(timezone.now()))
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_listing(sender, instance, **kwargs):
+    refresh_listings([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def touch_product_lists(sender, instance, **kwargs):
+    # Its listing row went with it (CASCADE)
+    touch_products([instance.category_id])
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def refresh_listing_of_product(sender, instance, **kwargs):
+    """Cards show the primary image, the price range and the stock flag"""
+    refresh_listings([instance.product_id])
+
+
+@receiver(post_save, sender=Brand)
+def refresh_brand_listings(sender, instance, **kwargs):
+    refresh_listings(
+        Product.objects.filter(brand=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def touch_category_lists(sender, instance, **kwargs):
+    touch("categories", f"category:{instance.pk}")
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_listings(sender, instance, **kwargs):
+    """Cards carry the slug and the path of names down to their category"""
+    parents = dict(Category.objects.values_list("pk", "parent_id"))
+    subtree = {instance.pk}
+    while True:
+        children = {pk for pk, parent in parents.items() if parent in subtree}
+        if children <= subtree:
+            break
+        subtree |= children
+    refresh_listings(
+        Product.objects.filter(category__in=subtree).values_list("pk", flat=True)
+    )
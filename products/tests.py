@@ -1,3 +1,452 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from cart.storage import CartLine
+from jobs.models import Job
+from reports.models import DailyProductSales
+from reviews.models import Review
+
+from .listings import RECONCILE_JOB, reconcile_listings, reconcile_listings_job
+from .models import (
+    Brand,
+    Category,
+    EffectivePrice,
+    PriceWindow,
+    Product,
+    ProductImage,
+    ProductListing,
+    ProductVariant,
+)
+from .pricing import (
+    REFRESH_JOB,
+    apply_effective_prices,
+    refresh_effective_prices,
+    refresh_prices_job,
+    with_effective_price,
+)
+
+
+class PriceWindowTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        category = Category.objects.create(name="Shoes", slug="shoes")
+        self.product = Product.objects.create(
+            name="Runner",
+            description="Runner",
+            category=category,
+            price=Decimal("100.00"),
+            cost_price=Decimal("40.00"),
+        )
+        self.variant = ProductVariant.objects.create(
+            product=self.product,
+            name="Large",
+            sku="RUN-L",
+            price_adjustment=Decimal("10.00"),
+        )
+
+    def window(self, price, start, end, **kwargs):
+        return PriceWindow.objects.create(
+            product=self.product,
+            sale_price=Decimal(price),
+            starts_at=self.now + timedelta(hours=start),
+            ends_at=self.now + timedelta(hours=end),
+            **kwargs,
+        )
+
+    def test_refresh_materializes_the_winning_window(self):
+        self.window("80.00", -1, 5)
+        self.window("90.00", -1, 5, priority=1)
+        self.window("50.00", 2, 3, priority=2)
+
+        refresh_effective_prices(self.now)
+        self.assertEqual(EffectivePrice.objects.get().price, Decimal("90.00"))
+
+        refresh_effective_prices(self.now + timedelta(hours=2, minutes=30))
+        self.assertEqual(EffectivePrice.objects.get().price, Decimal("50.00"))
+
+        refresh_effective_prices(self.now + timedelta(hours=6))
+        self.assertFalse(EffectivePrice.objects.exists())
+
+    def test_refresh_is_a_no_op_between_boundaries(self):
+        self.window("80.00", -1, 5)
+        self.assertEqual(refresh_effective_prices(self.now), 1)
+        self.assertEqual(refresh_effective_prices(self.now + timedelta(hours=1)), 0)
+
+    def test_job_schedules_the_next_boundary_once(self):
+        self.window("80.00", 2, 5)
+        Job.objects.all().delete()
+
+        refresh_prices_job()
+        refresh_prices_job()
+
+        job = Job.objects.get(name=REFRESH_JOB)
+        self.assertEqual(job.run_at, self.now + timedelta(hours=2))
+
+    def test_cart_lines_and_listings_read_the_table(self):
+        self.window("80.00", -1, 5)
+        PriceWindow.objects.create(
+            product=self.product,
+            variant=self.variant,
+            sale_price=Decimal("70.00"),
+            starts_at=self.now - timedelta(hours=1),
+            ends_at=self.now + timedelta(hours=1),
+        )
+        refresh_effective_prices()
+
+        plain = CartLine("a", self.product, None, 2)
+        variant = CartLine("b", self.product, self.variant, 1)
+        with self.assertNumQueries(1):
+            apply_effective_prices([plain, variant])
+        self.assertEqual(plain.subtotal, Decimal("160.00"))
+        self.assertEqual(variant.unit_price, Decimal("70.00"))
+
+        product = with_effective_price(Product.objects.all()).get()
+        self.assertEqual(product.effective_price, Decimal("80.00"))
+        response = self.client.get(reverse("products:product_list"))
+        self.assertContains(response, "$80.00")
+
+
+class AsyncStorefrontViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Shoes", slug="shoes")
+        Category.objects.create(name="Hats", slug="hats")
+        Product.objects.bulk_create(
+            Product(
+                name=f"Shoe {n:02}",
+                slug=f"shoe-{n:02}",
+                description="Shoe",
+                category=cls.category,
+                price=Decimal("10.00"),
+                cost_price=Decimal("1.00"),
+            )
+            for n in range(13)
+        )
+        reconcile_listings()  # bulk_create sends no signals
+
+    async def test_list_paginates_and_loads_categories(self):
+        response = await self.async_client.get(
+            reverse("products:product_list"), {"page": 2}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["is_paginated"])
+        self.assertEqual(response.context["paginator"].count, 13)
+        self.assertEqual(len(response.context["products"]), 1)
+        self.assertEqual(len(response.context["categories"]), 2)
+
+    async def test_list_rejects_pages_out_of_range(self):
+        url = reverse("products:product_list")
+        for page in ("3", "0", "-1", "last"):
+            with self.subTest(page):
+                response = await self.async_client.get(url, {"page": page})
+                self.assertEqual(response.status_code, 404)
+
+    async def test_detail(self):
+        response = await self.async_client.get(
+            reverse("products:product_detail", args=["shoe-03"])
+        )
+        self.assertContains(response, "Shoe 03")
+
+        response = await self.async_client.get(
+            reverse("products:product_detail", args=["missing"])
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalCatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Shoes", slug="shoes")
+        cls.product = Product.objects.create(
+            name="Runner",
+            slug="runner",
+            description="Runner",
+            category=cls.category,
+            price=Decimal("100.00"),
+            cost_price=Decimal("40.00"),
+        )
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_list_answers_304_until_a_product_changes(self):
+        url = reverse("products:product_category", args=["shoes"])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("s-maxage=60", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+        # Only the category lookup; the products are never queried
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+        unfiltered = reverse("products:product_list")
+        unfiltered_response = self.client.get(unfiltered)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.revalidate(unfiltered, unfiltered_response).status_code, 304
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "Trail runner"
+            self.product.save()
+
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        self.assertEqual(
+            self.revalidate(unfiltered, unfiltered_response).status_code, 200
+        )
+
+    def test_detail_validators_follow_images_and_prices(self):
+        url = reverse("products:product_detail", args=["runner"])
+        response = self.client.get(url)
+        self.assertTrue(response.has_header("Last-Modified"))
+        # The add-to-cart form embeds a CSRF token
+        self.assertIn("private", response["Cache-Control"])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        ProductImage.objects.create(product=self.product, image="runner.jpg")
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, 200)
+
+        now = timezone.now()
+        PriceWindow.objects.create(
+            product=self.product,
+            sale_price=Decimal("80.00"),
+            starts_at=now - timedelta(hours=1),
+            ends_at=now + timedelta(hours=1),
+        )
+        refresh_effective_prices(now)
+        self.assertContains(self.revalidate(url, response), "80.00")
+
+    def test_cart_badge_is_part_of_the_etag_for_session_visitors(self):
+        url = reverse("products:product_list")
+        self.client.post(reverse("cart:add"), {"product_id": self.product.pk})
+        response = self.client.get(url)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        self.client.post(reverse("cart:add"), {"product_id": self.product.pk})
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=300)
+class CatalogContentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Shoes", slug="shoes")
+        cls.product = Product.objects.create(
+            name="Runner",
+            slug="runner",
+            description="Runner",
+            category=cls.category,
+            price=Decimal("100.00"),
+            cost_price=Decimal("40.00"),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_is_served_from_the_cache_until_a_product_changes(self):
+        url = reverse("products:product_list")
+        self.assertContains(self.client.get(url), "Runner")
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, "Runner")
+        self.assertEqual(response.context["paginator"].count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "Trail runner"
+            self.product.save()
+        self.assertContains(self.client.get(url), "Trail runner")
+
+    def test_detail_only_checks_its_validators(self):
+        url = reverse("products:product_detail", args=["runner"])
+        # The product and its validators in one query, then the gallery
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, "Shoes")
+        self.assertContains(response, "csrfmiddlewaretoken")
+
+        ProductImage.objects.create(product=self.product, image="runner.jpg")
+        self.assertContains(self.client.get(url), "runner.jpg")
+
+    def test_missing_pages_are_not_cached(self):
+        url = reverse("products:product_list")
+        self.assertEqual(self.client.get(url, {"page": 9}).status_code, 404)
+        # Count, page and sidebar are queried again
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"page": 9})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=300)
+class WarmCacheCommandTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Shoes", slug="shoes")
+        for n, units in enumerate([5, 9, 0, 7]):
+            product = Product.objects.create(
+                name=f"Shoe {n}",
+                slug=f"shoe-{n}",
+                description="Shoe",
+                category=category,
+                price=Decimal("10.00"),
+                cost_price=Decimal("1.00"),
+            )
+            if units:
+                DailyProductSales.objects.create(
+                    date=timezone.localdate(), product=product, units=units
+                )
+        Product.objects.filter(slug="shoe-3").soft_delete()
+
+    def test_renders_the_best_sellers_from_a_worker_pool(self):
+        out = StringIO()
+        call_command("warm_cache", "--workers=2", "--rate=0", stdout=out)
+        # The list and the two live products that sold; no category rollups yet
+        self.assertIn("Warmed 3 of 3 pages", out.getvalue())
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse("products:product_detail", args=["shoe-1"]))
+        with self.assertNumQueries(0):
+            self.client.get(reverse("products:product_list"))
+
+    @override_settings(ALLOWED_HOSTS=["*"])
+    def test_needs_a_host_to_render_locally(self):
+        with self.assertRaisesMessage(CommandError, "--host"):
+            call_command("warm_cache", stdout=StringIO())
+
+        out = StringIO()
+        call_command("warm_cache", "--host=shop.example.com", "--rate=0", stdout=out)
+        self.assertIn("Warmed 3 of 3 pages", out.getvalue())
+
+
+class ProductListingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        apparel = Category.objects.create(name="Apparel", slug="apparel")
+        cls.category = Category.objects.create(
+            name="Shoes", slug="shoes", parent=apparel
+        )
+        cls.brand = Brand.objects.create(name="Acme", slug="acme")
+        cls.product = Product.objects.create(
+            name="Runner",
+            slug="runner",
+            description="Runner",
+            category=cls.category,
+            brand=cls.brand,
+            price=Decimal("100.00"),
+            cost_price=Decimal("40.00"),
+            stock_quantity=5,
+        )
+        ProductImage.objects.create(
+            product=cls.product, image="runner.jpg", alt_text="Runner", is_primary=True
+        )
+
+    def listing(self):
+        return ProductListing.objects.get(pk=self.product.pk)
+
+    def test_row_flattens_the_product_card(self):
+        listing = self.listing()
+        self.assertEqual(listing.name, "Runner")
+        self.assertEqual(listing.brand_name, "Acme")
+        self.assertEqual(listing.category_slug, "shoes")
+        self.assertEqual(listing.category_path, "Apparel / Shoes")
+        self.assertEqual(listing.image.name, "runner.jpg")
+        self.assertEqual((listing.min_price, listing.max_price), (100, 100))
+        self.assertTrue(listing.in_stock)
+        self.assertIsNone(listing.rating)
+
+    def test_signals_keep_the_row_in_step(self):
+        ProductVariant.objects.create(
+            product=self.product, name="S", sku="RUN-S", stock_quantity=0
+        )
+        ProductVariant.objects.create(
+            product=self.product,
+            name="L",
+            sku="RUN-L",
+            price_adjustment=Decimal("20.00"),
+            stock_quantity=3,
+        )
+        for n, (rating, approved) in enumerate([(4, True), (5, True), (1, False)]):
+            Review.objects.create(
+                product=self.product,
+                user=User.objects.create_user(f"user{n}", f"user{n}@example.com"),
+                rating=rating,
+                title="Review",
+                comment="Review",
+                is_approved=approved,
+            )
+        self.brand.name = "Acme Sports"
+        self.brand.save()
+        apparel = self.category.parent
+        apparel.name = "Clothing"
+        apparel.save()
+
+        now = timezone.now()
+        PriceWindow.objects.create(
+            product=self.product,
+            sale_price=Decimal("80.00"),
+            starts_at=now - timedelta(hours=1),
+            ends_at=now + timedelta(hours=1),
+        )
+        refresh_effective_prices(now)
+
+        listing = self.listing()
+        self.assertEqual(listing.brand_name, "Acme Sports")
+        self.assertEqual(listing.category_path, "Clothing / Shoes")
+        self.assertEqual((listing.rating, listing.review_count), (Decimal("4.5"), 2))
+        self.assertEqual(listing.effective_price, Decimal("80.00"))
+        self.assertEqual((listing.min_price, listing.max_price), (80, 100))
+        self.assertTrue(listing.in_stock)
+
+        ProductVariant.objects.filter(sku="RUN-L").get().delete()
+        self.assertFalse(self.listing().in_stock)
+
+    def test_only_live_available_products_are_listed(self):
+        self.product.is_available = False
+        self.product.save()
+        self.assertFalse(ProductListing.objects.exists())
+
+        self.product.is_available = True
+        self.product.save()
+        self.product.soft_delete()
+        self.assertFalse(ProductListing.objects.exists())
+        self.product.restore()
+        self.assertTrue(ProductListing.objects.exists())
+
+    def test_reconciler_repairs_writes_that_bypass_signals(self):
+        Product.objects.update(name="Trail runner")
+        self.assertEqual(self.listing().name, "Runner")
+
+        self.assertEqual(reconcile_listings_job(), 1)
+        self.assertEqual(self.listing().name, "Trail runner")
+        self.assertEqual(reconcile_listings(), 0)
+        self.assertEqual(
+            Job.objects.filter(name=RECONCILE_JOB, status="queued").count(), 1
+        )
+
+    def test_list_page_reads_only_the_listing_table(self):
+        url = reverse("products:product_category", args=["shoes"])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "runner.jpg")
+        self.assertContains(response, f'data-product-id="{self.product.pk}"')
+        tables = " ".join(query["sql"] for query in queries)
+        self.assertIn('"product_listings"', tables)
+        for table in ("products", "product_images", "brands", "effective_prices"):
+            self.assertNotIn(f'"{table}"', tables)
@@ -1,42 +1,228 @@
 # products/views.py
 
-from django.views.generic import DetailView, ListView
+import asyncio
 
-from .models import Product,Category
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+from django.views import View
+from django.views.generic.base import TemplateResponseMixin
 
+from core.context_processors import cart_item_count
 
-class ProductListView(ListView):
+from .conditional import (
+    acached,
+    detail_validators,
+    fragment_cache,
+    list_validators,
+    product_validators,
+    with_detail_validators,
+)
+from .models import Category, Product, ProductListing
+from .pricing import with_effective_price
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+class ConditionalCatalogMixin:
     """
-    Display all active products
+    Answers conditional GETs (If-None-Match / If-Modified-Since) from
+    validators computed without rendering; see products.conditional.
+
+    Pages differ per visitor only by the cart badge, so visitors with a
+    session get it folded into the ETag and a private, always-revalidated
+    response. Cookie-less responses are public: a shared proxy may serve
+    them for CATALOG_CACHE_SECONDS.
+
+    The visitor-independent ETag also keys the page's data and rendered
+    fragments in the catalog cache (self.catalog_fragment).
+    """
+
+    catalog_fragment = None
+
+    async def get_validators(self, request):
+        """(etag, last_modified) of the page, or None to skip conditional handling"""
+        raise NotImplementedError
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await super().dispatch(request, *args, **kwargs)
+
+        validators = await self.get_validators(request)
+        if validators is None:
+            return await super().dispatch(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        last_modified = int(last_modified.timestamp())
+        self.catalog_fragment = fragment_cache(etag)
+        has_session = settings.SESSION_COOKIE_NAME in request.COOKIES
+        if has_session:
+            badge = await sync_to_async(cart_item_count)(request)
+            etag = f'{etag[:-1]}-{badge["cart_item_count"]}"'
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = await super().dispatch(request, *args, **kwargs)
+
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(last_modified))
+
+        def set_cache_headers(response):
+            # A page embedding a CSRF token (or setting any cookie) is per visitor
+            if (
+                has_session
+                or response.cookies
+                or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            ):
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=0,
+                    s_maxage=getattr(settings, "CATALOG_CACHE_SECONDS", 60),
+                )
+            patch_vary_headers(response, ["Cookie"])
+
+        if getattr(response, "is_rendered", True):
+            set_cache_headers(response)
+        else:
+            response.add_post_render_callback(set_cache_headers)
+        return response
+
+
+class ProductListView(ConditionalCatalogMixin, TemplateResponseMixin, View):
+    """
+    Display all active products, read from the ProductListing table alone.
+    Async: the count, the page of products and the category sidebar do not
+    depend on each other, so the three queries are awaited together.
     """
 
-    model = Product
     template_name = "products/product_list.html"
-    context_object_name = "products"
     paginate_by = 12
 
     def get_queryset(self):
-        queryset = Product.objects.filter(is_available=True).prefetch_related("images")
+        # Only live, available products have a listing row
+        queryset = ProductListing.objects.all()
         category_slug = self.kwargs.get("category_slug")
         if category_slug:
-            queryset = queryset.filter(category__slug=category_slug)
+            queryset = queryset.filter(category_slug=category_slug)
 
         return queryset
 
-    def get_context_data(self, **kwargs):
-        context= super().get_context_data(**kwargs)
-        context["categories"] = Category.objects.filter(is_active=True)
-        return context
-class ProductDetailView(DetailView):
+    async def get_validators(self, request):
+        return await list_validators(self.kwargs.get("category_slug"))
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            number = int(request.GET.get("page") or 1)
+        except ValueError:
+            raise Http404("Invalid page.")
+        if number < 1:
+            raise Http404(f"Invalid page ({number}): That page number is less than 1")
+
+        queryset = self.get_queryset()
+
+        def paginate(count):
+            paginator = Paginator(queryset, self.paginate_by)
+            paginator.count = count  # counted below; skip Paginator's sync count()
+            return paginator
+
+        async def load():
+            # Cached under a generation the primary's commit started: a
+            # lagging replica could store old rows under it, so fill from
+            # the primary
+            rows = queryset.using(DEFAULT_DB_ALIAS)
+            offset = (number - 1) * self.paginate_by
+            count, products, categories = await asyncio.gather(
+                rows.acount(),
+                _alist(rows[offset : offset + self.paginate_by]),
+                _alist(Category.objects.using(DEFAULT_DB_ALIAS).filter(is_active=True)),
+            )
+            # Raised before anything is cached, so only real pages are stored
+            try:
+                paginate(count).validate_number(number)
+            except InvalidPage as e:
+                raise Http404(f"Invalid page ({number}): {e}")
+            return count, products, categories
+
+        count, products, categories = await acached(
+            f"list:{self.catalog_fragment['key']}:{number}", load
+        )
+        paginator = paginate(count)
+        page = Page(products, number, paginator)
+
+        return self.render_to_response(
+            {
+                "view": self,
+                "products": products,
+                "object_list": products,
+                "paginator": paginator,
+                "page_obj": page,
+                "is_paginated": page.has_other_pages(),
+                "categories": categories,
+                "catalog_fragment": self.catalog_fragment,
+            }
+        )
+
+
+class ProductDetailView(ConditionalCatalogMixin, TemplateResponseMixin, View):
     """
     Display single product details
     """
 
-    model = Product
     template_name = "products/product_detail.html"
-    context_object_name = "product"
-    slug_field = "slug"
-    slug_url_kwarg = "slug"
+    product = None
 
     def get_queryset(self):
-        return Product.objects.prefetch_related("images")
+        # Images are read by the gallery fragment, only when it isn't cached
+        return with_effective_price(Product.objects.select_related("category", "brand"))
+
+    async def get_validators(self, request):
+        slug = self.kwargs["slug"]
+        if (
+            "HTTP_IF_NONE_MATCH" in request.META
+            or "HTTP_IF_MODIFIED_SINCE" in request.META
+        ):
+            # Likely a 304: the prebuilt aggregate alone, no product
+            return await detail_validators(slug)
+
+        # The page will be rendered: validate it by the row it renders
+        try:
+            self.product = await with_detail_validators(self.get_queryset()).aget(
+                slug=slug
+            )
+        except Product.DoesNotExist:
+            return None
+        return product_validators(self.product)
+
+    async def get(self, request, slug, *args, **kwargs):
+        async def load():
+            return await aget_object_or_404(self.get_queryset(), slug=slug)
+
+        product = self.product  # fetched with the validators
+        if self.catalog_fragment is None:
+            product = await load()  # no validators: there is no such product
+        elif product is None:
+            product = await acached(f"detail:{self.catalog_fragment['key']}", load)
+        return self.render_to_response(
+            {
+                "view": self,
+                "object": product,
+                "product": product,
+                "catalog_fragment": self.catalog_fragment,
+            }
+        )
@@ -0,0 +1,180 @@
+# products/warming.py
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.models import Sum
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from reports.models import DailyCategorySales, DailyProductSales
+
+
+def popular_products(days=30, limit=100):
+    """Slugs of the best-selling live, available products, by units sold"""
+    since = timezone.localdate() - timedelta(days=days)
+    return list(
+        DailyProductSales.objects.filter(
+            date__gte=since, product__is_available=True, product__is_deleted=False
+        )
+        .values("product__slug")
+        .annotate(sold=Sum("units"))
+        .order_by("-sold", "product__slug")
+        .values_list("product__slug", flat=True)[:limit]
+    )
+
+
+def popular_categories(days=30, limit=20):
+    """Slugs of the best-selling active categories, by units sold"""
+    since = timezone.localdate() - timedelta(days=days)
+    return list(
+        DailyCategorySales.objects.filter(date__gte=since, category__is_active=True)
+        .values("category__slug")
+        .annotate(sold=Sum("units"))
+        .order_by("-sold", "category__slug")
+        .values_list("category__slug", flat=True)[:limit]
+    )
+
+
+def catalog_paths(products, categories, pages=1):
+    """The unfiltered list, then the category lists, then the product pages"""
+    paths = []
+    for category in [None, *categories]:
+        if category is None:
+            path = reverse("products:product_list")
+        else:
+            path = reverse("products:product_category", args=[category])
+        paths.append(path)
+        paths += [f"{path}?page={page}" for page in range(2, pages + 1)]
+    paths += [reverse("products:product_detail", args=[slug]) for slug in products]
+    return paths
+
+
+class RateLimiter:
+    """Spaces calls to wait() at least 1/rate seconds apart, across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(start - now)
+
+
+@dataclass
+class Fetch:
+    path: str
+    status: int
+    ms: float
+
+
+def default_host():
+    """The first ALLOWED_HOSTS entry naming one host, or None"""
+    for host in settings.ALLOWED_HOSTS:
+        if "*" not in host:
+            return host.lstrip(".")
+    return None
+
+
+class LocalFetcher:
+    """
+    Renders pages in this process through the WSGI handler and its full
+    middleware stack, as an anonymous visitor on `host`, filling the shared
+    cache backends.
+    """
+
+    def __init__(self, host):
+        self.factory = RequestFactory(
+            HTTP_HOST=host, secure=getattr(settings, "SECURE_SSL_REDIRECT", False)
+        )
+        self.handler = WSGIHandler()
+
+    def __call__(self, path):
+        status = []
+        environ = self.factory.get(path).environ
+        response = self.handler(environ, lambda line, headers: status.append(line))
+        try:
+            for _ in response:  # a streamed page renders while iterated
+                pass
+        finally:
+            response.close()
+        return int(status[0].split()[0])
+
+    def close(self):
+        # Each worker thread opened its own database connections
+        connections.close_all()
+
+
+class HTTPFetcher:
+    """
+    Requests pages from a running site, which also warms caches local to
+    its worker processes and any shared proxy in front of it.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def __call__(self, path):
+        try:
+            with urlopen(self.base_url + path, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except HTTPError as e:
+            return e.code
+        except URLError:
+            return 0
+
+    def close(self):
+        pass
+
+
+def warm(paths, fetch, workers=4, rate=None):
+    """
+    Fetch `paths` from a pool of `workers` threads, starting at most `rate`
+    requests per second between them so the database keeps serving
+    visitors. Returns a Fetch per path, in completion order.
+    """
+    pending = queue.SimpleQueue()
+    for path in paths:
+        pending.put(path)
+    limiter = RateLimiter(rate)
+    results = []
+
+    def work():
+        try:
+            while True:
+                try:
+                    path = pending.get_nowait()
+                except queue.Empty:
+                    return
+                limiter.wait()
+                started = time.perf_counter()
+                status = fetch(path)
+                results.append(
+                    Fetch(path, status, (time.perf_counter() - started) * 1000)
+                )
+        finally:
+            fetch.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(work) for _ in range(workers)]:
+            future.result()
+    return results
@@ -1,3 +1,24 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Coupon, Promotion
+
+
+@admin.register(Coupon)
+class CouponAdmin(admin.ModelAdmin):
+    list_display = [
+        "code",
+        "discount_type",
+        "discount_value",
+        "usage_count",
+        "valid_to",
+    ]
+    list_filter = ["discount_type", "is_active"]
+    search_fields = ["code"]
+
+
+@admin.register(Promotion)
+class PromotionAdmin(admin.ModelAdmin):
+    list_display = ["name", "promotion_type", "priority", "stackable", "valid_to"]
+    list_filter = ["promotion_type", "is_active", "stackable"]
+    raw_id_fields = ["product"]
+    search_fields = ["name"]
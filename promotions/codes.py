@@ -0,0 +1,197 @@
+# promotions/codes.py
+
+import hashlib
+import math
+import secrets
+from itertools import islice
+
+import numpy as np
+
+from django.db import connections, router, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from core.uuids import generate_uuid
+
+from .models import Coupon
+
+# No 0/O or 1/I; 32 symbols, so every random byte maps without bias
+DEFAULT_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set: no false negatives, about
+    `error_rate` false positives once `capacity` items are in.
+    Values are hashed once with BLAKE2b; the bit positions for a whole
+    batch are then derived and tested with NumPy (double hashing).
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self._steps = np.arange(self.hashes, dtype=np.uint64)
+
+    def _positions(self, values):
+        digests = b"".join(
+            hashlib.blake2b(value.encode(), digest_size=16).digest()
+            for value in values
+        )
+        hashes = np.frombuffer(digests, dtype="<u8").reshape(-1, 2)
+        h1, h2 = hashes[:, :1], hashes[:, 1:] | np.uint64(1)
+        return (h1 + self._steps * h2) % np.uint64(self.size)
+
+    def _present(self, positions):
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        return np.all(self.bits[positions >> np.uint64(3)] & masks, axis=1), masks
+
+    def __contains__(self, value):
+        return bool(self._present(self._positions([value]))[0][0])
+
+    def update(self, values):
+        """
+        Add `values` (distinct strings); returns the ones that were not
+        (probably) in the filter yet.
+        """
+        values = list(values)
+        if not values:
+            return []
+        positions = self._positions(values)
+        present, masks = self._present(positions)
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).ravel(), masks.ravel())
+        return [value for value, seen in zip(values, present.tolist()) if not seen]
+
+
+def random_codes(count, length=10, alphabet=DEFAULT_ALPHABET, prefix=""):
+    """
+    `count` codes of `length` symbols drawn uniformly from `alphabet`
+    with the secrets CSPRNG. Random bytes are mapped to symbols with
+    bytes.translate; bytes that would bias the modulo are dropped.
+    """
+    symbols = len(alphabet)
+    if not 2 <= symbols <= 256 or not alphabet.isascii():
+        raise ValueError("alphabet must have 2-256 ASCII symbols")
+    limit = 256 - 256 % symbols
+    table = bytes(ord(alphabet[byte % symbols]) for byte in range(256))
+    biased = bytes(range(limit, 256))
+
+    needed = count * length
+    stream = b""
+    while len(stream) < needed:
+        missing = needed - len(stream)
+        raw = secrets.token_bytes(missing * 256 // limit + 64)
+        stream += raw.translate(table, biased)
+
+    text = stream[:needed].decode("ascii")
+    return [prefix + text[i : i + length] for i in range(0, needed, length)]
+
+
+def load_existing_codes(prefix="", extra=0, error_rate=0.001):
+    """BloomFilter sized for the current codes (with `prefix`) plus `extra`"""
+    existing = Coupon.objects.all()
+    if prefix:
+        existing = existing.filter(code__startswith=prefix)
+    bloom = BloomFilter(existing.count() + extra, error_rate)
+    codes = existing.values_list("code", flat=True).iterator(chunk_size=20_000)
+    while chunk := list(islice(codes, 100_000)):
+        bloom.update(chunk)
+    return bloom
+
+
+def _insert_ignoring_conflicts(connection, rows):
+    """
+    What bulk_create(ignore_conflicts=True) sends, minus the per-value ORM
+    compilation: one executemany of pre-adapted rows.
+    Returns the cursor's rowcount (-1 where the driver doesn't report it).
+    """
+    fields = Coupon._meta.concrete_fields
+    ops = connection.ops
+    sql = "%s %s (%s) VALUES (%s) %s" % (
+        ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        ops.quote_name(Coupon._meta.db_table),
+        ", ".join(ops.quote_name(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+        ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+        return cursor.rowcount
+
+
+def create_coupons(
+    template,
+    count,
+    length=10,
+    alphabet=DEFAULT_ALPHABET,
+    prefix="",
+    batch_size=10_000,
+    log=None,
+):
+    """
+    Create `count` single-use coupons copying `template` (an unsaved
+    Coupon) with random codes; returns the list of new codes.
+
+    Candidates are deduplicated against a Bloom filter of existing codes
+    (a false positive just costs a fresh candidate), then inserted with
+    INSERT ... ON CONFLICT DO NOTHING in batches. Rows lost to a
+    concurrent generator are noticed by primary key and regenerated.
+    """
+    max_length = Coupon._meta.get_field("code").max_length
+    if len(prefix) + length > max_length:
+        raise ValueError(
+            f"{prefix!r} plus {length} symbols is longer than a coupon code "
+            f"({max_length} characters)"
+        )
+    space = len(alphabet) ** length
+    if count > space // 4:
+        raise ValueError(
+            f"{count} codes would use more than a quarter of the "
+            f"{len(alphabet)}^{length} code space; use longer codes"
+        )
+
+    connection = connections[router.db_for_write(Coupon)]
+    template.usage_limit = 1
+    template.usage_count = 0
+    fields = Coupon._meta.concrete_fields
+    id_field = Coupon._meta.pk
+    id_index = fields.index(id_field)
+    code_index = fields.index(Coupon._meta.get_field("code"))
+
+    bloom = load_existing_codes(prefix, extra=count)
+    created = []
+    while len(created) < count:
+        wanted = min(batch_size, count - len(created))
+        batch = []
+        while len(batch) < wanted:
+            candidates = random_codes(wanted - len(batch), length, alphabet, prefix)
+            batch += bloom.update(dict.fromkeys(candidates))
+
+        # Everything but id and code is the same for the whole batch
+        template.created = template.modified = timezone.now()
+        row = [
+            field.get_db_prep_save(field.value_from_object(template), connection)
+            for field in fields
+        ]
+        ids = [generate_uuid() for _ in batch]
+        rows = []
+        for pk, code in zip(ids, batch):
+            row[id_index] = id_field.get_db_prep_save(pk, connection)
+            row[code_index] = code
+            rows.append(tuple(row))
+
+        with transaction.atomic(using=connection.alias):
+            if _insert_ignoring_conflicts(connection, rows) == len(rows):
+                created += batch
+            else:
+                # Some codes were taken meanwhile; keep the rows that made it
+                inserted = set(
+                    Coupon.objects.filter(id__in=ids).values_list("code", flat=True)
+                )
+                created += [code for code in batch if code in inserted]
+
+        if log:
+            log(f"{len(created)}/{count} codes")
+
+    return created
@@ -0,0 +1,102 @@
+# promotions/coupons.py
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Coupon
+
+# Cached in place of a coupon for codes that don't exist
+_MISSING = "missing"
+
+
+class CouponError(Exception):
+    """Raised when a coupon code cannot be applied"""
+
+
+def _cache():
+    return caches[getattr(settings, "COUPON_CACHE_ALIAS", "default")]
+
+
+def _cache_key(code):
+    """
+    Key for `code` as get_coupon looks it up. Codes are user input, so
+    they are hashed: any length or character makes a valid cache key.
+    """
+    digest = hashlib.sha256(code.strip().encode()).hexdigest()
+    return f"coupon:{digest}"
+
+
+def get_coupon(code):
+    """
+    Active coupon for `code`, or None.
+
+    Hits and misses are both cached, so repeated guesses of unknown codes
+    don't reach the database. Saving or deleting a coupon drops its entry.
+    """
+    code = code.strip()
+    if not code:
+        return None
+
+    key = _cache_key(code)
+    coupon = _cache().get(key)
+    if coupon is None:
+        coupon = Coupon.objects.filter(code=code, is_active=True).first()
+        if coupon is None:
+            _cache().set(
+                key, _MISSING, getattr(settings, "COUPON_NEGATIVE_CACHE_TIMEOUT", 60)
+            )
+            return None
+        _cache().set(key, coupon, getattr(settings, "COUPON_CACHE_TIMEOUT", 300))
+    return None if coupon == _MISSING else coupon
+
+
+def invalidate_coupon(code):
+    _cache().delete(_cache_key(code))
+
+
+def validate_coupon(code, amount):
+    """
+    Check `code` against a purchase of `amount` without redeeming it.
+    Returns (coupon, discount); raises CouponError.
+    """
+    coupon = get_coupon(code)
+    if coupon is None:
+        raise CouponError("Invalid coupon code.")
+    # usage_count may be stale in the cache; redeem() has the final word
+    if not coupon.is_valid():
+        raise CouponError("This coupon is no longer valid.")
+
+    discount = coupon.calculate_discount(amount)
+    if not discount:
+        raise CouponError("Order total is below the coupon minimum.")
+    return coupon, discount
+
+
+def redeem(coupon):
+    """
+    Count one use of `coupon` with a single conditional UPDATE, so
+    concurrent checkouts can never exceed usage_limit. Returns False if
+    the coupon was used up, deactivated or expired in the meantime.
+    """
+    now = timezone.now()
+    return bool(
+        Coupon.objects.filter(
+            Q(usage_limit__isnull=True) | Q(usage_count__lt=F("usage_limit")),
+            pk=coupon.pk,
+            is_active=True,
+            valid_from__lte=now,
+            valid_to__gte=now,
+        ).update(usage_count=F("usage_count") + 1, modified=now)
+    )
+
+
+def redeem_coupon(code, amount):
+    """Validate and redeem `code`; returns (coupon, discount)"""
+    coupon, discount = validate_coupon(code, amount)
+    if not redeem(coupon):
+        raise CouponError("This coupon is no longer valid.")
+    return coupon, discount
@@ -0,0 +1,327 @@
+# promotions/engine.py
+
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from products.models import Category
+
+from .models import Promotion
+
+CENT = Decimal("0.01")
+_VERSION_KEY = "promotions:version"
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Rule:
+    """A Promotion compiled to plain values, ready to evaluate"""
+
+    id: object
+    name: str
+    kind: str
+    priority: int
+    stackable: bool
+    valid_from: object
+    valid_to: object
+    product_id: object = None
+    category_id: object = None
+    brand_id: object = None
+    percent: Decimal = Decimal(0)
+    min_quantity: int = 1
+    buy: int = 0
+    get: int = 0
+    # ((min_amount, percent), ...), highest threshold first
+    tiers: tuple = ()
+
+    @property
+    def sort_key(self):
+        return (-self.priority, str(self.id))
+
+
+@dataclass(slots=True)
+class PromotionLine:
+    """What the engine needs to know about one cart line"""
+
+    key: object
+    product_id: object
+    category_id: object
+    brand_id: object
+    unit_price: Decimal
+    quantity: int
+
+    @property
+    def subtotal(self):
+        return self.unit_price * self.quantity
+
+
+@dataclass
+class PromotionResult:
+    discount: Decimal = Decimal("0.00")
+    # [(rule, amount), ...] in the order they were applied
+    applied: list = field(default_factory=list)
+    # line key -> discount on that line
+    line_discounts: dict = field(default_factory=dict)
+
+
+def compile_promotion(promotion):
+    tiers = sorted(
+        (
+            (Decimal(str(amount)), Decimal(str(percent)))
+            for amount, percent in promotion.tiers or []
+        ),
+        reverse=True,
+    )
+    return Rule(
+        id=promotion.pk,
+        name=promotion.name,
+        kind=promotion.promotion_type,
+        priority=promotion.priority,
+        stackable=promotion.stackable,
+        valid_from=promotion.valid_from,
+        valid_to=promotion.valid_to,
+        product_id=promotion.product_id,
+        category_id=promotion.category_id,
+        brand_id=promotion.brand_id,
+        percent=promotion.value,
+        min_quantity=max(promotion.min_quantity, 1),
+        buy=promotion.buy_quantity,
+        get=promotion.get_quantity,
+        tiers=tuple(tiers),
+    )
+
+
+class PromotionIndex:
+    """
+    Rules bucketed by what they target, so a cart only looks at the rules
+    of its own products, categories and brands (plus cart-wide ones)
+    instead of every active promotion.
+
+    `parents` ({category_id: parent_id}) is the category tree. Products
+    are filed under the most specific category, so a category-wide rule
+    on a department covers the whole subtree below it. Without `parents`
+    a rule covers only its own category. Category pages are different:
+    they list only the products filed directly under the category.
+    """
+
+    def __init__(self, rules=(), parents=None):
+        self.children = defaultdict(set)
+        for pk, parent in (parents or {}).items():
+            self.children[parent].add(pk)
+        self.by_product = defaultdict(list)
+        self.by_category = defaultdict(list)
+        self.by_brand = defaultdict(list)
+        self.cart_wide = []
+        # rule -> the categories it covers
+        self.categories = {}
+        self.size = 0
+        for rule in rules:
+            self.add(rule)
+
+    def subtree(self, category_id):
+        """`category_id` and every category below it"""
+        subtree, level = {category_id}, {category_id}
+        while level:
+            level = {child for pk in level for child in self.children[pk]} - subtree
+            subtree |= level
+        return subtree
+
+    def add(self, rule):
+        if rule.category_id is not None:
+            self.categories[rule] = self.subtree(rule.category_id)
+        # A rule sits in its most selective bucket; the rest of its scope
+        # is checked when matching
+        if rule.product_id is not None:
+            self.by_product[rule.product_id].append(rule)
+        elif rule.category_id is not None:
+            for category_id in self.categories[rule]:
+                self.by_category[category_id].append(rule)
+        elif rule.brand_id is not None:
+            self.by_brand[rule.brand_id].append(rule)
+        else:
+            self.cart_wide.append(rule)
+        self.size += 1
+
+    def in_scope(self, rule, line):
+        return (
+            (rule.product_id is None or rule.product_id == line.product_id)
+            and (rule.category_id is None or line.category_id in self.categories[rule])
+            and (rule.brand_id is None or rule.brand_id == line.brand_id)
+        )
+
+    def candidates(self, lines):
+        """{rule: [matching lines]} for the rules relevant to `lines`"""
+        matches = defaultdict(list)
+        for line in lines:
+            for rule in (
+                *self.by_product.get(line.product_id, ()),
+                *self.by_category.get(line.category_id, ()),
+                *self.by_brand.get(line.brand_id, ()),
+                *self.cart_wide,
+            ):
+                if self.in_scope(rule, line):
+                    matches[rule].append(line)
+        return matches
+
+    def evaluate(self, lines, now=None):
+        return evaluate(lines, self, now)
+
+
+def _percent_of(amount, percent):
+    return (amount * percent / 100).quantize(CENT, ROUND_HALF_UP)
+
+
+def _spread(lines, total, remaining):
+    """Split `total` over `lines` in proportion to what is left of each"""
+    base = sum(remaining[line.key] for line in lines)
+    if not base:
+        return {}
+    shares = {}
+    left = total
+    for line in lines[:-1]:
+        share = (total * remaining[line.key] / base).quantize(CENT, ROUND_HALF_UP)
+        shares[line.key] = share
+        left -= share
+    shares[lines[-1].key] = left
+    return shares
+
+
+def _rule_discounts(rule, lines, remaining):
+    """{line key: discount} that `rule` gives `lines`"""
+    if sum(line.quantity for line in lines) < rule.min_quantity:
+        return {}
+
+    if rule.kind == "percentage":
+        return {
+            line.key: _percent_of(remaining[line.key], rule.percent) for line in lines
+        }
+
+    if rule.kind == "buy_x_get_y":
+        group = rule.buy + rule.get
+        if not rule.buy or not rule.get:
+            return {}
+        # Most expensive units first; the cheapest units of each group are free
+        units = sorted(
+            (
+                (line.unit_price, line.key)
+                for line in lines
+                for _ in range(line.quantity)
+            ),
+            key=lambda unit: unit[0],
+            reverse=True,
+        )
+        discounts = defaultdict(Decimal)
+        for start in range(0, len(units) - group + 1, group):
+            for price, key in units[start + rule.buy : start + group]:
+                discounts[key] += price
+        return discounts
+
+    if rule.kind == "tiered_spend":
+        spend = sum(remaining[line.key] for line in lines)
+        for threshold, percent in rule.tiers:
+            if spend >= threshold:
+                return _spread(lines, _percent_of(spend, percent), remaining)
+        return {}
+
+    return {}
+
+
+def evaluate(lines, index, now=None):
+    """
+    Price `lines` (PromotionLine) against the rules in `index`.
+
+    Rules run highest priority first. Each one discounts what is left of
+    its lines; a non-stackable rule takes its lines out of the running for
+    every rule after it. Returns a PromotionResult.
+    """
+    now = now or timezone.now()
+    result = PromotionResult()
+    remaining = {line.key: line.subtotal for line in lines}
+    locked = set()
+
+    matches = index.candidates(lines)
+    for rule in sorted(matches, key=lambda rule: rule.sort_key):
+        if not rule.valid_from <= now <= rule.valid_to:
+            continue
+        rule_lines = [line for line in matches[rule] if line.key not in locked]
+        if not rule_lines:
+            continue
+
+        applied = Decimal(0)
+        for key, amount in _rule_discounts(rule, rule_lines, remaining).items():
+            amount = min(amount, remaining[key])
+            if amount <= 0:
+                continue
+            remaining[key] -= amount
+            result.line_discounts[key] = result.line_discounts.get(key, 0) + amount
+            applied += amount
+
+        if applied:
+            result.applied.append((rule, applied))
+            result.discount += applied
+            if not rule.stackable:
+                locked.update(line.key for line in rule_lines)
+
+    return result
+
+
+# In-process compiled index, rebuilt when any promotion changes
+
+_index = None
+_index_version = None
+
+
+def _cache():
+    return caches[getattr(settings, "PROMOTIONS_CACHE_ALIAS", "default")]
+
+
+def invalidate_index():
+    """Make every process recompile on its next evaluation"""
+    _cache().set(_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def build_index(now=None):
+    now = now or timezone.now()
+    promotions = Promotion.objects.filter(is_active=True, valid_to__gte=now)
+    parents = dict(Category.objects.values_list("pk", "parent_id"))
+    return PromotionIndex(
+        (compile_promotion(promotion) for promotion in promotions), parents
+    )
+
+
+def get_index():
+    global _index, _index_version
+
+    version = _cache().get(_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        _cache().add(_VERSION_KEY, version, None)
+        version = _cache().get(_VERSION_KEY, version)
+    if _index is None or version != _index_version:
+        _index = build_index()
+        _index_version = version
+    return _index
+
+
+def cart_lines(lines):
+    """PromotionLines for cart storage lines (CartItem / CartLine)"""
+    return [
+        PromotionLine(
+            key=line.id,
+            product_id=line.product.pk,
+            category_id=line.product.category_id,
+            brand_id=line.product.brand_id,
+            unit_price=line.unit_price,
+            quantity=line.quantity,
+        )
+        for line in lines
+    ]
+
+
+def price_cart(lines, now=None):
+    """Automatic promotions for a cart's storage lines"""
+    return evaluate(cart_lines(lines), get_index(), now)
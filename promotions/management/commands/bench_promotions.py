@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from promotions.engine import PromotionIndex, PromotionLine, Rule
+
+
+class Command(BaseCommand):
+    help = "Time pricing a cart against many synthetic promotions (no database)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--promotions", type=int, default=10_000)
+        parser.add_argument("--lines", type=int, default=100)
+        parser.add_argument("--products", type=int, default=50_000)
+        parser.add_argument("--categories", type=int, default=500)
+        parser.add_argument("--brands", type=int, default=1_000)
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        now = timezone.now()
+        window = {
+            "valid_from": now - timedelta(days=1),
+            "valid_to": now + timedelta(days=1),
+        }
+
+        def scope():
+            roll = rng.random()
+            if roll < 0.6:
+                return {"product_id": rng.randrange(options["products"])}
+            if roll < 0.85:
+                return {"category_id": rng.randrange(options["categories"])}
+            if roll < 0.999:
+                return {"brand_id": rng.randrange(options["brands"])}
+            return {}
+
+        def rule(n):
+            kind = rng.choice(["percentage", "buy_x_get_y", "tiered_spend"])
+            return Rule(
+                id=n,
+                name=f"promo {n}",
+                kind=kind,
+                priority=rng.randrange(10),
+                stackable=rng.random() < 0.8,
+                percent=Decimal(rng.randrange(5, 30)),
+                min_quantity=rng.choice([1, 1, 2, 3]),
+                buy=2,
+                get=1,
+                tiers=((Decimal(200), Decimal(10)), (Decimal(100), Decimal(5))),
+                **window,
+                **scope(),
+            )
+
+        started = time.perf_counter()
+        index = PromotionIndex(rule(n) for n in range(options["promotions"]))
+        build = time.perf_counter() - started
+
+        lines = []
+        for n in range(options["lines"]):
+            product_id = rng.randrange(options["products"])
+            lines.append(
+                PromotionLine(
+                    key=n,
+                    product_id=product_id,
+                    category_id=product_id % options["categories"],
+                    brand_id=product_id % options["brands"],
+                    unit_price=Decimal(rng.randrange(100, 20_000)) / 100,
+                    quantity=rng.randint(1, 4),
+                )
+            )
+
+        timings = []
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            result = index.evaluate(lines, now)
+            timings.append(time.perf_counter() - started)
+
+        timings.sort()
+        self.stdout.write(
+            f"{index.size} promotions compiled in {build * 1000:.0f}ms; "
+            f"{len(result.applied)} applied to {len(lines)} lines"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"median {statistics.median(timings) * 1000:.2f}ms, "
+                f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.2f}ms"
+            )
+        )
@@ -0,0 +1,78 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from promotions.codes import DEFAULT_ALPHABET, create_coupons
+from promotions.models import Coupon
+
+
+class Command(BaseCommand):
+    help = "Bulk-create single-use coupons with random codes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, required=True)
+        parser.add_argument("--length", type=int, default=10)
+        parser.add_argument("--alphabet", default=DEFAULT_ALPHABET)
+        parser.add_argument("--prefix", default="")
+        parser.add_argument(
+            "--discount-type", choices=["percentage", "fixed"], default="percentage"
+        )
+        parser.add_argument("--discount-value", type=Decimal, required=True)
+        parser.add_argument("--min-purchase", type=Decimal, default=Decimal(0))
+        parser.add_argument("--max-discount", type=Decimal)
+        parser.add_argument("--valid-days", type=int, default=30)
+        parser.add_argument("--description", default="Campaign coupon")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--output", help="Write the new codes to this file")
+
+    def handle(self, *args, **options):
+        # Checked before any code is generated: an overlong code would only
+        # fail on insert, after the Bloom filter has accepted it
+        max_length = Coupon._meta.get_field("code").max_length
+        if options["length"] < 1:
+            raise CommandError("--length must be at least 1")
+        if len(options["prefix"]) + options["length"] > max_length:
+            raise CommandError(
+                "--prefix plus --length must fit a coupon code "
+                f"({max_length} characters)"
+            )
+
+        now = timezone.now()
+        template = Coupon(
+            description=options["description"],
+            discount_type=options["discount_type"],
+            discount_value=options["discount_value"],
+            min_purchase_amount=options["min_purchase"],
+            max_discount=options["max_discount"],
+            valid_from=now,
+            valid_to=now + timedelta(days=options["valid_days"]),
+        )
+
+        started = time.monotonic()
+        try:
+            codes = create_coupons(
+                template,
+                options["count"],
+                length=options["length"],
+                alphabet=options["alphabet"],
+                prefix=options["prefix"],
+                batch_size=options["batch_size"],
+                log=self.stdout.write if options["verbosity"] > 1 else None,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.writelines(f"{code}\n" for code in codes)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(codes)} coupons in {elapsed:.1f}s "
+                f"({len(codes) / max(elapsed, 1e-6) * 60:,.0f}/min)"
+            )
+        )
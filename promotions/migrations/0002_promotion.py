@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-19 08:04
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_remove_brand_logo_remove_brand_website_and_more'),
+        ('promotions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Promotion',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('promotion_type', models.CharField(choices=[('percentage', 'Percentage off'), ('buy_x_get_y', 'Buy X get Y free'), ('tiered_spend', 'Tiered spend')], max_length=20)),
+                ('value', models.DecimalField(decimal_places=2, default=0, help_text='Percent off for percentage promotions', max_digits=10)),
+                ('min_quantity', models.PositiveIntegerField(default=1, help_text='Matching units needed (e.g. 3 for a brand bundle)')),
+                ('buy_quantity', models.PositiveIntegerField(default=0)),
+                ('get_quantity', models.PositiveIntegerField(default=0)),
+                ('tiers', models.JSONField(blank=True, default=list, help_text='Tiered spend: [[min_amount, percent], ...]')),
+                ('priority', models.IntegerField(default=0)),
+                ('stackable', models.BooleanField(default=True, help_text='Lines discounted by a non-stackable promotion get no other')),
+                ('valid_from', models.DateTimeField()),
+                ('valid_to', models.DateTimeField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('brand', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='promotions', to='products.brand')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='promotions', to='products.category')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='promotions', to='products.product')),
+            ],
+            options={
+                'db_table': 'promotions',
+                'ordering': ['-priority'],
+                'indexes': [models.Index(fields=['is_active', 'valid_to'], name='promotions_is_acti_9bdf6a_idx')],
+            },
+        ),
+    ]
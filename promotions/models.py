@@ -61,7 +61,100 @@ class Coupon(TimeStampedModel, UUIDModel):
             return False
         if now < self.valid_from or now > self.valid_to:
             return False
-        if self.usage_limit and self.usage_count >= self.usage_limit:
+        if self.usage_limit is not None and self.usage_count >= self.usage_limit:
             return False
 
         return True
+
+    def calculate_discount(self, amount):
+        """Discount for a purchase of `amount`, 0 below min_purchase_amount"""
+        from decimal import Decimal
+
+        if amount < self.min_purchase_amount:
+            return Decimal('0.00')
+
+        if self.discount_type == 'percentage':
+            discount = (amount * self.discount_value / 100).quantize(Decimal('0.01'))
+        else:
+            discount = self.discount_value
+
+        if self.max_discount is not None:
+            discount = min(discount, self.max_discount)
+
+        return min(discount, amount)
+
+
+class Promotion(TimeStampedModel, UUIDModel):
+    """
+    Automatic promotion applied to matching cart lines, no code needed.
+    Scope it with product / category / brand; leave all three empty for a
+    cart-wide promotion. A category scope includes its subcategories.
+    Compiled into promotions.engine rules on save.
+    """
+    PROMOTION_TYPES = [
+        ('percentage', _('Percentage off')),
+        ('buy_x_get_y', _('Buy X get Y free')),
+        ('tiered_spend', _('Tiered spend')),
+    ]
+
+    name = models.CharField(max_length=200)
+    promotion_type = models.CharField(max_length=20, choices=PROMOTION_TYPES)
+
+    product = models.ForeignKey(
+        'products.Product',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='promotions'
+    )
+    category = models.ForeignKey(
+        'products.Category',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='promotions'
+    )
+    brand = models.ForeignKey(
+        'products.Brand',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='promotions'
+    )
+
+    value = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        help_text="Percent off for percentage promotions"
+    )
+    min_quantity = models.PositiveIntegerField(
+        default=1,
+        help_text="Matching units needed (e.g. 3 for a brand bundle)"
+    )
+    buy_quantity = models.PositiveIntegerField(default=0)
+    get_quantity = models.PositiveIntegerField(default=0)
+    tiers = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='Tiered spend: [[min_amount, percent], ...]'
+    )
+
+    priority = models.IntegerField(default=0)
+    stackable = models.BooleanField(
+        default=True,
+        help_text="Lines discounted by a non-stackable promotion get no other"
+    )
+    valid_from = models.DateTimeField()
+    valid_to = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        db_table = 'promotions'
+        ordering = ['-priority']
+        indexes = [
+            models.Index(fields=['is_active', 'valid_to']),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,43 @@
+# promotions/signals.py
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from products.models import Category
+
+from .coupons import invalidate_coupon
+from .engine import invalidate_index
+from .models import Coupon, Promotion
+
+
+# Caches are dropped once the write commits. Dropped any earlier, another
+# process could rebuild them from the rows it still reads, and keep them.
+
+
+@receiver(pre_save, sender=Coupon)
+def invalidate_renamed_coupon(sender, instance, raw=False, **kwargs):
+    """A changed code must not keep resolving under the old one"""
+    if raw or instance._state.adding:
+        return
+    old_code = Coupon.objects.filter(pk=instance.pk).values_list("code", flat=True)
+    for code in old_code:
+        if code != instance.code:
+            transaction.on_commit(partial(invalidate_coupon, code))
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def invalidate_cached_coupon(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_coupon, instance.code))
+
+
+@receiver(post_save, sender=Promotion)
+@receiver(post_delete, sender=Promotion)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def recompile_promotions(sender, **kwargs):
+    """Category rules are compiled against the category tree too"""
+    transaction.on_commit(invalidate_index)
@@ -1,3 +1,318 @@
+import warnings
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from products.models import Brand, Category
+
+from .codes import BloomFilter, create_coupons, random_codes
+from .coupons import CouponError, get_coupon, redeem, redeem_coupon, validate_coupon
+from .engine import PromotionIndex, PromotionLine, Rule, get_index
+from .models import Coupon, Promotion
+
+
+def make_coupon(code="SAVE10", **kwargs):
+    now = timezone.now()
+    defaults = {
+        "description": code,
+        "discount_type": "percentage",
+        "discount_value": Decimal("10"),
+        "valid_from": now - timedelta(days=1),
+        "valid_to": now + timedelta(days=1),
+    }
+    defaults.update(kwargs)
+    return Coupon.objects.create(code=code, **defaults)
+
+
+class CouponServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_lookups_are_cached_and_invalidated_on_save(self):
+        coupon = make_coupon()
+        get_coupon("SAVE10")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_coupon("SAVE10"), coupon)
+
+        coupon.is_active = False
+        with self.captureOnCommitCallbacks() as callbacks:
+            coupon.save()
+        # Dropped before the commit, the entry could be re-cached from
+        # the old row by another process
+        self.assertEqual(get_coupon("SAVE10"), coupon)
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(get_coupon("SAVE10"))
+
+    def test_unknown_codes_are_negatively_cached(self):
+        self.assertIsNone(get_coupon("GUESS"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_coupon("GUESS"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_coupon("GUESS")
+        self.assertIsNotNone(get_coupon("GUESS"))
+
+    def test_cache_key_is_safe_for_any_code(self):
+        coupon = make_coupon()
+        get_coupon("SAVE10")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_coupon("  SAVE10\n"), coupon)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            self.assertIsNone(get_coupon("no such\tcode " + "x" * 300))
+
+    def test_discount_honors_minimum_and_cap(self):
+        make_coupon(min_purchase_amount=Decimal("50"), max_discount=Decimal("8"))
+
+        with self.assertRaises(CouponError):
+            validate_coupon("SAVE10", Decimal("40"))
+        self.assertEqual(validate_coupon("SAVE10", Decimal("60"))[1], Decimal("6.00"))
+        self.assertEqual(validate_coupon("SAVE10", Decimal("200"))[1], Decimal("8"))
+
+    def test_redemption_never_exceeds_usage_limit(self):
+        coupon = make_coupon(usage_limit=2)
+        stale = get_coupon("SAVE10")
+
+        redeem_coupon("SAVE10", Decimal("100"))
+        redeem_coupon("SAVE10", Decimal("100"))
+        # The cached copy still says usage_count=0; the UPDATE decides
+        self.assertFalse(redeem(stale))
+        with self.assertRaises(CouponError):
+            redeem_coupon("SAVE10", Decimal("100"))
+
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.usage_count, 2)
+
+    def test_expired_coupon_is_not_redeemed(self):
+        coupon = make_coupon()
+        get_coupon("SAVE10")
+        Coupon.objects.filter(pk=coupon.pk).update(
+            valid_to=timezone.now() - timedelta(minutes=1)
+        )
+        self.assertFalse(redeem(coupon))
+
+
+def make_rule(id, kind="percentage", **kwargs):
+    now = timezone.now()
+    defaults = {
+        "name": f"rule {id}",
+        "priority": 0,
+        "stackable": True,
+        "valid_from": now - timedelta(days=1),
+        "valid_to": now + timedelta(days=1),
+    }
+    defaults.update(kwargs)
+    return Rule(id=id, kind=kind, **defaults)
+
+
+def line(key, price, quantity=1, product=1, category=10, brand=100):
+    return PromotionLine(key, product, category, brand, Decimal(price), quantity)
+
+
+class PromotionEngineTests(TestCase):
+    def test_only_rules_for_the_carts_lines_are_considered(self):
+        index = PromotionIndex(
+            [
+                make_rule(1, category_id=10, percent=Decimal(10)),
+                make_rule(2, category_id=11, percent=Decimal(50)),
+                make_rule(3, product_id=2, percent=Decimal(50)),
+                make_rule(4, brand_id=100, category_id=11, percent=Decimal(50)),
+            ]
+        )
+        lines = [line("a", "100.00")]
+
+        self.assertEqual([rule.id for rule in index.candidates(lines)], [1])
+        self.assertEqual(index.evaluate(lines).discount, Decimal("10.00"))
+
+    def test_category_rules_cover_the_subtree(self):
+        # 10 > 11 > 12, and 20 elsewhere
+        index = PromotionIndex(
+            [
+                make_rule(1, category_id=10, percent=Decimal(10)),
+                make_rule(2, category_id=11, brand_id=100, percent=Decimal(10)),
+            ],
+            parents={10: None, 11: 10, 12: 11, 20: None},
+        )
+
+        deep = [line("a", "100.00", category=12)]
+        self.assertEqual({rule.id for rule in index.candidates(deep)}, {1, 2})
+        self.assertEqual(index.evaluate(deep).discount, Decimal("19.00"))
+        self.assertEqual(index.candidates([line("b", "100.00", category=20)]), {})
+
+    def test_buy_x_get_y_frees_the_cheapest_units(self):
+        index = PromotionIndex(
+            [make_rule(1, "buy_x_get_y", brand_id=100, buy=2, get=1)]
+        )
+        result = index.evaluate(
+            [line("a", "30.00", 2), line("b", "10.00", 2, product=2)]
+        )
+        # 30, 30, 10 -> 10 free; the fourth unit doesn't complete a group
+        self.assertEqual(result.discount, Decimal("10.00"))
+        self.assertEqual(result.line_discounts, {"b": Decimal("10.00")})
+
+    def test_tiered_spend_and_bundle_minimum(self):
+        index = PromotionIndex(
+            [
+                make_rule(
+                    1,
+                    "tiered_spend",
+                    tiers=((Decimal(200), Decimal(10)), (Decimal(100), Decimal(5))),
+                ),
+                make_rule(2, brand_id=100, percent=Decimal(20), min_quantity=3),
+            ]
+        )
+        result = index.evaluate([line("a", "150.00")])
+        self.assertEqual(result.discount, Decimal("7.50"))
+        self.assertEqual(
+            index.evaluate([line("a", "50.00", 3)]).discount,
+            Decimal("30.00") + Decimal("6.00"),
+        )
+
+    def test_non_stackable_rule_blocks_later_rules(self):
+        exclusive = make_rule(1, product_id=1, percent=Decimal(10), priority=5)
+        other = make_rule(2, category_id=10, percent=Decimal(10))
+
+        stacked = PromotionIndex([exclusive, other]).evaluate([line("a", "100.00")])
+        self.assertEqual(stacked.discount, Decimal("19.00"))
+
+        exclusive = make_rule(
+            1, product_id=1, percent=Decimal(10), priority=5, stackable=False
+        )
+        result = PromotionIndex([exclusive, other]).evaluate([line("a", "100.00")])
+        self.assertEqual(result.discount, Decimal("10.00"))
+        self.assertEqual([rule.id for rule, _ in result.applied], [1])
+
+    def test_index_is_recompiled_when_a_promotion_is_saved(self):
+        cache.clear()
+        brand = Brand.objects.create(name="Acme", slug="acme")
+        self.assertEqual(get_index().size, 0)
+        with self.assertNumQueries(0):
+            get_index()
+
+        now = timezone.now()
+        with self.captureOnCommitCallbacks() as callbacks:
+            promotion = Promotion.objects.create(
+                name="Acme week",
+                promotion_type="percentage",
+                brand=brand,
+                value=Decimal(15),
+                valid_from=now - timedelta(days=1),
+                valid_to=now + timedelta(days=1),
+            )
+        self.assertEqual(get_index().size, 0)
+
+        for callback in callbacks:
+            callback()
+        index = get_index()
+        self.assertEqual(index.by_brand[brand.pk][0].id, promotion.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            promotion.delete()
+        self.assertEqual(get_index().size, 0)
+
+    def test_category_rules_follow_the_category_tree(self):
+        cache.clear()
+        parent = Category.objects.create(name="Audio", slug="audio")
+        child = Category.objects.create(name="Headphones", slug="headphones")
+        now = timezone.now()
+        Promotion.objects.create(
+            name="Audio week",
+            promotion_type="percentage",
+            category=parent,
+            value=Decimal(10),
+            valid_from=now - timedelta(days=1),
+            valid_to=now + timedelta(days=1),
+        )
+        lines = [line("a", "100.00", category=child.pk)]
+        self.assertEqual(get_index().evaluate(lines).discount, 0)
+
+        child.parent = parent
+        with self.captureOnCommitCallbacks(execute=True):
+            child.save()
+        self.assertEqual(get_index().evaluate(lines).discount, Decimal("10.00"))
+
+
+class CouponCodeGenerationTests(TestCase):
+    def test_random_codes_use_the_alphabet(self):
+        codes = random_codes(1000, length=8, alphabet="AB", prefix="X-")
+
+        self.assertEqual(len(codes), 1000)
+        self.assertTrue(all(len(code) == 10 for code in codes))
+        self.assertEqual(set("".join(code[2:] for code in codes)), {"A", "B"})
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        values = [f"code-{n}" for n in range(1000)]
+
+        self.assertEqual(bloom.update(values), values)
+        self.assertEqual(bloom.update(values[:10] + ["fresh"]), ["fresh"])
+        self.assertTrue(all(value in bloom for value in values))
+
+    def test_creates_single_use_copies_of_the_template(self):
+        make_coupon("EXISTING")
+        template = Coupon(
+            description="Spring",
+            discount_type="fixed",
+            discount_value=Decimal("5"),
+            valid_from=timezone.now(),
+            valid_to=timezone.now() + timedelta(days=7),
+        )
+
+        codes = create_coupons(template, 250, prefix="SPRING-", batch_size=100)
+
+        self.assertEqual(len(set(codes)), 250)
+        coupons = Coupon.objects.filter(code__startswith="SPRING-")
+        self.assertEqual(coupons.count(), 250)
+        coupon = coupons.get(code=codes[0])
+        self.assertEqual((coupon.usage_limit, coupon.usage_count), (1, 0))
+        self.assertEqual(coupon.discount_value, Decimal("5"))
+
+    def test_codes_taken_meanwhile_are_regenerated(self):
+        make_coupon("TAKEN")
+        template = Coupon(
+            description="Spring",
+            discount_type="fixed",
+            discount_value=Decimal("5"),
+            valid_from=timezone.now(),
+            valid_to=timezone.now() + timedelta(days=7),
+        )
+        # The filter doesn't know about TAKEN, as if another process made it
+        with mock.patch(
+            "promotions.codes.load_existing_codes", return_value=BloomFilter(10)
+        ), mock.patch(
+            "promotions.codes.random_codes",
+            side_effect=[["TAKEN", "FRESH1"], ["FRESH2"]],
+        ):
+            codes = create_coupons(template, 2, length=6)
+
+        self.assertEqual(codes, ["FRESH1", "FRESH2"])
+        self.assertEqual(Coupon.objects.get(code="TAKEN").description, "TAKEN")
+
+    def test_refuses_to_crowd_the_code_space(self):
+        with self.assertRaises(ValueError):
+            create_coupons(Coupon(), 100, length=2, alphabet="AB")
+
+    def test_codes_must_fit_the_code_column(self):
+        with self.assertRaises(ValueError):
+            create_coupons(Coupon(), 1, length=10, prefix="P" * 41)
 
-# Create your tests here.
+        with self.assertRaisesMessage(CommandError, "50 characters"):
+            call_command(
+                "generate_coupons",
+                count=1,
+                discount_value="10",
+                length=10,
+                prefix="SPRING-SALE-" * 4,
+                stdout=StringIO(),
+            )
+        self.assertFalse(Coupon.objects.exists())
@@ -0,0 +1,23 @@
+from django.contrib import admin
+
+from .models import DailyCategorySales, DailyProductSales, DailySales
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ["date", "orders", "units", "revenue", "cost", "discount"]
+    date_hierarchy = "date"
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(admin.ModelAdmin):
+    list_display = ["date", "product", "units", "revenue", "cost"]
+    list_select_related = ["product"]
+    date_hierarchy = "date"
+
+
+@admin.register(DailyCategorySales)
+class DailyCategorySalesAdmin(admin.ModelAdmin):
+    list_display = ["date", "category", "units", "revenue", "cost"]
+    list_select_related = ["category"]
+    date_hierarchy = "date"
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reports.rollups import reconcile_rollups_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the recent daily sales rollups from orders, repairing status "
+        "changes made outside the signals, and queue the next reconciliation "
+        "(run once to start it, or from cron when no job worker is running)"
+    )
+
+    def handle(self, *args, **options):
+        rows = reconcile_rollups_job()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} product rollup rows"))
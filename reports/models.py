@@ -0,0 +1,90 @@
+# reports/models.py
+
+from django.db import models
+
+from products.models import Category, Product
+
+
+class SalesRollup(models.Model):
+    """
+    Abstract base for daily sales rollups.
+    Money is stored as totals of OrderItem.unit_price * quantity (revenue)
+    and OrderItem.unit_cost * quantity (cost), both as of checkout.
+    """
+
+    date = models.DateField()
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def margin(self):
+        return self.revenue - self.cost
+
+
+class DailySales(SalesRollup):
+    """
+    Store-wide totals per day.
+    """
+
+    orders = models.IntegerField(default=0)
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "daily_sales"
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(fields=["date"], name="unique_daily_sales_date")
+        ]
+
+    def __str__(self):
+        return f"{self.date}: {self.revenue}"
+
+
+class DailyProductSales(SalesRollup):
+    """
+    Per-product totals per day.
+    """
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+
+    class Meta:
+        db_table = "daily_product_sales"
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "product"], name="unique_daily_product_sales"
+            )
+        ]
+        indexes = [models.Index(fields=["product", "date"])]
+
+    def __str__(self):
+        return f"{self.date} {self.product_id}: {self.revenue}"
+
+
+class DailyCategorySales(SalesRollup):
+    """
+    Per-category totals per day.
+    """
+
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+
+    class Meta:
+        db_table = "daily_category_sales"
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "category"], name="unique_daily_category_sales"
+            )
+        ]
+        indexes = [models.Index(fields=["category", "date"])]
+
+    def __str__(self):
+        return f"{self.date} {self.category_id}: {self.revenue}"
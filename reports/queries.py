@@ -0,0 +1,68 @@
+# reports/queries.py
+
+from django.db.models import F, Sum
+
+from .models import DailyCategorySales, DailyProductSales, DailySales
+
+TOTALS = {
+    "units": Sum("units"),
+    "revenue": Sum("revenue"),
+    "cost": Sum("cost"),
+}
+
+
+def _with_margin(rows):
+    for row in rows:
+        row["margin"] = (row["revenue"] or 0) - (row["cost"] or 0)
+    return rows
+
+
+def sales_summary(start, end):
+    """Totals for a date range, read from the daily totals table"""
+    row = DailySales.objects.filter(date__range=(start, end)).aggregate(
+        orders=Sum("orders"), discount=Sum("discount"), **TOTALS
+    )
+    return _with_margin([row])[0]
+
+
+def daily_sales(start, end):
+    return _with_margin(
+        list(
+            DailySales.objects.filter(date__range=(start, end))
+            .order_by("date")
+            .values("date", "orders", "discount", "units", "revenue", "cost")
+        )
+    )
+
+
+def top_products(start, end, limit=10, order_by="revenue"):
+    return _with_margin(
+        list(
+            DailyProductSales.objects.filter(date__range=(start, end))
+            .values("product_id", name=F("product__name"))
+            .annotate(**TOTALS)
+            .order_by(f"-{order_by}")[:limit]
+        )
+    )
+
+
+def sales_by_category(start, end):
+    return _with_margin(
+        list(
+            DailyCategorySales.objects.filter(date__range=(start, end))
+            .values("category_id", name=F("category__name"))
+            .annotate(**TOTALS)
+            .order_by("-revenue")
+        )
+    )
+
+
+def sales_by_brand(start, end):
+    return _with_margin(
+        list(
+            DailyProductSales.objects.filter(date__range=(start, end))
+            .values("product__brand_id", name=F("product__brand__name"))
+            .annotate(**TOTALS)
+            .order_by("-revenue")
+        )
+    )
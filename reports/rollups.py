@@ -0,0 +1,269 @@
+# reports/rollups.py
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import chain, islice
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue
+from orders.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from products.models import Product
+
+from .models import DailyCategorySales, DailyProductSales, DailySales
+
+RECONCILE_JOB = "reports.rollups.reconcile_rollups_job"
+
+# Orders in these states count towards sales; cancelled / refunded don't
+COUNTED_STATUSES = frozenset({"pending", "processing", "shipped", "delivered"})
+
+
+def is_counted(status):
+    return status in COUNTED_STATUSES
+
+
+def _increment(model, lookup, deltas):
+    """UPDATE ... SET col = col + delta, creating the row on first use"""
+    updates = {name: F(name) + value for name, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
+
+
+def apply_orders(order_ids, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) orders from the rollups. Called when
+    orders start or stop counting towards sales. The orders' lines are
+    summed per (day, product) first, so however many orders there are it
+    costs one increment per product, category and day they touch.
+    """
+    lines = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .annotate(day=TruncDate("order__created"))
+        .values("day", "product_id", "product__category_id")
+        .annotate(
+            line_units=Sum("quantity"),
+            line_revenue=Sum(F("unit_price") * F("quantity")),
+            line_cost=Sum(F("unit_cost") * F("quantity")),
+        )
+    )
+    orders = (
+        Order.objects.filter(pk__in=order_ids)
+        .annotate(day=TruncDate("created"))
+        .values("day")
+        .annotate(order_count=Count("id"), discount_total=Sum("discount"))
+    )
+
+    def zero():
+        return {"units": 0, "revenue": Decimal(0), "cost": Decimal(0)}
+
+    categories = defaultdict(zero)
+    days = defaultdict(lambda: {**zero(), "orders": 0, "discount": Decimal(0)})
+
+    with transaction.atomic():
+        for line in lines:
+            day = line["day"]
+            deltas = {
+                "units": sign * line["line_units"],
+                "revenue": sign * line["line_revenue"],
+                "cost": sign * line["line_cost"],
+            }
+            _increment(
+                DailyProductSales,
+                {"date": day, "product_id": line["product_id"]},
+                deltas,
+            )
+            for name, value in deltas.items():
+                categories[day, line["product__category_id"]][name] += value
+                days[day][name] += value
+
+        for row in orders:
+            days[row["day"]]["orders"] += sign * row["order_count"]
+            days[row["day"]]["discount"] += sign * (row["discount_total"] or 0)
+
+        for (day, category_id), deltas in categories.items():
+            _increment(
+                DailyCategorySales, {"date": day, "category_id": category_id}, deltas
+            )
+        for day, deltas in days.items():
+            _increment(DailySales, {"date": day}, deltas)
+
+
+def _to_money(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _aggregate_chunk(rows, product_codes, accumulator):
+    """
+    Vectorized group-by of one chunk of order lines on (day, product).
+    rows: [(day, product_id, quantity, unit_price, unit_cost), ...]
+    """
+    days = np.fromiter((row[0].toordinal() for row in rows), np.int64, len(rows))
+    products = np.fromiter(
+        (product_codes.setdefault(row[1], len(product_codes)) for row in rows),
+        np.int64,
+        len(rows),
+    )
+    units = np.fromiter((row[2] for row in rows), np.int64, len(rows))
+    price = np.fromiter((int(row[3] * 100) for row in rows), np.int64, len(rows))
+    cost = np.fromiter((int(row[4] * 100) for row in rows), np.int64, len(rows))
+
+    keys = days * (1 << 32) + products
+    groups, inverse = np.unique(keys, return_inverse=True)
+    sums = np.stack(
+        [
+            np.bincount(inverse, weights=units),
+            np.bincount(inverse, weights=units * price),
+            np.bincount(inverse, weights=units * cost),
+        ],
+        axis=1,
+    )
+    sums = np.rint(sums).astype(np.int64)
+
+    for key, (group_units, revenue, group_cost) in zip(groups.tolist(), sums.tolist()):
+        totals = accumulator[key]
+        totals[0] += group_units
+        totals[1] += revenue
+        totals[2] += group_cost
+
+
+def backfill(start=None, end=None, chunk_size=50_000):
+    """
+    Rebuild the rollups for [start, end] (dates, inclusive) from orders.
+    Order lines are streamed in chunks and grouped with NumPy; only the
+    per-(day, product) totals are kept in memory. Archived orders count
+    too, so archiving never changes the rollups.
+    """
+    item_querysets = []
+    order_querysets = []
+    for item_model, order_model in (
+        (OrderItem, Order),
+        (ArchivedOrderItem, ArchivedOrder),
+    ):
+        items = item_model.objects.filter(
+            order__status__in=COUNTED_STATUSES
+        ).annotate(day=TruncDate("order__created"))
+        orders = order_model.objects.filter(status__in=COUNTED_STATUSES).annotate(
+            day=TruncDate("created")
+        )
+        if start:
+            items, orders = items.filter(day__gte=start), orders.filter(day__gte=start)
+        if end:
+            items, orders = items.filter(day__lte=end), orders.filter(day__lte=end)
+        item_querysets.append(items)
+        order_querysets.append(orders)
+
+    product_codes = {}
+    accumulator = defaultdict(lambda: [0, 0, 0])
+    rows = chain.from_iterable(
+        items.values_list(
+            "day", "product_id", "quantity", "unit_price", "unit_cost"
+        ).iterator(chunk_size=chunk_size)
+        for items in item_querysets
+    )
+    while chunk := list(islice(rows, chunk_size)):
+        _aggregate_chunk(chunk, product_codes, accumulator)
+
+    products = {code: product_id for product_id, code in product_codes.items()}
+    categories = dict(
+        Product.all_objects.filter(pk__in=product_codes).values_list(
+            "pk", "category_id"
+        )
+    )
+
+    product_rows = []
+    category_totals = defaultdict(lambda: [0, 0, 0])
+    day_totals = defaultdict(lambda: [0, 0, 0])
+    for key, (units, revenue, cost) in accumulator.items():
+        day = date.fromordinal(key >> 32)
+        product_id = products[key & 0xFFFFFFFF]
+        product_rows.append(
+            DailyProductSales(
+                date=day,
+                product_id=product_id,
+                units=units,
+                revenue=_to_money(revenue),
+                cost=_to_money(cost),
+            )
+        )
+        for totals in (category_totals[day, categories[product_id]], day_totals[day]):
+            totals[0] += units
+            totals[1] += revenue
+            totals[2] += cost
+
+    order_totals = defaultdict(lambda: {"order_count": 0, "discount_total": 0})
+    for orders in order_querysets:
+        for row in orders.values("day").annotate(
+            order_count=Count("id"), discount_total=Sum("discount")
+        ):
+            totals = order_totals[row["day"]]
+            totals["order_count"] += row["order_count"]
+            totals["discount_total"] += row["discount_total"] or 0
+
+    with transaction.atomic():
+        for model in (DailyProductSales, DailyCategorySales, DailySales):
+            stale = model.objects.all()
+            if start:
+                stale = stale.filter(date__gte=start)
+            if end:
+                stale = stale.filter(date__lte=end)
+            stale.delete()
+
+        DailyProductSales.objects.bulk_create(product_rows, batch_size=1000)
+        DailyCategorySales.objects.bulk_create(
+            [
+                DailyCategorySales(
+                    date=day,
+                    category_id=category_id,
+                    units=units,
+                    revenue=_to_money(revenue),
+                    cost=_to_money(cost),
+                )
+                for (day, category_id), (units, revenue, cost) in (
+                    category_totals.items()
+                )
+            ],
+            batch_size=1000,
+        )
+        DailySales.objects.bulk_create(
+            [
+                DailySales(
+                    date=day,
+                    orders=order_totals[day]["order_count"],
+                    discount=order_totals[day]["discount_total"],
+                    units=units,
+                    revenue=_to_money(revenue),
+                    cost=_to_money(cost),
+                )
+                for day, (units, revenue, cost) in day_totals.items()
+            ],
+            batch_size=1000,
+        )
+
+    return len(product_rows)
+
+
+def reconcile_rollups_job():
+    """
+    Job body: rebuild the last SALES_ROLLUP_RECONCILE_DAYS days, repairing
+    status changes that bypassed the signals (QuerySet.update, raw SQL),
+    then queue the next run. Returns the number of product rollup rows.
+    """
+    days = getattr(settings, "SALES_ROLLUP_RECONCILE_DAYS", 60)
+    rows = backfill(start=timezone.localdate() - timedelta(days=days))
+    interval = getattr(settings, "SALES_ROLLUP_RECONCILE_SECONDS", 24 * 60 * 60)
+    run_at = timezone.now() + timedelta(seconds=interval)
+    if not Job.objects.filter(name=RECONCILE_JOB, status="queued").exists():
+        enqueue(RECONCILE_JOB, run_at=run_at)
+    return rows
@@ -0,0 +1,56 @@
+# reports/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from orders.models import Order
+from orders.signals import orders_transitioned
+
+from .rollups import apply_orders, is_counted
+
+
+@receiver(pre_save, sender=Order)
+def remember_stored_status(sender, instance, update_fields=None, **kwargs):
+    # The stored row, not the status the instance was loaded with:
+    # transitions update rows behind loaded instances
+    instance._rollup_status = None
+    if instance._state.adding or (
+        update_fields is not None and "status" not in update_fields
+    ):
+        return
+    instance._rollup_status = (
+        Order.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Order)
+def update_rollups_on_save(sender, instance, created, **kwargs):
+    if created:
+        was_counted = False
+    elif instance._rollup_status is None:
+        return
+    else:
+        was_counted = is_counted(instance._rollup_status)
+    now_counted = is_counted(instance.status)
+    if was_counted == now_counted:
+        return
+
+    # Order lines are written after the order itself (bulk_create at
+    # checkout), so wait for the transaction to commit.
+    sign = 1 if now_counted else -1
+    transaction.on_commit(lambda: apply_orders([instance.pk], sign))
+
+
+@receiver(orders_transitioned)
+def update_rollups_on_transition(sender, changes, to_status, **kwargs):
+    order_ids = [
+        pk
+        for pk, from_status in changes
+        if is_counted(from_status) != is_counted(to_status)
+    ]
+    if not order_ids:
+        return
+
+    sign = 1 if is_counted(to_status) else -1
+    transaction.on_commit(lambda: apply_orders(order_ids, sign))
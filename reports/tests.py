@@ -0,0 +1,141 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from cart.models import Cart, CartItem
+from jobs.models import Job
+from orders.checkout import checkout
+from orders.models import Order
+from orders.tests import make_customer, make_product
+from orders.transitions import bulk_transition, transition
+
+from .models import DailyCategorySales, DailyProductSales, DailySales
+from .queries import sales_by_category, sales_summary, top_products
+from .rollups import RECONCILE_JOB, backfill, reconcile_rollups_job
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.user, self.address = make_customer()
+        self.shoe = make_product("shoe", "10.00", stock=100)
+        self.hat = make_product("hat", "25.00", stock=100)
+
+    def place_order(self, **quantities):
+        cart = Cart.objects.create(user=self.user)
+        for name, quantity in quantities.items():
+            CartItem.objects.create(
+                cart=cart, product=getattr(self, name), quantity=quantity
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            return checkout(cart, self.address)
+
+    def units(self):
+        today = timezone.localdate()
+        return sales_summary(today, today)["units"] or 0
+
+    def snapshot(self):
+        return [
+            list(model.objects.order_by("pk").values("units", "revenue", "cost"))
+            for model in (DailySales, DailyProductSales, DailyCategorySales)
+        ]
+
+    def test_rollups_follow_orders(self):
+        self.place_order(shoe=2, hat=1)
+        order = self.place_order(shoe=1)
+
+        today = timezone.localdate()
+        summary = sales_summary(today, today)
+        self.assertEqual(summary["orders"], 2)
+        self.assertEqual(summary["units"], 4)
+        self.assertEqual(summary["revenue"], Decimal("55.00"))
+        self.assertEqual(summary["margin"], Decimal("51.00"))
+        self.assertEqual(top_products(today, today)[0]["name"], "shoe")
+        self.assertEqual(sales_by_category(today, today)[0]["units"], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(order, "cancelled")
+
+        summary = sales_summary(today, today)
+        self.assertEqual((summary["orders"], summary["units"]), (1, 3))
+
+    def test_bulk_transition_applies_one_increment_per_product(self):
+        def cancel(orders):
+            with self.captureOnCommitCallbacks() as callbacks:
+                bulk_transition([order.pk for order in orders], "cancelled")
+            with CaptureQueriesContext(connection) as queries:
+                for callback in callbacks:
+                    callback()
+            return len(queries)
+
+        one = cancel([self.place_order(shoe=1, hat=1)])
+        many = cancel([self.place_order(shoe=1, hat=1) for _ in range(5)])
+
+        self.assertEqual(many, one)
+        today = timezone.localdate()
+        self.assertEqual(sales_summary(today, today)["orders"], 0)
+        self.assertEqual(DailyProductSales.objects.get(product=self.shoe).units, 0)
+
+    def test_saved_status_changes_still_move_the_rollups(self):
+        order = self.place_order(shoe=2)
+        stale = Order.objects.get(pk=order.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(order, "cancelled")
+        self.assertEqual(self.units(), 0)
+
+        # Loaded as pending, but saving it revives a cancelled order
+        with self.captureOnCommitCallbacks(execute=True):
+            stale.save()
+        self.assertEqual(self.units(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()  # still "cancelled" since the transition
+        self.assertEqual(self.units(), 0)
+
+    def test_reconcile_repairs_updates_that_bypass_signals(self):
+        order = self.place_order(shoe=2)
+        Order.objects.filter(pk=order.pk).update(status="cancelled")
+        self.assertEqual(self.units(), 2)
+
+        reconcile_rollups_job()
+
+        self.assertEqual(self.units(), 0)
+        self.assertEqual(
+            Job.objects.filter(name=RECONCILE_JOB, status="queued").count(), 1
+        )
+
+    def test_backfill_matches_incremental_rollups(self):
+        self.place_order(shoe=2, hat=1)
+        self.place_order(hat=3)
+        incremental = self.snapshot()
+
+        backfill(chunk_size=1)
+
+        self.assertEqual(self.snapshot()[0], incremental[0])
+        self.assertCountEqual(self.snapshot()[1], incremental[1])
+        self.assertCountEqual(self.snapshot()[2], incremental[2])
+        self.assertEqual(DailySales.objects.get().orders, 2)
+
+    def test_margins_use_the_cost_at_checkout(self):
+        order = self.place_order(shoe=2)
+        self.assertEqual(order.items.get().unit_cost, Decimal("1.00"))
+
+        self.shoe.cost_price = Decimal("4.00")
+        self.shoe.save()
+        self.place_order(shoe=1)
+        backfill()
+
+        today = timezone.localdate()
+        self.assertEqual(sales_summary(today, today)["cost"], Decimal("6.00"))
+
+    def test_backfill_date_range_leaves_other_days(self):
+        self.place_order(shoe=1)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        DailySales.objects.create(date=yesterday, orders=5, units=5, revenue=50)
+
+        backfill(start=timezone.localdate())
+
+        self.assertEqual(DailySales.objects.get(date=yesterday).orders, 5)
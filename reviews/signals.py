@@ -0,0 +1,15 @@
+# reviews/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from products.listings import refresh_listings
+
+from .models import Review
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_product_rating(sender, instance, **kwargs):
+    """Product cards show the rating of the approved reviews"""
+    refresh_listings([instance.product_id])